@@ -0,0 +1,4 @@
+from perfed.benchmark import bench
+from perfed.switch import disable, enable, is_enabled
+
+__all__ = ["bench", "disable", "enable", "is_enabled"]
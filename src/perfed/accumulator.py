@@ -0,0 +1,147 @@
+import collections
+import time
+from typing import Deque, List, Literal
+
+from perfed.stats import RunningStats
+from perfed.util import convert_from_ns
+
+
+class Accumulator:
+    """A timer that can be started and stopped repeatedly under one name, e.g. around a loop body.
+
+    Each start and stop times a lap, which is folded into running aggregates, so memory stays constant
+    no matter how many laps are timed. The durations of the last max_laps laps can also be kept.
+    """
+    __slots__ = ("_name", "_start", "stats", "_laps")
+
+    def __init__(self, name: str, max_laps: int = 0) -> None:
+        """Create an accumulator with no laps.
+
+        Args:
+            name (str): Name of the accumulator.
+            max_laps (int, optional): Number of most recent lap durations to keep. Defaults to 0.
+
+        Raises:
+            ValueError: Max laps is negative.
+        """
+        if max_laps < 0:
+            raise ValueError("Invalid max laps: Max laps must be at least 0.")
+
+        self._name = name
+        self._start: int = -1
+        self.stats = RunningStats()
+        self._laps: Deque[int] | None = collections.deque(maxlen=max_laps) if max_laps else None
+
+    def __len__(self) -> int:
+        return self.stats.count
+
+    @property
+    def running(self) -> bool:
+        """Whether a lap is being timed.
+        """
+        return self._start >= 0
+
+    @property
+    def max_laps(self) -> int:
+        """Number of most recent lap durations kept.
+        """
+        return self._laps.maxlen if self._laps is not None else 0
+
+    def start(self) -> None:
+        """Start a lap. Ignores starts while a lap is being timed.
+        """
+        if self._start < 0:
+            self._start = time.perf_counter_ns()
+
+    def stop(self) -> None:
+        """Stop the current lap and add it to the aggregates.
+
+        Raises:
+            RuntimeError: No lap is being timed.
+        """
+        stop = time.perf_counter_ns()
+        if self._start < 0:
+            raise RuntimeError("Accumulator is not running.")
+
+        duration = stop - self._start
+        self._start = -1
+        self.stats.add(duration)
+        if self._laps is not None:
+            self._laps.append(duration)
+
+    def __enter__(self) -> "Accumulator":
+        self.start()
+        return self
+
+    def __exit__(self, _type, _value, _traceback) -> None:
+        self.stop()
+
+    async def __aenter__(self) -> "Accumulator":
+        return self.__enter__()
+
+    async def __aexit__(self, _type, _value, _traceback) -> None:
+        self.__exit__(_type, _value, _traceback)
+
+    def get(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> float:
+        """Get the total duration of the laps, excluding the one being timed.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the duration in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            float: Total duration.
+        """
+        return convert_from_ns(self.stats.total, unit=unit)
+
+    def laps(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> List[float]:
+        """Get the durations of the most recent laps kept, oldest first.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            List[float]: Lap durations, empty unless max_laps is set.
+        """
+        return [convert_from_ns(duration, unit=unit) for duration in (self._laps or ())]
+
+    def merge(self, other: "Accumulator") -> None:
+        """Merge the laps of another accumulator into this one. Its kept laps are appended after these.
+
+        Args:
+            other (Accumulator): Accumulator to merge.
+        """
+        self.stats.merge(other.stats)
+        if self._laps is not None and other._laps is not None:
+            self._laps.extend(other._laps)
+
+    def reset(self) -> None:
+        """Discard every lap, including the one being timed.
+        """
+        self._start = -1
+        self.stats = RunningStats()
+        if self._laps is not None:
+            self._laps.clear()
+
+
+class _NullAccumulator(Accumulator):
+    """Accumulator returned by timer managers while instrumentation is disabled, which ignores starts and stops.
+    """
+    __slots__ = ()
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def merge(self, other: Accumulator) -> None:
+        pass
+
+
+NULL_ACCUMULATOR = _NullAccumulator(name="")
@@ -0,0 +1,136 @@
+import gc
+import itertools
+import math
+import time
+from typing import Any, Callable, Dict, Sequence
+
+from perfed.timer_manager import TimerManager
+
+
+def _time_loops(fn: Callable, args: Sequence[Any], kwargs: Dict[str, Any], loops: int) -> "tuple[int, int]":
+    """Call a function a number of times between a single pair of timestamps.
+
+    Args:
+        fn (Callable): Function to call.
+        args (Sequence[Any]): Positional arguments of each call.
+        kwargs (Dict[str, Any]): Keyword arguments of each call.
+        loops (int): Number of calls.
+
+    Returns:
+        tuple[int, int]: Start and stop timestamps in nanoseconds.
+    """
+    repeat = itertools.repeat(None, loops)
+    perf_counter_ns = time.perf_counter_ns
+    # Calls without arguments skip the unpacking, as it would be timed too.
+    if args or kwargs:
+        start = perf_counter_ns()
+        for _ in repeat:
+            fn(*args, **kwargs)
+        return start, perf_counter_ns()
+
+    start = perf_counter_ns()
+    for _ in repeat:
+        fn()
+    return start, perf_counter_ns()
+
+
+def calibrate_loops(
+    fn: Callable,
+    args: Sequence[Any] = (),
+    kwargs: Dict[str, Any] | None = None,
+    sample_time: float = 0.001,
+) -> int:
+    """Return the number of calls of a function that take at least sample_time seconds.
+    The number of calls grows at most tenfold per step, towards the number the last step's timing predicts.
+
+    Args:
+        fn (Callable): Function to call.
+        args (Sequence[Any], optional): Positional arguments of each call. Defaults to ().
+        kwargs (Dict[str, Any] | None, optional): Keyword arguments of each call. Defaults to None.
+        sample_time (float, optional): Minimum time of the calls in seconds. Defaults to 0.001.
+
+    Returns:
+        int: Number of calls.
+    """
+    target_ns = sample_time * 1e9
+    loops = 1
+    while True:
+        start, stop = _time_loops(fn, args, kwargs or {}, loops)
+        elapsed = stop - start
+        if elapsed >= target_ns:
+            return loops
+        predicted = math.ceil(loops * target_ns / elapsed) if elapsed > 0 else loops * 10
+        loops = max(loops + 1, min(predicted, loops * 10))
+
+
+def bench(
+    fn: Callable,
+    args: Sequence[Any] = (),
+    kwargs: Dict[str, Any] | None = None,
+    name: str | None = None,
+    samples: int = 100,
+    warmup: int = 1,
+    loops: int | None = None,
+    sample_time: float = 0.001,
+    disable_gc: bool = True,
+    manager: TimerManager | None = None,
+) -> TimerManager:
+    """Benchmark a function, recording the mean duration of a call per sample into a timer manager.
+
+    Each sample times many calls between a single pair of timestamps, so the cost of taking the timestamps
+    is spread over the calls and even functions that run in nanoseconds are measured accurately.
+    The number of calls per sample is calibrated so that a sample takes at least sample_time seconds.
+    Warm-up samples are taken first and discarded.
+
+    Args:
+        fn (Callable): Function to benchmark.
+        args (Sequence[Any], optional): Positional arguments of each call. Defaults to ().
+        kwargs (Dict[str, Any] | None, optional): Keyword arguments of each call. Defaults to None.
+        name (str | None, optional):
+            Name of the new timer manager. Defaults to None, which uses the qualified name of the function.
+        samples (int, optional): Number of samples to record. Defaults to 100.
+        warmup (int, optional): Number of samples to take and discard first. Defaults to 1.
+        loops (int | None, optional):
+            Number of calls per sample. Defaults to None, which calibrates it from sample_time.
+        sample_time (float, optional): Minimum time of a sample in seconds when calibrating. Defaults to 0.001.
+        disable_gc (bool, optional):
+            Whether to disable the garbage collector while benchmarking, so collections triggered by earlier code
+            do not land in the samples. Defaults to True.
+        manager (TimerManager | None, optional):
+            Aggregate or columnar timer manager to record into. Defaults to None, which creates a columnar one.
+
+    Raises:
+        ValueError: Invalid number of samples, warm-up samples or loops, or sample time.
+        RuntimeError: Timer manager is not in aggregate or columnar mode.
+
+    Returns:
+        TimerManager: Timer manager holding a sample per mean call duration, rounded to whole nanoseconds.
+    """
+    if samples < 1 or warmup < 0 or (loops is not None and loops < 1):
+        raise ValueError("Invalid benchmark: Samples and loops must be at least 1 and warmup at least 0.")
+    if sample_time <= 0:
+        raise ValueError("Invalid sample time: Sample time must be positive.")
+
+    if manager is not None and not (manager._aggregate or manager._columnar):
+        raise RuntimeError("Samples can only be recorded in aggregate or columnar mode.")
+
+    if manager is None:
+        manager = TimerManager(name=name if name is not None else getattr(fn, "__qualname__", ""), columnar=True)
+    kwargs = kwargs or {}
+
+    gc_was_enabled = gc.isenabled()
+    if disable_gc:
+        gc.collect()
+        gc.disable()
+    try:
+        if loops is None:
+            loops = calibrate_loops(fn, args, kwargs, sample_time=sample_time)
+        for _ in range(warmup):
+            _time_loops(fn, args, kwargs, loops)
+        for _ in range(samples):
+            start, stop = _time_loops(fn, args, kwargs, loops)
+            manager.record(start, start + round((stop - start) / loops))
+    finally:
+        if disable_gc and gc_was_enabled:
+            gc.enable()
+    return manager
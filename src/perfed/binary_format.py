@@ -0,0 +1,148 @@
+import mmap
+import os
+import struct
+from typing import IO, TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# A file is a sequence of segments, one per save, so saves can be appended across process restarts.
+# Each segment is a header of [magic, version, rows, name count, name table size], a name table of
+# null-separated UTF-8 names padded to 8 bytes, then the name id, start and stop columns as little-endian int64.
+_MAGIC = b"PRFD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQQQ")
+
+
+class BinarySegment:
+    """Samples of a single save, with zero-copy NumPy views of its columns over the memory-mapped file.
+    """
+    __slots__ = ("names", "name_ids", "starts", "stops")
+
+    def __init__(self, names: List[str], name_ids: "np.ndarray", starts: "np.ndarray", stops: "np.ndarray") -> None:
+        self.names = names
+        self.name_ids = name_ids
+        self.starts = starts
+        self.stops = stops
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """Return the samples in dataframe format, with Timer, Start and Stop columns.
+        Start and Stop are zero-copy views of the file, and Timer is categorical, NaN for unnamed samples.
+
+        Returns:
+            pd.DataFrame: A dataframe of the samples.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(
+            {
+                "Timer": pd.Categorical.from_codes(self.name_ids, categories=pd.Index(self.names, dtype=object)),
+                "Start": self.starts,
+                "Stop": self.stops,
+            },
+            copy=False,
+        )
+
+
+def write_segment(
+    fp: IO[bytes],
+    names: List[str],
+    name_ids: "np.ndarray",
+    starts: "np.ndarray",
+    stops: "np.ndarray",
+) -> None:
+    """Write samples as a segment at the current position of a binary file.
+
+    Args:
+        fp (IO[bytes]): File opened in binary write or append mode.
+        names (List[str]): Name table of the samples.
+        name_ids (np.ndarray): Index of each sample name in the name table, or -1 for unnamed samples.
+        starts (np.ndarray): Start timestamps in nanoseconds.
+        stops (np.ndarray): Stop timestamps in nanoseconds.
+    """
+    import numpy as np
+
+    name_table = b"\0".join(name.encode() for name in names)
+    name_table += b"\0" * (-len(name_table) % 8)
+    fp.write(_HEADER.pack(_MAGIC, _VERSION, len(starts), len(names), len(name_table)))
+    fp.write(name_table)
+    for column in (name_ids, starts, stops):
+        fp.write(np.ascontiguousarray(column, dtype="<i8").data)
+
+
+def truncate_torn_segment(path: str) -> None:
+    """Cut off a segment truncated by an interrupted save at the end of a binary file, if any, before appending.
+    Readers stop at a truncated segment, so they would never see the segments appended after it.
+
+    Args:
+        path (str): File path to append to. Missing files are left alone.
+
+    Raises:
+        ValueError: File is not in the binary format.
+    """
+    if not os.path.exists(path):
+        return
+
+    size = os.path.getsize(path)
+    end = 0
+    with open(path, "rb") as fp:
+        while len(header := fp.read(_HEADER.size)) == _HEADER.size:
+            magic, version, rows, _, names_size = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"File {path} is not a perfed binary file.")
+
+            segment_end = end + _HEADER.size + names_size + 3 * rows * 8
+            if segment_end > size:
+                break
+            end = segment_end
+            fp.seek(end)
+    if end < size:
+        os.truncate(path, end)
+
+
+def read_segments(path: str) -> List[BinarySegment]:
+    """Memory-map a binary file and return its segments.
+    A segment truncated by an interrupted save, and anything after it, is ignored.
+
+    Args:
+        path (str): File path to read from.
+
+    Raises:
+        ValueError: File is not in the binary format.
+
+    Returns:
+        List[BinarySegment]: Segments of the file, in the order they were saved.
+    """
+    import numpy as np
+
+    if os.path.getsize(path) == 0:
+        return []
+
+    with open(path, "rb") as fp:
+        # The mapping stays alive as long as any view of it does, after the file is closed.
+        buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    segments = []
+    offset = 0
+    while offset + _HEADER.size <= len(buffer):
+        magic, version, rows, name_count, names_size = _HEADER.unpack_from(buffer, offset)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"File {path} is not a perfed binary file.")
+
+        names_start = offset + _HEADER.size
+        columns_start = names_start + names_size
+        end = columns_start + 3 * rows * 8
+        if end > len(buffer):
+            break
+
+        names = buffer[names_start:columns_start].decode().split("\0")[:name_count] if name_count else []
+        name_ids, starts, stops = (
+            np.frombuffer(buffer, dtype="<i8", count=rows, offset=columns_start + i * rows * 8) for i in range(3)
+        )
+        segments.append(BinarySegment(names=names, name_ids=name_ids, starts=starts, stops=stops))
+        offset = end
+    return segments
@@ -0,0 +1,51 @@
+import functools
+import statistics
+import time
+from typing import Literal
+
+from perfed.timer import Timer
+
+
+def _empty(*args, **kwargs) -> None:
+    pass
+
+
+@functools.cache
+def instrumentation_overhead_ns(path: Literal["timer", "record"] = "timer", samples: int = 2000) -> float:
+    """Estimate the instrumentation overhead included in every duration timed along a path.
+
+    Times an empty section many times and takes the median. For the "timer" path, the section is timed with a
+    `Timer`, which covers the cost of taking both timestamps and of the start and stop calls in between them.
+    For the "record" path, it is an empty function call between two `time.perf_counter_ns()` calls,
+    as decorated functions time a call before passing it to `TimerManager.record`.
+    Measured once per process and path, on first use.
+
+    Args:
+        path (Literal["timer", "record"], optional): Path to calibrate. Defaults to "timer".
+        samples (int, optional): Number of empty sections to time. Defaults to 2000.
+
+    Raises:
+        ValueError: Invalid path.
+
+    Returns:
+        float: Estimated overhead in nanoseconds.
+    """
+    durations = []
+    match path:
+        case "timer":
+            for _ in range(samples):
+                timer = Timer(name="")
+                timer.start()
+                timer.stop()
+                durations.append(timer._stop - timer._start)
+        case "record":
+            perf_counter_ns = time.perf_counter_ns
+            args = ()
+            kwargs = {}
+            for _ in range(samples):
+                start = perf_counter_ns()
+                _empty(*args, **kwargs)
+                durations.append(perf_counter_ns() - start)
+        case _:
+            raise ValueError('Invalid path: Path must be one of ["timer" or "record"].')
+    return float(statistics.median(durations))
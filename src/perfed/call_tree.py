@@ -0,0 +1,171 @@
+import math
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Dict, List, Literal, Tuple
+
+from perfed.util import convert_array_from_ns
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_call_path = ContextVar[Tuple[str, ...]]("perfed_call_path", default=())
+
+
+def current_call_path() -> Tuple[str, ...]:
+    """Return the names of the active hierarchical timers in the current task or thread, outermost first.
+
+    Each asyncio task runs in its own copy of the context, so concurrent tasks never see each other's timers.
+
+    Returns:
+        Tuple[str, ...]: Call path of the innermost active hierarchical timer, empty if none is active.
+    """
+    return _call_path.get()
+
+
+def enter_call(name: str) -> Tuple[str, ...]:
+    """Push a name onto the call path of the current task or thread.
+
+    Args:
+        name (str): Name of the call.
+
+    Returns:
+        Tuple[str, ...]: Call path of the entered call.
+    """
+    path = _call_path.get() + (name,)
+    _call_path.set(path)
+    return path
+
+
+def exit_call(path: Tuple[str, ...]) -> None:
+    """Pop a call off the call path of the current task or thread.
+    Ignored unless the call is the innermost one, so calls exited out of order do not corrupt the path.
+
+    Args:
+        path (Tuple[str, ...]): Call path returned by `enter_call`.
+    """
+    if _call_path.get() == path:
+        _call_path.set(path[:-1])
+
+
+class CallTree:
+    """Call counts and total durations of nested timers, aggregated per call path.
+
+    A call path holds the names of a timer and of every hierarchical timer it ran inside, outermost first.
+    Self time is the total time of a call path minus the total time of its children.
+    """
+    __slots__ = ("_nodes",)
+
+    def __init__(self) -> None:
+        # Call path -> [count, total duration in nanoseconds].
+        self._nodes: Dict[Tuple[str, ...], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add(self, path: Tuple[str, ...], duration_ns: int) -> None:
+        """Add a call to the tree.
+
+        Args:
+            path (Tuple[str, ...]): Call path of the call.
+            duration_ns (int): Duration of the call in nanoseconds.
+        """
+        if (node := self._nodes.get(path)) is None:
+            self._nodes[path] = [1, duration_ns]
+        else:
+            node[0] += 1
+            node[1] += duration_ns
+
+    def merge(self, other: "CallTree") -> None:
+        """Merge the calls of another tree into this one.
+
+        Args:
+            other (CallTree): Tree to merge.
+        """
+        for path, (count, total) in list(other._nodes.items()):
+            if (node := self._nodes.get(path)) is None:
+                self._nodes[path] = [count, total]
+            else:
+                node[0] += count
+                node[1] += total
+
+    def _self_times_ns(self) -> Dict[Tuple[str, ...], int]:
+        """Return the self time of every call path.
+
+        Returns:
+            Dict[Tuple[str, ...], int]: Dictionary of call paths and their self times in nanoseconds.
+        """
+        self_times = {path: total for path, (_, total) in self._nodes.items()}
+        for path, (_, total) in self._nodes.items():
+            if len(path) > 1 and path[:-1] in self_times:
+                self_times[path[:-1]] -= total
+        return self_times
+
+    def to_tuples(
+        self,
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+    ) -> List[Tuple[Tuple[str, ...], int, float, float, float]]:
+        """Return the call paths in depth-first order, with children sorted by name.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            List[Tuple[Tuple[str, ...], int, float, float, float]]: List of tuples with each tuple containing
+                a call path, its count, total time, self time and percentage of its parent's total time.
+                The percentage is NaN for calls without a recorded parent.
+        """
+        import numpy as np
+
+        self_times = self._self_times_ns()
+        paths = sorted(self._nodes)
+        counts, totals_ns, percents = [], [], []
+        for path in paths:
+            count, total = self._nodes[path]
+            parent = self._nodes.get(path[:-1]) if len(path) > 1 else None
+            counts.append(count)
+            totals_ns.append(total)
+            percents.append(total / parent[1] * 100 if parent and parent[1] else math.nan)
+        # Durations are converted in one pass rather than per path.
+        totals = convert_array_from_ns(np.array(totals_ns, dtype=np.int64), unit=unit).tolist()
+        self_times_ns = np.fromiter((self_times[path] for path in paths), dtype=np.int64, count=len(paths))
+        self_totals = convert_array_from_ns(np.maximum(self_times_ns, 0), unit=unit).tolist()
+        return list(zip(paths, counts, totals, self_totals, percents, strict=True))
+
+    def to_dataframe(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> "pd.DataFrame":
+        """Return the call tree in dataframe format, one row per call path in depth-first order.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to display the durations.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            pd.DataFrame: A dataframe with Path, Name, Depth, Count, Total, Self and "% of Parent" columns,
+                where Path joins the call path with semicolons.
+        """
+        import pandas as pd
+
+        rows = self.to_tuples(unit=unit)
+        return pd.DataFrame({
+            "Path": [";".join(path) for path, *_ in rows],
+            "Name": [path[-1] for path, *_ in rows],
+            "Depth": [len(path) - 1 for path, *_ in rows],
+            "Count": [row[1] for row in rows],
+            "Total": [row[2] for row in rows],
+            "Self": [row[3] for row in rows],
+            "% of Parent": [row[4] for row in rows],
+        })
+
+    def to_collapsed(self) -> str:
+        """Return the call tree in the collapsed stack format read by flame graph tools.
+
+        Each line holds a call path joined with semicolons, followed by its self time in nanoseconds.
+
+        Returns:
+            str: Collapsed stacks, one per line.
+        """
+        self_times = self._self_times_ns()
+        return "".join(f"{';'.join(path)} {max(self_times[path], 0)}\n" for path in sorted(self._nodes))
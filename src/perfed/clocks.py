@@ -0,0 +1,132 @@
+import functools
+import gc
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Literal, Sequence, Tuple
+
+from perfed.util import convert_from_ns
+
+CLOCKS = ("thread_time", "process_time", "alloc", "gc")
+
+# Display names of the clocks, used as dataframe columns and stat name prefixes.
+CLOCK_LABELS = {
+    "thread_time": "Thread Time",
+    "process_time": "Process Time",
+    "alloc": "Allocated",
+    "gc": "GC Pause",
+}
+
+# Clocks measuring time in nanoseconds. The others are reported as they are.
+TIME_CLOCKS = frozenset(["thread_time", "process_time", "gc"])
+
+_gc_pause_ns = 0
+_gc_start_ns = 0
+
+
+def _on_gc(phase: str, _info: Dict) -> None:
+    """Add the duration of every garbage collection to the total pause time. Registered in `gc.callbacks`.
+    Collections stop every thread, so the total is shared by all threads.
+    """
+    global _gc_pause_ns, _gc_start_ns
+    if phase == "start":
+        _gc_start_ns = time.perf_counter_ns()
+    else:
+        _gc_pause_ns += time.perf_counter_ns() - _gc_start_ns
+
+
+def _gc_pause() -> int:
+    return _gc_pause_ns
+
+
+def _allocated() -> int:
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _reader(clock: str) -> Callable[[], int]:
+    """Return a function reading a clock, starting what the clock needs to be read.
+
+    Args:
+        clock (str): Name of the clock.
+
+    Returns:
+        Callable[[], int]: Function returning the current reading.
+    """
+    match clock:
+        case "thread_time":
+            return time.thread_time_ns
+        case "process_time":
+            return time.process_time_ns
+        case "alloc":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            return _allocated
+        case _:
+            if _on_gc not in gc.callbacks:
+                gc.callbacks.append(_on_gc)
+            return _gc_pause
+
+
+class ClockReader:
+    """Reads a set of extra clocks at once, so their change over a timed section can be recorded with it.
+
+    Clocks are `thread_time` and `process_time` for the CPU time of the thread and the process in nanoseconds,
+    `alloc` for the memory traced by `tracemalloc` in bytes, and `gc` for the time spent in garbage collections
+    in nanoseconds. Reading `alloc` starts `tracemalloc` if it is not tracing yet, which slows every allocation,
+    and reading `gc` registers a callback in `gc.callbacks`.
+    """
+    __slots__ = ("clocks", "_readers")
+
+    def __init__(self, clocks: Sequence[str]) -> None:
+        """Create a reader of the given clocks.
+
+        Args:
+            clocks (Sequence[str]): Names of the clocks, in the order of their readings.
+
+        Raises:
+            ValueError: Invalid clock.
+        """
+        if any(clock not in CLOCKS for clock in clocks):
+            raise ValueError(f"Invalid clocks: Clocks must be among {list(CLOCKS)}.")
+
+        self.clocks: Tuple[str, ...] = tuple(clocks)
+        self._readers = tuple(_reader(clock) for clock in self.clocks)
+
+    def __call__(self) -> List[int]:
+        """Read every clock.
+
+        Returns:
+            List[int]: Readings in the order of the clocks.
+        """
+        return [read() for read in self._readers]
+
+    def to_dict(self, deltas: Sequence[int], unit: Literal["ns", "ms", "sec", "min"] = "sec") -> Dict[str, float]:
+        """Map the changes of the clocks over a section to their clocks, converting times to the given unit.
+
+        Args:
+            deltas (Sequence[int]): Changes of the clocks, in the order of the clocks.
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the clock times in. Defaults to "sec".
+
+        Returns:
+            Dict[str, float]: Dictionary mapping clock names to their changes. Allocations are in bytes.
+        """
+        return {
+            clock: convert_from_ns(delta, unit=unit) if clock in TIME_CLOCKS else delta
+            for clock, delta in zip(self.clocks, deltas, strict=True)
+        }
+
+
+@functools.cache
+def clock_reader(clocks: Tuple[str, ...]) -> ClockReader:
+    """Return a shared reader of the given clocks.
+
+    Args:
+        clocks (Tuple[str, ...]): Names of the clocks.
+
+    Raises:
+        ValueError: Invalid clock.
+
+    Returns:
+        ClockReader: Reader of the clocks.
+    """
+    return ClockReader(clocks)
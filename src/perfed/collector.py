@@ -0,0 +1,317 @@
+import multiprocessing
+import os
+import sys
+import threading
+import warnings
+import weakref
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Literal
+
+import numpy as np
+
+from perfed.stats import RunningStats
+from perfed.timer_manager import TimerManager
+
+# Ring layout, in int64 words: a header of [owner pid, write count, name count, dropped count],
+# a name table of max_names * NAME_WORDS words, then capacity entries of [name id, duration ns].
+_HEADER_WORDS = 4
+_NAME_WORDS = 8
+_NAME_BYTES = _NAME_WORDS * 8
+_OWNER, _WRITE_COUNT, _NAME_COUNT, _DROPPED = range(_HEADER_WORDS)
+
+# Collectors of this process, released by a single fork handler however many are created or unpickled.
+_collectors: "weakref.WeakSet[SharedMemoryCollector]" = weakref.WeakSet()
+
+
+def _release_rings_after_fork() -> None:
+    """Make a forked process claim its own ring buffers instead of writing to the ones inherited from its parent.
+    """
+    for collector in list(_collectors):
+        collector._ring_offset = -1
+        collector._name_ids = {}
+        # The lock may have been held by a thread that does not exist in the child.
+        collector._write_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_release_rings_after_fork)
+
+
+def _pid_alive(pid: int) -> bool:
+    """Return whether a process exists. Always true on Windows, where signal 0 would interrupt the process.
+
+    Args:
+        pid (int): Process id.
+
+    Returns:
+        bool: Whether the process exists.
+    """
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedMemoryCollector:
+    """Collects durations from timer managers in many processes into shared memory ring buffers.
+
+    The parent process creates the collector and hands it to its workers at process creation
+    (as a `Process` argument, a pool initializer argument, or through fork inheritance).
+    Each worker claims its own ring buffer, so samples are written without locks shared between processes;
+    threads of a worker take turns through a lock of the worker.
+    The parent reads live per-name aggregates of all workers without any file I/O.
+    Ring buffers of workers that exited are claimed again by new workers.
+    Recording never raises in the timed code: samples are dropped, and counted in `dropped`,
+    if a ring buffer wraps around between two polls, if every ring buffer is claimed,
+    or if a name is too long or does not fit in the name table, with a warning the first time.
+    """
+    def __init__(self, rings: int = 64, capacity: int = 65536, max_names: int = 256) -> None:
+        """Create a collector and its shared memory.
+
+        Args:
+            rings (int, optional): Maximum number of worker processes. Defaults to 64.
+            capacity (int, optional): Number of samples each ring buffer holds between polls. Defaults to 65536.
+            max_names (int, optional): Maximum number of distinct names per worker. Defaults to 256.
+        """
+        self._rings = rings
+        self._capacity = capacity
+        self._max_names = max_names
+        self._ring_words = _HEADER_WORDS + max_names * _NAME_WORDS + capacity * 2
+        # New shared memory is zero-filled, so every ring starts unclaimed and empty.
+        self._shm = SharedMemory(create=True, size=rings * self._ring_words * 8)
+        self._lock = multiprocessing.Lock()
+        self._creator_pid = os.getpid()
+        self._init_local()
+
+    def _init_local(self) -> None:
+        """Initialise the per-process state.
+        """
+        self._words = self._shm.buf.cast("q")
+        self._ring_offset = -1
+        self._name_ids: Dict[str, int] = {}
+        # Serialises the threads of this process writing to its ring buffer.
+        self._write_lock = threading.Lock()
+        self._cursors: List[int] = [0] * self._rings
+        # Dropped counts of each ring buffer already added to dropped.
+        self._ring_dropped: List[int] = [0] * self._rings
+        self._stats: Dict[str, RunningStats] = {}
+        self.dropped = 0
+        self._warned = False
+        _collectors.add(self)
+
+    def __getstate__(self) -> dict:
+        return {
+            "name": self._shm.name,
+            "rings": self._rings,
+            "capacity": self._capacity,
+            "max_names": self._max_names,
+            "lock": self._lock,
+            "creator_pid": self._creator_pid,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self._rings = state["rings"]
+        self._capacity = state["capacity"]
+        self._max_names = state["max_names"]
+        self._ring_words = _HEADER_WORDS + self._max_names * _NAME_WORDS + self._capacity * 2
+        # The creating process owns the shared memory, so workers must not unlink it when they exit.
+        # Untracked shared memory is only available from Python 3.13.
+        options = {"track": False} if sys.version_info >= (3, 13) else {}
+        self._shm = SharedMemory(name=state["name"], **options)
+        self._lock = state["lock"]
+        self._creator_pid = state["creator_pid"]
+        self._init_local()
+
+    def __enter__(self) -> "SharedMemoryCollector":
+        return self
+
+    def __exit__(self, _type, _value, _traceback) -> None:
+        self.close()
+
+    def attach(self) -> None:
+        """Claim a ring buffer for the current process and forward every decorated function to it.
+        Meant to be used as a pool initializer.
+
+        Raises:
+            RuntimeError: All ring buffers are claimed.
+        """
+        # Imported here as the decorator module is not needed to only read the collector.
+        from perfed.timer_decorator import TimerDecorator
+
+        if not self._claim():
+            raise RuntimeError(f"All {self._rings} ring buffers of the collector are claimed.")
+        TimerDecorator.attach_collector(self)
+
+    def _claim(self) -> bool:
+        """Claim a free ring buffer for the current process, or one whose process exited.
+        A ring buffer claimed again keeps its samples and names, so samples not yet polled are not lost.
+
+        Returns:
+            bool: Whether a ring buffer is claimed.
+        """
+        if self._ring_offset >= 0:
+            return True
+
+        pid = os.getpid()
+        with self._lock:
+            owners = [self._words[ring * self._ring_words + _OWNER] for ring in range(self._rings)]
+            # Free ring buffers first, so processes that exited are only checked when none are left.
+            rings = [ring for ring, owner in enumerate(owners) if owner in (0, pid)] or [
+                ring for ring, owner in enumerate(owners) if owner != self._creator_pid and not _pid_alive(owner)
+            ]
+            if not rings:
+                return False
+
+            offset = rings[0] * self._ring_words
+            self._words[offset + _OWNER] = pid
+            self._ring_offset = offset
+            self._name_ids = {name: name_id for name_id, name in enumerate(self._ring_names(offset))}
+            return True
+
+    def _ring_names(self, offset: int) -> List[str]:
+        """Return the name table of a ring buffer.
+
+        Args:
+            offset (int): Offset of the ring buffer in words.
+
+        Returns:
+            List[str]: Names in the order of their ids.
+        """
+        names_start = (offset + _HEADER_WORDS) * 8
+        return [
+            bytes(self._shm.buf[names_start + i * _NAME_BYTES:names_start + (i + 1) * _NAME_BYTES])
+            .rstrip(b"\0").decode()
+            for i in range(self._words[offset + _NAME_COUNT])
+        ]
+
+    def _drop(self, reason: str) -> None:
+        """Count a dropped sample in the claimed ring buffer, or locally without one, and warn the first time.
+
+        Args:
+            reason (str): Why the sample is dropped.
+        """
+        if self._ring_offset >= 0:
+            self._words[self._ring_offset + _DROPPED] += 1
+        else:
+            self.dropped += 1
+        if not self._warned:
+            self._warned = True
+            warnings.warn(f"Collector dropped a sample: {reason}.", RuntimeWarning, stacklevel=3)
+
+    def _intern(self, name: str) -> int:
+        """Add a name to the name table of the claimed ring buffer.
+
+        Args:
+            name (str): Name to add.
+
+        Returns:
+            int: Index of the name, or -1 if the name is too long or the name table is full.
+        """
+        encoded = name.encode()
+        if len(encoded) > _NAME_BYTES:
+            self._drop(f"name {name} is longer than {_NAME_BYTES} bytes")
+            return -1
+
+        name_id = self._words[self._ring_offset + _NAME_COUNT]
+        if name_id >= self._max_names:
+            self._drop(f"collector can only hold {self._max_names} names per process")
+            return -1
+
+        start = (self._ring_offset + _HEADER_WORDS + name_id * _NAME_WORDS) * 8
+        self._shm.buf[start:start + _NAME_BYTES] = encoded.ljust(_NAME_BYTES, b"\0")
+        # Publish the name only after it is written.
+        self._words[self._ring_offset + _NAME_COUNT] = name_id + 1
+        self._name_ids[name] = name_id
+        return name_id
+
+    def record(self, name: str, duration_ns: int) -> None:
+        """Write a duration to the ring buffer of the current process, claiming one if needed.
+
+        Args:
+            name (str): Name to aggregate the duration under, usually the timer manager name.
+            duration_ns (int): Duration in nanoseconds.
+        """
+        # Claiming a slot reads and then increments the write count, so two threads must not do it at once.
+        with self._write_lock:
+            if self._ring_offset < 0 and not self._claim():
+                self._drop(f"all {self._rings} ring buffers are claimed")
+                return
+            if (name_id := self._name_ids.get(name)) is None and (name_id := self._intern(name)) < 0:
+                return
+
+            offset = self._ring_offset
+            count = self._words[offset + _WRITE_COUNT]
+            entry = offset + _HEADER_WORDS + self._max_names * _NAME_WORDS + (count % self._capacity) * 2
+            self._words[entry] = name_id
+            self._words[entry + 1] = duration_ns
+            # Publish the entry only after it is written.
+            self._words[offset + _WRITE_COUNT] = count + 1
+
+    def poll(self) -> None:
+        """Fold the samples written since the last poll into the per-name aggregates.
+        """
+        data = np.frombuffer(self._shm.buf, dtype=np.int64)
+        for ring in range(self._rings):
+            offset = ring * self._ring_words
+            if data[offset + _OWNER] == 0:
+                continue
+
+            ring_dropped = int(data[offset + _DROPPED])
+            self.dropped += ring_dropped - self._ring_dropped[ring]
+            self._ring_dropped[ring] = ring_dropped
+            count = int(data[offset + _WRITE_COUNT])
+            first = max(self._cursors[ring], count - self._capacity)
+            self.dropped += first - self._cursors[ring]
+            self._cursors[ring] = count
+            if first == count:
+                continue
+
+            names = self._ring_names(offset)
+            entries_start = offset + _HEADER_WORDS + self._max_names * _NAME_WORDS
+            entries = data[entries_start:entries_start + self._capacity * 2].reshape(-1, 2)
+            rows = entries[np.arange(first, count) % self._capacity]
+            for name_id in np.unique(rows[:, 0]).tolist():
+                durations = rows[rows[:, 0] == name_id, 1]
+                stats = self._stats.setdefault(names[name_id], RunningStats())
+                stats.merge(RunningStats.from_values(durations))
+
+    def get_managers(self) -> Dict[str, TimerManager]:
+        """Poll and return an aggregate timer manager per name, merged across all processes.
+
+        Returns:
+            Dict[str, TimerManager]: Dictionary of names and aggregate timer managers.
+        """
+        self.poll()
+        managers = {}
+        for name, stats in self._stats.items():
+            manager = TimerManager(name=name, aggregate=True)
+            manager._stats.merge(stats)
+            managers[name] = manager
+        return managers
+
+    def get_stats(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> Dict[str, Dict[str, float]]:
+        """Poll and return the aggregate stats per name, merged across all processes.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            Dict[str, Dict[str, float]]: Dictionary of names and their stats.
+        """
+        return {name: manager.get_stats(unit=unit) for name, manager in self.get_managers().items()}
+
+    def close(self) -> None:
+        """Detach from the shared memory, and free it if this is the process that created the collector.
+        """
+        self._words.release()
+        self._shm.close()
+        if os.getpid() == self._creator_pid:
+            self._shm.unlink()
@@ -0,0 +1,342 @@
+import math
+import re
+from statistics import NormalDist
+from typing import TYPE_CHECKING, Callable, Dict, List, Literal
+
+from perfed.timer_manager import TimerManager
+from perfed.util import convert_from_ns
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Decorated functions and unnamed samples are labelled `name(n)`, so their timers are grouped under `name`.
+_CALL_SUFFIX = re.compile(r"\(\d+\)$")
+
+
+class TimerComparison:
+    """Comparison of the durations of a timer between a baseline and a candidate run.
+
+    The delta is the difference in median durations, candidate minus baseline, with a confidence interval
+    from the McKean-Schrader standard errors of both medians. Significance is tested with the two-sided
+    Mann-Whitney U test, which makes no assumption about the shape of the duration distributions.
+    """
+    __slots__ = (
+        "name", "baseline_count", "candidate_count", "baseline_median", "candidate_median",
+        "delta", "delta_low", "delta_high", "p_value", "significant", "slower", "faster",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        baseline_count: int,
+        candidate_count: int,
+        baseline_median: float,
+        candidate_median: float,
+        delta_low: float,
+        delta_high: float,
+        p_value: float,
+        significant: bool,
+        slower: bool,
+        faster: bool,
+    ) -> None:
+        self.name = name
+        self.baseline_count = baseline_count
+        self.candidate_count = candidate_count
+        self.baseline_median = baseline_median
+        self.candidate_median = candidate_median
+        self.delta = candidate_median - baseline_median
+        self.delta_low = delta_low
+        self.delta_high = delta_high
+        self.p_value = p_value
+        self.significant = significant
+        self.slower = slower
+        self.faster = faster
+
+    @property
+    def change(self) -> float:
+        """Relative change of the median duration, e.g. 0.1 for 10% slower. NaN if the baseline median is 0.
+        """
+        return self.delta / self.baseline_median if self.baseline_median else math.nan
+
+    def to_tuple(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> tuple:
+        """Return the comparison as a tuple of name, counts, medians, delta and its interval, change, p-value
+        and verdict.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            tuple: The comparison.
+        """
+        verdict = "slower" if self.slower else "faster" if self.faster else ""
+        return (
+            self.name,
+            self.baseline_count,
+            self.candidate_count,
+            *(
+                convert_from_ns(value, unit=unit)
+                for value in (self.baseline_median, self.candidate_median, self.delta, self.delta_low, self.delta_high)
+            ),
+            self.change,
+            self.p_value,
+            verdict,
+        )
+
+
+COMPARISON_HEADERS = [
+    "Timer", "Baseline Count", "Candidate Count", "Baseline Median", "Candidate Median",
+    "Delta", "Delta Low", "Delta High", "Change", "P-Value", "Verdict",
+]
+
+
+def _median_and_se(durations: "np.ndarray", z: float) -> "tuple[float, float]":
+    """Return the median of durations and its McKean-Schrader standard error, from a partial sort.
+
+    Args:
+        durations (np.ndarray): Durations in nanoseconds.
+        z (float): Standard normal quantile of the confidence level.
+
+    Returns:
+        tuple[float, float]: Median and its standard error in nanoseconds. The standard error is NaN
+            for a single duration.
+    """
+    import numpy as np
+
+    n = len(durations)
+    median = float(np.median(durations))
+    if n < 2:
+        return median, math.nan
+
+    c = min(max(round((n + 1) / 2 - z * math.sqrt(n / 4)), 1), n)
+    low, high = np.partition(durations, [c - 1, n - c])[[c - 1, n - c]]
+    return median, float(high - low) / (2 * z)
+
+
+def _mann_whitney_p_value(baseline: "np.ndarray", candidate: "np.ndarray") -> float:
+    """Return the two-sided p-value of the Mann-Whitney U test, from the normal approximation with tie correction.
+    Ranks are computed with a single sort, so the test runs in O(n log n).
+
+    Args:
+        baseline (np.ndarray): Baseline durations.
+        candidate (np.ndarray): Candidate durations.
+
+    Returns:
+        float: P-value. NaN if either sample has fewer than two durations.
+    """
+    import numpy as np
+
+    n1, n2 = len(candidate), len(baseline)
+    if n1 < 2 or n2 < 2:
+        return math.nan
+
+    _, inverse, counts = np.unique(np.concatenate((candidate, baseline)), return_inverse=True, return_counts=True)
+    # Tied durations share the average of the ranks they span.
+    average_ranks = np.cumsum(counts) - (counts - 1) / 2
+    rank_sum = float(average_ranks[inverse[:n1]].sum())
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    ties = float((counts.astype(np.float64) ** 3 - counts).sum())
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+
+    z = (abs(u - n1 * n2 / 2) - 0.5) / math.sqrt(variance)
+    return min(math.erfc(max(z, 0.0) / math.sqrt(2)), 1.0)
+
+
+def compare_durations(
+    baseline: "np.ndarray",
+    candidate: "np.ndarray",
+    name: str = "",
+    confidence: float = 0.95,
+    threshold: float = 0.0,
+) -> TimerComparison:
+    """Compare the durations of a timer between a baseline and a candidate run.
+
+    Args:
+        baseline (np.ndarray): Baseline durations in nanoseconds.
+        candidate (np.ndarray): Candidate durations in nanoseconds.
+        name (str, optional): Name of the timer. Defaults to "".
+        confidence (float, optional): Confidence level of the interval and the test. Defaults to 0.95.
+        threshold (float, optional):
+            Smallest relative change of the median flagged as slower or faster, e.g. 0.05 for 5%. Defaults to 0.0.
+
+    Raises:
+        ValueError: Invalid confidence level, or no baseline or candidate durations.
+
+    Returns:
+        TimerComparison: Comparison of the durations.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("Invalid confidence: Confidence must be between 0 and 1.")
+    if len(baseline) == 0 or len(candidate) == 0:
+        raise ValueError(f"Timer {name} has no durations to compare.")
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    baseline_median, baseline_se = _median_and_se(baseline, z)
+    candidate_median, candidate_se = _median_and_se(candidate, z)
+    delta = candidate_median - baseline_median
+    margin = z * math.hypot(baseline_se, candidate_se)
+    p_value = _mann_whitney_p_value(baseline, candidate)
+
+    significant = p_value < 1 - confidence
+    large_enough = abs(delta) > threshold * baseline_median
+    return TimerComparison(
+        name=name,
+        baseline_count=len(baseline),
+        candidate_count=len(candidate),
+        baseline_median=baseline_median,
+        candidate_median=candidate_median,
+        delta_low=delta - margin,
+        delta_high=delta + margin,
+        p_value=p_value,
+        significant=significant,
+        slower=significant and large_enough and delta > 0,
+        faster=significant and large_enough and delta < 0,
+    )
+
+
+def grouped_durations(manager: TimerManager) -> "Dict[str, np.ndarray]":
+    """Return the durations of the stopped timers of a timer manager, grouped by name.
+    Timers labelled `name(n)`, such as the calls of a decorated function, are grouped under `name`.
+
+    Args:
+        manager (TimerManager): Timer manager holding individual timers.
+
+    Raises:
+        ValueError: Timer manager is in aggregate mode.
+
+    Returns:
+        Dict[str, np.ndarray]: Dictionary mapping group names to their durations in nanoseconds, in sorted order.
+    """
+    import numpy as np
+
+    if manager._aggregate:
+        raise ValueError("Only timer managers holding individual timers can be compared.")
+
+    samples = manager._merged()[1] if manager._columnar else manager.snapshot().samples
+    names, name_ids, starts, stops = samples.columns_since(0)
+    # Groups are assigned per name table entry, then broadcast to the samples in one pass.
+    groups = sorted({_CALL_SUFFIX.sub("", name) for name in names} | {manager._name})
+    group_index = {group: i for i, group in enumerate(groups)}
+    remap = np.array(
+        [group_index[_CALL_SUFFIX.sub("", name)] for name in names] + [group_index[manager._name]],
+        dtype=np.int64,
+    )
+    group_ids = remap[name_ids]
+    durations = stops - starts
+    order = np.argsort(group_ids, kind="stable")
+    bounds = np.cumsum(np.bincount(group_ids, minlength=len(groups)))[:-1]
+    return {
+        group: group_durations
+        for group, group_durations in zip(groups, np.split(durations[order], bounds), strict=True)
+        if len(group_durations) > 0
+    }
+
+
+def compare_managers(
+    baseline: TimerManager,
+    candidate: TimerManager,
+    confidence: float = 0.95,
+    threshold: float = 0.0,
+) -> List[TimerComparison]:
+    """Compare the timers of two timer managers, one comparison per timer name found in both.
+
+    Args:
+        baseline (TimerManager): Timer manager of the baseline run.
+        candidate (TimerManager): Timer manager of the candidate run.
+        confidence (float, optional): Confidence level of the intervals and tests. Defaults to 0.95.
+        threshold (float, optional):
+            Smallest relative change of a median flagged as slower or faster, e.g. 0.05 for 5%. Defaults to 0.0.
+
+    Raises:
+        ValueError: Invalid confidence level, or a timer manager is in aggregate mode.
+
+    Returns:
+        List[TimerComparison]: Comparisons sorted by timer name.
+    """
+    baseline_groups = grouped_durations(baseline)
+    candidate_groups = grouped_durations(candidate)
+    return [
+        compare_durations(baseline_groups[name], candidate_groups[name], name, confidence, threshold)
+        for name in sorted(baseline_groups.keys() & candidate_groups.keys())
+    ]
+
+
+def compare_files(
+    baseline_path: str,
+    candidate_path: str,
+    name: str = "",
+    confidence: float = 0.95,
+    threshold: float = 0.0,
+) -> List[TimerComparison]:
+    """Compare the timers of two files saved in the binary format, see `TimerManager.load`.
+
+    Args:
+        baseline_path (str): File path of the baseline run.
+        candidate_path (str): File path of the candidate run.
+        name (str, optional): Name unnamed samples are grouped under. Defaults to "".
+        confidence (float, optional): Confidence level of the intervals and tests. Defaults to 0.95.
+        threshold (float, optional):
+            Smallest relative change of a median flagged as slower or faster, e.g. 0.05 for 5%. Defaults to 0.0.
+
+    Raises:
+        ValueError: Invalid confidence level, or a file is not in the binary format.
+
+    Returns:
+        List[TimerComparison]: Comparisons sorted by timer name.
+    """
+    return compare_managers(
+        TimerManager.load(baseline_path, name=name),
+        TimerManager.load(candidate_path, name=name),
+        confidence=confidence,
+        threshold=threshold,
+    )
+
+
+def comparisons_to_dataframe(
+    comparisons: List[TimerComparison],
+    unit: Literal["ns", "ms", "sec", "min"] = "sec",
+) -> "pd.DataFrame":
+    """Return comparisons in dataframe format, one row per timer.
+
+    Args:
+        comparisons (List[TimerComparison]): Comparisons to return.
+        unit (Literal["ns", "ms", "sec", "min"], optional):
+            The unit of time to display the durations.
+            Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+            and "min" for minutes. Defaults to "sec".
+
+    Returns:
+        pd.DataFrame: A dataframe with a column per `COMPARISON_HEADERS` entry.
+    """
+    import pandas as pd
+
+    return pd.DataFrame([comparison.to_tuple(unit=unit) for comparison in comparisons], columns=COMPARISON_HEADERS)
+
+
+def show_comparisons(
+    comparisons: List[TimerComparison],
+    unit: Literal["ns", "ms", "sec", "min"] = "sec",
+    print_fn: Callable = print,
+) -> None:
+    """
+    Output comparisons, one row per timer. Prints to stdout by default.
+
+    Args:
+        comparisons (List[TimerComparison]): Comparisons to output.
+        unit (Literal["ns", "ms", "sec", "min"], optional):
+            The unit of time to display the durations.
+            Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+            and "min" for minutes. Defaults to "sec".
+        print_fn (Callable, optional):
+            A callable function used to output the comparisons (e.g., `print`, `logger.debug`).
+            Defaults to the built-in `print` function.
+    """
+    from tabulate import tabulate
+
+    print_fn(tabulate([comparison.to_tuple(unit=unit) for comparison in comparisons], headers=COMPARISON_HEADERS))
@@ -0,0 +1,376 @@
+import atexit
+import collections
+import itertools
+import threading
+from typing import Callable, Deque, Dict, Iterable, List, Literal
+
+from perfed.binary_format import truncate_torn_segment, write_segment
+from perfed.sample_store import SampleStore
+from perfed.timer import Timer
+from perfed.timer_manager import TimerManager
+from perfed.util import convert_array_from_ns
+
+
+class ExportBatch:
+    """Timers stopped in a timer manager since its previous batch.
+    Aggregate timer managers export their current stats instead.
+    """
+    __slots__ = ("name", "samples", "first_row", "stats", "threads")
+
+    def __init__(
+        self,
+        name: str,
+        samples: SampleStore | None = None,
+        first_row: int = 0,
+        stats: Dict[str, float] | None = None,
+        threads: Dict[int, str] | None = None,
+    ) -> None:
+        self.name = name
+        self.samples = samples
+        self.first_row = first_row
+        self.stats = stats
+        # Names of the threads known to have recorded the samples, keyed by `threading.get_native_id()`.
+        self.threads = threads if threads is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.samples) if self.samples is not None else 0
+
+    def to_tuples(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> List[tuple]:
+        """Return the timers of the batch, or the stats of an aggregate batch, in list of tuples format.
+        Unnamed samples are labelled `name(n)`, where n is the position of the sample across all batches.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            List[tuple]: List of tuples with each tuple containing a timer name and its duration,
+                or a stat name and its value.
+        """
+        if self.samples is None:
+            return list(self.stats.items()) if self.stats else []
+
+        labels = self.samples.labels(self.name, first_row=self.first_row)
+        durations = convert_array_from_ns(self.samples.durations_ns(), unit=unit).tolist()
+        return list(zip(labels, durations, strict=True))
+
+
+class FileSink:
+    """Appends batches to a file, in the binary format or as CSV.
+    Stats of aggregate batches are only written as CSV, as `name:stat,value` lines.
+    """
+    def __init__(
+        self,
+        path: str,
+        fmt: Literal["csv", "binary"] = "binary",
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+    ) -> None:
+        """Open the file for appending.
+
+        Args:
+            path (str): File path to append to.
+            fmt (Literal["csv", "binary"], optional): Format of the file. Defaults to "binary".
+            unit (Literal["ns", "ms", "sec", "min"], optional): Unit of CSV durations. Defaults to "sec".
+
+        Raises:
+            ValueError: Invalid fmt, or binary format for a file in another format.
+        """
+        if fmt not in ["csv", "binary"]:
+            raise ValueError('Invalid format: Format must be one of ["csv" or "binary"].')
+
+        self._fmt = fmt
+        self._unit = unit
+        if fmt == "binary":
+            truncate_torn_segment(path)
+        self._fp = open(path, mode="ab" if fmt == "binary" else "a")
+
+    def write(self, batch: ExportBatch) -> None:
+        if self._fmt == "binary":
+            if (samples := batch.samples) is not None:
+                # Copies, as the writer thread must not hold views of the buffers.
+                names, name_ids, starts, stops = samples.columns_since(0)
+                write_segment(self._fp, names, name_ids, starts, stops)
+        elif batch.samples is not None:
+            self._fp.write("".join(f"{name},{duration}\n" for name, duration in batch.to_tuples(self._unit)))
+        else:
+            self._fp.write("".join(f"{batch.name}:{stat},{value}\n" for stat, value in batch.to_tuples(self._unit)))
+        self._fp.flush()
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+class LogSink:
+    """Outputs batches as tables through a print function, e.g. `logger.debug`.
+    """
+    def __init__(self, print_fn: Callable = print, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> None:
+        self._print_fn = print_fn
+        self._unit = unit
+
+    def write(self, batch: ExportBatch) -> None:
+        from tabulate import tabulate
+
+        headers = ["Timer", "Duration"] if batch.samples is not None else ["Stat", "Value"]
+        self._print_fn(tabulate(batch.to_tuples(self._unit), headers=headers))
+
+    def close(self) -> None:
+        pass
+
+
+class _Cursor:
+    """Position up to which the timers of a timer manager have been exported.
+    """
+    __slots__ = ("shard_rows", "timers", "running", "rows", "count", "resets")
+
+    def __init__(self) -> None:
+        # Rows exported per shard in columnar mode, keyed by shard serial, see `TimerManager._new_rows`.
+        self.shard_rows: Dict[int, int] = {}
+        # Timers scanned in dict mode, and the ones among them that were still running, to export once stopped.
+        self.timers = 0
+        self.running: List[Timer] = []
+        # Samples exported in total, to label unnamed samples across batches.
+        self.rows = 0
+        # Sample count of the last exported stats in aggregate mode.
+        self.count = 0
+        # Resets of the timer manager seen, after which the positions above start over.
+        self.resets = 0
+
+    def rebase(self, resets: int) -> None:
+        """Start the positions over after the timer manager was reset, keeping the total used for labels.
+
+        Args:
+            resets (int): Resets of the timer manager.
+        """
+        self.shard_rows.clear()
+        self.timers = 0
+        self.running.clear()
+        self.count = 0
+        self.resets = resets
+
+
+class BackgroundExporter:
+    """Exports the timers stopped since the previous export from timer managers to sinks, in background threads.
+
+    A drain thread collects new timers from every timer manager at a fixed interval and queues them as batches,
+    and a writer thread writes the queued batches to every sink, so recording threads never format or write timers.
+    The queue is bounded: when it is full, the oldest or newest batch is dropped and counted in `dropped`,
+    or draining blocks until the writer catches up, leaving new timers in their timer managers.
+    `close`, also run at interpreter exit, exports every remaining timer before stopping.
+    """
+    def __init__(
+        self,
+        sinks: Iterable,
+        managers: Iterable[TimerManager] = (),
+        interval: float = 1.0,
+        max_batches: int = 1024,
+        drop_policy: Literal["drop_oldest", "drop_newest", "block"] = "drop_oldest",
+    ) -> None:
+        """Create an exporter. Call `start` or use it as a context manager to start exporting.
+
+        Args:
+            sinks (Iterable): Sinks with `write(batch)` and `close()` methods, e.g. `FileSink` and `LogSink`.
+            managers (Iterable[TimerManager], optional): Timer managers to export. Defaults to ().
+            interval (float, optional): Seconds between drains. Defaults to 1.0.
+            max_batches (int, optional): Maximum number of queued batches. Defaults to 1024.
+            drop_policy (Literal["drop_oldest", "drop_newest", "block"], optional):
+                What to do with a new batch when the queue is full. Defaults to "drop_oldest".
+
+        Raises:
+            ValueError: Invalid interval, queue size or drop policy.
+        """
+        if interval <= 0 or max_batches < 1:
+            raise ValueError("Invalid exporter: Interval and max batches must be positive.")
+        if drop_policy not in ["drop_oldest", "drop_newest", "block"]:
+            raise ValueError(
+                'Invalid drop policy: Drop policy must be one of ["drop_oldest", "drop_newest" or "block"].',
+            )
+
+        self._sinks = list(sinks)
+        self._managers: Dict[TimerManager, _Cursor] = {}
+        self._interval = interval
+        self._max_batches = max_batches
+        self._drop_policy = drop_policy
+        self._queue: Deque[ExportBatch] = collections.deque()
+        self._condition = threading.Condition()
+        self._drain_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._closing = False
+        self._writing = False
+        self._drain_thread: threading.Thread | None = None
+        self._write_thread: threading.Thread | None = None
+        self.dropped = 0
+        self.failed = 0
+        for manager in managers:
+            self.add(manager)
+
+    def __enter__(self) -> "BackgroundExporter":
+        return self.start()
+
+    def __exit__(self, _type, _value, _traceback) -> None:
+        self.close()
+
+    def add(self, manager: TimerManager) -> None:
+        """Export the timers of a timer manager, starting with the ones it already holds.
+
+        Args:
+            manager (TimerManager): Timer manager to export.
+        """
+        with self._drain_lock:
+            self._managers.setdefault(manager, _Cursor())
+
+    def start(self) -> "BackgroundExporter":
+        """Start the drain and writer threads.
+
+        Raises:
+            RuntimeError: Exporter is already started.
+
+        Returns:
+            BackgroundExporter: The exporter.
+        """
+        if self._drain_thread is not None:
+            raise RuntimeError("Exporter is already started.")
+
+        self._drain_thread = threading.Thread(target=self._drain_loop, name="perfed-drain", daemon=True)
+        self._write_thread = threading.Thread(target=self._write_loop, name="perfed-write", daemon=True)
+        self._drain_thread.start()
+        self._write_thread.start()
+        atexit.register(self.close)
+        return self
+
+    def _delta(self, manager: TimerManager, cursor: _Cursor) -> ExportBatch | None:
+        """Collect the timers a timer manager stopped since its previous batch.
+
+        Args:
+            manager (TimerManager): Timer manager to collect from.
+            cursor (_Cursor): Export position of the timer manager.
+
+        Returns:
+            ExportBatch | None: Batch of new timers, or None if there are none.
+        """
+        if manager._resets != cursor.resets:
+            cursor.rebase(manager._resets)
+
+        if manager._aggregate:
+            stats = manager.get_stats(unit="ns")
+            if stats["Count"] == cursor.count:
+                return None
+            cursor.count = stats["Count"]
+            return ExportBatch(name=manager._name, stats=stats)
+
+        samples = SampleStore()
+        threads: Dict[int, str] = {}
+        if manager._columnar:
+            for shard, first, last in manager._new_rows(cursor.shard_rows):
+                if last > first:
+                    names, name_ids, starts, stops = shard._samples.columns_since(first, last)
+                    thread_ids = shard._samples.threads_since(first, last)
+                    samples.extend_columns(names, name_ids, starts, stops, threads=thread_ids)
+                    threads.update(shard._threads)
+        else:
+            # Slicing the append-only creation order only copies the new timers. Running timers are set aside
+            # rather than holding back the ones after them, and exported once stopped.
+            timers = manager._timer_order[cursor.timers:]
+            cursor.timers += len(timers)
+            running = []
+            for timer in itertools.chain(cursor.running, timers):
+                if timer._stop < 0:
+                    running.append(timer)
+                else:
+                    samples.append(samples.intern(timer._name), timer._start, timer._stop, timer._thread)
+            cursor.running = running
+
+        if len(samples) == 0:
+            return None
+        batch = ExportBatch(name=manager._name, samples=samples, first_row=cursor.rows, threads=threads)
+        cursor.rows += len(samples)
+        return batch
+
+    def _put(self, batch: ExportBatch) -> None:
+        """Queue a batch, applying the drop policy if the queue is full.
+
+        Args:
+            batch (ExportBatch): Batch to queue.
+        """
+        with self._condition:
+            while len(self._queue) >= self._max_batches:
+                if self._drop_policy == "block":
+                    self._condition.wait()
+                elif self._drop_policy == "drop_oldest":
+                    self.dropped += max(len(self._queue.popleft()), 1)
+                else:
+                    self.dropped += max(len(batch), 1)
+                    return
+            self._queue.append(batch)
+            self._condition.notify_all()
+
+    def drain(self) -> None:
+        """Queue the timers stopped since the previous drain. Called by the drain thread at every interval.
+        """
+        with self._drain_lock:
+            for manager, cursor in list(self._managers.items()):
+                if (batch := self._delta(manager, cursor)) is not None:
+                    self._put(batch)
+
+    def _drain_loop(self) -> None:
+        while not self._stopping.wait(self._interval):
+            self.drain()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closing:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                batch = self._queue.popleft()
+                self._writing = True
+                self._condition.notify_all()
+
+            for sink in self._sinks:
+                try:
+                    sink.write(batch)
+                except Exception:
+                    # A failing sink must not stop the writer, or flushes would never complete.
+                    self.failed += 1
+
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Drain now and wait until every queued batch is written.
+
+        Args:
+            timeout (float | None, optional): Maximum number of seconds to wait. Defaults to None.
+
+        Raises:
+            RuntimeError: Exporter is not started.
+
+        Returns:
+            bool: Whether every batch was written before the timeout.
+        """
+        if self._write_thread is None:
+            raise RuntimeError("Exporter is not started.")
+
+        self.drain()
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queue and not self._writing, timeout=timeout)
+
+    def close(self) -> None:
+        """Stop draining, write every remaining timer and close the sinks. Ignores multiple closes.
+        """
+        if self._drain_thread is None or self._closing:
+            return
+
+        atexit.unregister(self.close)
+        self._stopping.set()
+        self._drain_thread.join()
+        self.drain()
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._write_thread.join()
+        for sink in self._sinks:
+            sink.close()
@@ -0,0 +1,150 @@
+import math
+from array import array
+from typing import TYPE_CHECKING, List, Sequence, cast
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class LatencyHistogram:
+    """Mergeable, fixed-memory histogram of durations in nanoseconds with log-linear buckets.
+
+    Values below 2 ** precision get a bucket each. Above that, every power of two is split into
+    2 ** (precision - 1) equal buckets, so quantiles are reported with a relative error of at most 2 ** -precision.
+    Buckets are allocated up to the largest value recorded, and recording a value is O(1).
+    NumPy is only imported by the vectorized methods, so recording values needs only the standard library.
+    """
+    __slots__ = ("_precision", "_sub_buckets", "_half", "_counts", "count")
+
+    def __init__(self, precision: int = 7) -> None:
+        """Create an empty histogram.
+
+        Args:
+            precision (int, optional): Number of significant bits kept per value. Defaults to 7.
+        """
+        self._precision = precision
+        self._sub_buckets = 1 << precision
+        self._half = self._sub_buckets >> 1
+        self._counts = array("q")
+        self.count = 0
+
+    def _index(self, value: int) -> int:
+        """Return the bucket index of a value.
+
+        Args:
+            value (int): Duration in nanoseconds.
+
+        Returns:
+            int: Bucket index.
+        """
+        if value < self._sub_buckets:
+            return max(value, 0)
+
+        shift = value.bit_length() - self._precision
+        return self._sub_buckets + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def _grow(self, size: int) -> None:
+        """Allocate buckets up to the given size.
+
+        Args:
+            size (int): Number of buckets needed.
+        """
+        if size > len(self._counts):
+            self._counts.extend(array("q", bytes(8 * (size - len(self._counts)))))
+
+    def add(self, value: int) -> None:
+        """Add a duration to the histogram.
+
+        Args:
+            value (int): Duration in nanoseconds.
+        """
+        index = self._index(value)
+        if index >= len(self._counts):
+            self._grow(index + 1)
+        self._counts[index] += 1
+        self.count += 1
+
+    def add_values(self, values: "np.ndarray") -> None:
+        """Add an array of durations to the histogram in a single vectorized pass.
+
+        Args:
+            values (np.ndarray): Durations in nanoseconds.
+        """
+        if len(values) == 0:
+            return
+
+        import numpy as np
+
+        values = np.maximum(values.astype(np.int64), 0)
+        # frexp's exponent is the bit length for integers exactly representable as float64.
+        _, bit_lengths = np.frexp(values.astype(np.float64))
+        shifts = np.maximum(bit_lengths.astype(np.int64) - self._precision, 0)
+        indices = np.where(
+            values < self._sub_buckets,
+            values,
+            self._sub_buckets + (shifts - 1) * self._half + np.right_shift(values, shifts) - self._half,
+        )
+        bins = np.bincount(indices)
+        self._grow(len(bins))
+        counts = np.frombuffer(self._counts, dtype=np.int64).copy()
+        counts[:len(bins)] += bins
+        self._counts = array("q", counts.tobytes())
+        self.count += len(values)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Merge the counts of another histogram with the same precision into this one.
+
+        Args:
+            other (LatencyHistogram): Histogram to merge.
+
+        Raises:
+            ValueError: Histograms have different precisions.
+        """
+        if other._precision != self._precision:
+            raise ValueError("Only histograms with the same precision can be merged.")
+
+        if other.count == 0:
+            return
+
+        import numpy as np
+
+        self._grow(len(other._counts))
+        counts = np.frombuffer(self._counts, dtype=np.int64).copy()
+        counts[:len(other._counts)] += np.frombuffer(other._counts, dtype=np.int64)
+        self._counts = array("q", counts.tobytes())
+        self.count += other.count
+
+    def _midpoint(self, index: int) -> float:
+        """Return the midpoint of a bucket.
+
+        Args:
+            index (int): Bucket index.
+
+        Returns:
+            float: Midpoint of the bucket in nanoseconds.
+        """
+        if index < self._sub_buckets:
+            return float(index)
+
+        shift, mantissa = divmod(index - self._sub_buckets, self._half)
+        shift += 1
+        return ((mantissa + self._half) << shift) + ((1 << shift) - 1) / 2
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Return the values at the given quantiles.
+
+        Args:
+            qs (Sequence[float]): Quantiles between 0 and 1.
+
+        Returns:
+            List[float]: Values at each quantile in nanoseconds, NaN if the histogram is empty.
+        """
+        if self.count == 0:
+            return [math.nan] * len(qs)
+
+        import numpy as np
+
+        cumulative = np.cumsum(np.frombuffer(self._counts, dtype=np.int64))
+        ranks = [min(max(math.ceil(q * self.count), 1), self.count) for q in qs]
+        indices = cast("np.ndarray", np.searchsorted(cumulative, ranks))
+        return [self._midpoint(int(index)) for index in indices]
@@ -0,0 +1,82 @@
+from collections import OrderedDict
+from typing import Dict
+
+from perfed.stats import RunningStats
+
+
+class KeyedStats:
+    """Running aggregate statistics of durations per key, for at most max_keys keys.
+
+    Keys are kept in least recently used order. Adding a new key when max_keys keys are held evicts
+    the least recently used one, whose aggregates are folded into `other`, so totals still cover every duration
+    while high-cardinality keys cannot exhaust memory.
+    """
+    __slots__ = ("_max_keys", "_keys", "other")
+
+    OTHER = "(other)"
+
+    def __init__(self, max_keys: int = 100) -> None:
+        """Create empty keyed stats.
+
+        Args:
+            max_keys (int, optional): Maximum number of keys held. Defaults to 100.
+
+        Raises:
+            ValueError: Max keys is not positive.
+        """
+        if max_keys < 1:
+            raise ValueError("Invalid max keys: Max keys must be at least 1.")
+
+        self._max_keys = max_keys
+        self._keys: OrderedDict[str, RunningStats] = OrderedDict()
+        # Aggregates of evicted keys.
+        self.other = RunningStats()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _stats(self, key: str) -> RunningStats:
+        """Return the aggregates of a key, marking it most recently used and evicting a key if needed.
+
+        Args:
+            key (str): Key.
+
+        Returns:
+            RunningStats: Aggregates of the key.
+        """
+        if (stats := self._keys.get(key)) is not None:
+            self._keys.move_to_end(key)
+            return stats
+
+        if len(self._keys) >= self._max_keys:
+            _, evicted = self._keys.popitem(last=False)
+            self.other.merge(evicted)
+        stats = self._keys[key] = RunningStats()
+        return stats
+
+    def add(self, key: str, value: int) -> None:
+        """Add a duration to the aggregates of a key.
+
+        Args:
+            key (str): Key.
+            value (int): Duration in nanoseconds.
+        """
+        self._stats(key).add(value)
+
+    def merge(self, other: "KeyedStats") -> None:
+        """Merge the aggregates of another instance into this one, evicting keys if needed.
+
+        Args:
+            other (KeyedStats): Keyed stats to merge.
+        """
+        self.other.merge(other.other)
+        for key, stats in list(other._keys.items()):
+            self._stats(key).merge(stats)
+
+    def items(self) -> Dict[str, RunningStats]:
+        """Return the aggregates of every key held, least recently used first.
+
+        Returns:
+            Dict[str, RunningStats]: Dictionary mapping keys to their aggregates.
+        """
+        return dict(self._keys)
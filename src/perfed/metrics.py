@@ -0,0 +1,269 @@
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence
+
+from perfed.timer_decorator import TimerDecorator
+from perfed.timer_manager import TimerManager
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.000001, 0.00001, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value.
+
+    Args:
+        value (str): Label value.
+
+    Returns:
+        str: Escaped label value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    """Format a sample value.
+
+    Args:
+        value (float): Sample value.
+
+    Returns:
+        str: Formatted value, with NaN and infinities spelled as in the exposition formats.
+    """
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _histogram_lines(metric: str, manager: TimerManager, buckets: Sequence[float]) -> List[str]:
+    """Render the aggregates of an aggregate timer manager as histogram samples.
+
+    Bucket counts are read off the latency histogram of the aggregates, so they are exact
+    up to the relative error of its buckets.
+
+    Args:
+        metric (str): Metric family name.
+        manager (TimerManager): Aggregate timer manager.
+        buckets (Sequence[float]): Upper bounds of the buckets in seconds, in increasing order.
+
+    Returns:
+        List[str]: Sample lines.
+    """
+    import numpy as np
+
+    stats = manager._merged()[2]
+    histogram = stats.histogram
+    # Copy the counts, as a view would stop the recording thread from growing them.
+    counts = np.cumsum(np.frombuffer(histogram._counts[:], dtype=np.int64))
+    count = int(counts[-1]) if len(counts) else 0
+    offset = manager._overhead_ns()
+    labels = f'timer="{_escape(manager._name)}"'
+    lines = []
+    for bound in buckets:
+        # Reported durations have the overhead subtracted, so a bound covers raw durations up to bound + overhead.
+        index = histogram._index(int(bound * 1e9 + offset))
+        cumulative = int(counts[min(index, len(counts) - 1)]) if len(counts) else 0
+        lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+    lines.append(f"{metric}_count{{{labels}}} {count}")
+    lines.append(f"{metric}_sum{{{labels}}} {_number(max(stats.total - offset * stats.count, 0.0) / 1e9)}")
+    return lines
+
+
+def _summary_lines(metric: str, manager: TimerManager) -> List[str]:
+    """Render the stats of a timer manager holding individual timers as summary samples.
+
+    Args:
+        metric (str): Metric family name.
+        manager (TimerManager): Timer manager not in aggregate mode.
+
+    Returns:
+        List[str]: Sample lines.
+    """
+    stats = manager.get_stats(unit="sec")
+    count = stats.get("Sampled", stats["Count"])
+    # Total is estimated for all calls when sampled, so the sum is rebuilt from the timed calls.
+    total = stats["Average"] * count if count else 0.0
+    labels = f'timer="{_escape(manager._name)}"'
+    lines = [
+        f'{metric}{{{labels},quantile="{q:g}"}} {_number(stats[f"P{q * 100:g}"])}'
+        for q in manager._quantiles
+    ]
+    lines.append(f"{metric}_count{{{labels}}} {count}")
+    lines.append(f"{metric}_sum{{{labels}}} {_number(total)}")
+    return lines
+
+
+def render_metrics(
+    managers: Dict[str, TimerManager] | None = None,
+    openmetrics: bool = True,
+    prefix: str = "perfed",
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> str:
+    """Render timer managers in the OpenMetrics or Prometheus text exposition format.
+
+    Aggregate timer managers are rendered as a histogram family, `<prefix>_duration_seconds`, built from their
+    running aggregates without touching individual samples. Other timer managers are rendered as a summary family,
+    `<prefix>_duration_quantile_seconds`, from their cached stats. Each timer manager is a series labelled `timer`.
+    Counts and sums only cover timed calls when calls are sampled.
+
+    Args:
+        managers (Dict[str, TimerManager] | None, optional):
+            Timer managers to render. Defaults to None, which renders every `TimerDecorator` timer manager.
+        openmetrics (bool, optional):
+            Whether to render the OpenMetrics format instead of the Prometheus text format. Defaults to True.
+        prefix (str, optional): Prefix of the metric family names. Defaults to "perfed".
+        buckets (Sequence[float], optional):
+            Upper bounds of the histogram buckets in seconds, in increasing order. Defaults to `DEFAULT_BUCKETS`.
+
+    Returns:
+        str: Rendered metrics.
+    """
+    if managers is None:
+        managers = TimerDecorator.get_managers()
+
+    histogram_metric = f"{prefix}_duration_seconds"
+    summary_metric = f"{prefix}_duration_quantile_seconds"
+    histograms: List[str] = []
+    summaries: List[str] = []
+    for manager in list(managers.values()):
+        if manager._aggregate:
+            histograms.extend(_histogram_lines(histogram_metric, manager, buckets))
+        else:
+            summaries.extend(_summary_lines(summary_metric, manager))
+
+    lines = []
+    for metric, kind, samples in [(histogram_metric, "histogram", histograms), (summary_metric, "summary", summaries)]:
+        if not samples:
+            continue
+        lines.append(f"# HELP {metric} Durations of timed calls in seconds.")
+        lines.append(f"# TYPE {metric} {kind}")
+        if openmetrics:
+            lines.append(f"# UNIT {metric} seconds")
+        lines.extend(samples)
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves rendered timer managers over HTTP from a background thread, for Prometheus to scrape.
+
+    The OpenMetrics format is served to clients that accept it, and the Prometheus text format otherwise.
+    """
+    def __init__(
+        self,
+        managers: Dict[str, TimerManager] | None = None,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        path: str = "/metrics",
+        prefix: str = "perfed",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Create a metrics server. Call `start` or use it as a context manager to start serving.
+
+        Args:
+            managers (Dict[str, TimerManager] | None, optional):
+                Timer managers to serve. Defaults to None, which serves every `TimerDecorator` timer manager,
+                including ones decorated after the server starts.
+            host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): Port to listen on, or 0 to pick a free port. Defaults to 8000.
+            path (str, optional): Path the metrics are served at. Defaults to "/metrics".
+            prefix (str, optional): Prefix of the metric family names. Defaults to "perfed".
+            buckets (Sequence[float], optional):
+                Upper bounds of the histogram buckets in seconds. Defaults to `DEFAULT_BUCKETS`.
+        """
+        self._managers = managers
+        self._address = (host, port)
+        self._path = path
+        self._prefix = prefix
+        self._buckets = tuple(buckets)
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "MetricsServer":
+        return self.start()
+
+    def __exit__(self, _type, _value, _traceback) -> None:
+        self.close()
+
+    @property
+    def url(self) -> str:
+        """URL the metrics are served at.
+
+        Raises:
+            RuntimeError: Server is not started.
+        """
+        if self._server is None:
+            raise RuntimeError("Metrics server is not started.")
+
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self._path}"
+
+    def render(self, openmetrics: bool = True) -> str:
+        """Render the served timer managers.
+
+        Args:
+            openmetrics (bool, optional):
+                Whether to render the OpenMetrics format instead of the Prometheus text format. Defaults to True.
+
+        Returns:
+            str: Rendered metrics.
+        """
+        return render_metrics(self._managers, openmetrics=openmetrics, prefix=self._prefix, buckets=self._buckets)
+
+    def start(self) -> "MetricsServer":
+        """Start listening and serving from a daemon thread.
+
+        Raises:
+            RuntimeError: Server is already started.
+
+        Returns:
+            MetricsServer: The server.
+        """
+        if self._server is not None:
+            raise RuntimeError("Metrics server is already started.")
+
+        metrics_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != metrics_server._path:
+                    self.send_error(404)
+                    return
+
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = metrics_server.render(openmetrics=openmetrics).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(self._address, Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="perfed-metrics", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stop serving and close the socket. Ignores multiple closes.
+        """
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
@@ -0,0 +1,113 @@
+import math
+from typing import List
+
+from perfed.stats import RunningStats
+
+
+class RollingStats:
+    """Running aggregate statistics of the durations recorded in a recent time window, kept in constant memory.
+
+    Durations are aggregated into a ring of buckets, one per interval, keyed by the timestamp they were recorded at.
+    A bucket is reset when the ring wraps around to it, so data older than the window is evicted automatically.
+    Windows are extended to whole intervals, so they cover up to one interval more than requested.
+    """
+    __slots__ = ("_interval_ns", "_buckets", "_epochs")
+
+    def __init__(self, window_ns: int, interval_ns: int) -> None:
+        """Create empty rolling stats.
+
+        Args:
+            window_ns (int): Longest window that can be queried, in nanoseconds.
+            interval_ns (int): Length of each bucket, in nanoseconds.
+
+        Raises:
+            ValueError: Interval is not positive or is longer than the window.
+        """
+        if not 0 < interval_ns <= window_ns:
+            raise ValueError("Invalid interval: Interval must be positive and at most the window.")
+
+        self._interval_ns = interval_ns
+        # One extra bucket for the interval in progress.
+        size = math.ceil(window_ns / interval_ns) + 1
+        self._buckets: List[RunningStats] = [RunningStats() for _ in range(size)]
+        # Interval index held by each bucket, -1 if the bucket is empty.
+        self._epochs: List[int] = [-1] * size
+
+    @property
+    def window_ns(self) -> int:
+        """Longest window that can be queried, in nanoseconds.
+        """
+        return self._interval_ns * (len(self._buckets) - 1)
+
+    def _bucket(self, epoch: int) -> RunningStats:
+        """Return the bucket of an interval, evicting the older interval it held.
+
+        Args:
+            epoch (int): Interval index.
+
+        Returns:
+            RunningStats: Bucket of the interval.
+        """
+        index = epoch % len(self._buckets)
+        if self._epochs[index] != epoch:
+            self._buckets[index] = RunningStats()
+            self._epochs[index] = epoch
+        return self._buckets[index]
+
+    def add(self, value: int, timestamp_ns: int) -> None:
+        """Add a duration to the bucket of the interval it was recorded in.
+
+        Args:
+            value (int): Duration in nanoseconds.
+            timestamp_ns (int): Timestamp the duration was recorded at, from `time.perf_counter_ns()`.
+        """
+        epoch = timestamp_ns // self._interval_ns
+        index = epoch % len(self._buckets)
+        if self._epochs[index] == epoch:
+            self._buckets[index].add(value)
+        elif self._epochs[index] < epoch:
+            self._bucket(epoch).add(value)
+
+    def merge(self, other: "RollingStats") -> None:
+        """Merge the buckets of another instance with the same interval into this one.
+        Buckets older than the ones already held are dropped.
+
+        Args:
+            other (RollingStats): Rolling stats to merge.
+
+        Raises:
+            ValueError: Rolling stats have different intervals.
+        """
+        if other._interval_ns != self._interval_ns:
+            raise ValueError("Only rolling stats with the same interval can be merged.")
+
+        for epoch, bucket in zip(other._epochs[:], other._buckets[:], strict=True):
+            index = epoch % len(self._buckets)
+            if epoch >= 0 and self._epochs[index] <= epoch:
+                self._bucket(epoch).merge(bucket)
+
+    def window(self, window_ns: int, now_ns: int) -> RunningStats:
+        """Return the aggregates of the durations recorded in a window ending now.
+
+        Args:
+            window_ns (int): Length of the window in nanoseconds, extended to whole intervals.
+            now_ns (int): Current timestamp, from `time.perf_counter_ns()`.
+
+        Raises:
+            ValueError: Window is not positive or is longer than the longest window.
+
+        Returns:
+            RunningStats: Aggregates of the window.
+        """
+        if not 0 < window_ns <= self.window_ns:
+            raise ValueError(
+                f"Invalid window: Window must be positive and at most {self.window_ns / 1e9:g} seconds.",
+            )
+
+        now_epoch = now_ns // self._interval_ns
+        first_epoch = (now_ns - window_ns) // self._interval_ns
+        stats = RunningStats()
+        for epoch, bucket in zip(self._epochs[:], self._buckets[:], strict=True):
+            if first_epoch <= epoch <= now_epoch:
+                stats.merge(bucket)
+        return stats
@@ -0,0 +1,280 @@
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class SampleStore:
+    """Columnar store of stopped timer samples.
+
+    Start and stop timestamps are kept in contiguous int64 buffers, and names are interned
+    into a name table with each sample storing the index of its name.
+    The `threading.get_native_id()` of the thread that recorded each sample is kept in an int64 buffer, for traces.
+    The changes of extra clocks over each sample, see `ClockReader`, are kept in an int64 buffer per clock.
+    """
+    __slots__ = ("_names", "_name_index", "_name_ids", "_starts", "_stops", "_threads", "_clocks", "_clock_columns")
+
+    UNNAMED = -1
+    # Thread of samples that were not attributed to a thread, e.g. loaded from the binary format.
+    UNKNOWN_THREAD = 0
+
+    def __init__(self, clocks: Sequence[str] = ()) -> None:
+        """Create an empty store.
+
+        Args:
+            clocks (Sequence[str], optional): Names of the extra clocks of the samples. Defaults to ().
+        """
+        self._names: List[str] = []
+        self._name_index: Dict[str, int] = {}
+        self._name_ids = array("q")
+        self._starts = array("q")
+        self._stops = array("q")
+        self._threads = array("q")
+        self._clocks = tuple(clocks)
+        self._clock_columns = [array("q") for _ in self._clocks]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._name_index
+
+    def intern(self, name: str) -> int:
+        """Return the index of a name in the name table, adding it if needed.
+
+        Args:
+            name (str): Name to intern.
+
+        Returns:
+            int: Index of the name.
+        """
+        if (name_id := self._name_index.get(name)) is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._name_index[name] = name_id
+        return name_id
+
+    def append(self, name_id: int, start_ns: int, stop_ns: int, thread: int = UNKNOWN_THREAD) -> int:
+        """Append a sample.
+
+        Args:
+            name_id (int): Index of the sample name, or `SampleStore.UNNAMED`.
+            start_ns (int): Start timestamp in nanoseconds.
+            stop_ns (int): Stop timestamp in nanoseconds.
+            thread (int, optional): `threading.get_native_id()` of the thread that recorded the sample.
+                Defaults to `SampleStore.UNKNOWN_THREAD`.
+
+        Returns:
+            int: Row of the appended sample.
+        """
+        self._name_ids.append(name_id)
+        self._starts.append(start_ns)
+        self._threads.append(thread)
+        self._stops.append(stop_ns)
+        return len(self._starts) - 1
+
+    def append_clocks(self, deltas: Sequence[int]) -> None:
+        """Append the changes of the extra clocks over a sample. Must be followed by `append` of the sample,
+        so readers, which count rows by stops, never see a sample without its clocks.
+
+        Args:
+            deltas (Sequence[int]): Changes of the clocks, in the order of the clocks.
+        """
+        for column, delta in zip(self._clock_columns, deltas, strict=True):
+            column.append(delta)
+
+    def extend(self, other: "SampleStore") -> None:
+        """Append a consistent snapshot of the samples of another store, re-interning their names.
+        Safe to call while another thread appends to the other store.
+
+        Args:
+            other (SampleStore): Store to copy samples from.
+        """
+        names, name_ids, starts, stops = other.columns_since(0)
+        self.extend_columns(
+            names,
+            name_ids,
+            starts,
+            stops,
+            clocks=other.clock_columns_since(0, len(stops)),
+            threads=other.threads_since(0, len(stops)),
+        )
+
+    def extend_columns(
+        self,
+        names: List[str],
+        name_ids: "np.ndarray",
+        starts: "np.ndarray",
+        stops: "np.ndarray",
+        clocks: "Dict[str, np.ndarray] | None" = None,
+        threads: "np.ndarray | None" = None,
+    ) -> None:
+        """Append columns of samples, re-interning their names.
+
+        Args:
+            names (List[str]): Name table of the samples.
+            name_ids (np.ndarray): Index of each sample name in the name table, or `SampleStore.UNNAMED`.
+            starts (np.ndarray): Start timestamps in nanoseconds.
+            stops (np.ndarray): Stop timestamps in nanoseconds.
+            clocks (Dict[str, np.ndarray] | None, optional):
+                Changes of the extra clocks, keyed by clock name. Clocks of the store that are missing are zero.
+                Defaults to None.
+            threads (np.ndarray | None, optional):
+                Thread of each sample. Defaults to None, which leaves the samples unattributed.
+        """
+        import numpy as np
+
+        clocks = clocks or {}
+        for clock, column in zip(self._clocks, self._clock_columns, strict=True):
+            values = clocks.get(clock)
+            values = np.zeros(len(stops), dtype=np.int64) if values is None else values
+            column.frombytes(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+
+        remap = np.array([self.intern(name) for name in names] + [self.UNNAMED], dtype=np.int64)
+        # UNNAMED (-1) indexes the last element of remap, which maps it back to UNNAMED.
+        self._name_ids.frombytes(remap[name_ids].tobytes())
+        self._starts.frombytes(np.ascontiguousarray(starts, dtype=np.int64).tobytes())
+        threads = np.full(len(stops), self.UNKNOWN_THREAD, dtype=np.int64) if threads is None else threads
+        self._threads.frombytes(np.ascontiguousarray(threads, dtype=np.int64).tobytes())
+        self._stops.frombytes(np.ascontiguousarray(stops, dtype=np.int64).tobytes())
+
+    def find(self, name: str) -> int:
+        """Return the row of the first sample with the given name.
+
+        Args:
+            name (str): Name of the sample.
+
+        Raises:
+            ValueError: No sample with the name exists.
+
+        Returns:
+            int: Row of the sample.
+        """
+        if (name_id := self._name_index.get(name)) is None:
+            raise ValueError(f"Sample with the name {name} does not exist.")
+
+        return self._name_ids.index(name_id)
+
+    def get(self, row: int) -> Tuple[int, int]:
+        """Return the start and stop timestamps of a sample.
+
+        Args:
+            row (int): Row of the sample.
+
+        Returns:
+            Tuple[int, int]: Start and stop timestamps in nanoseconds.
+        """
+        return self._starts[row], self._stops[row]
+
+    def labels(self, unnamed_prefix: str, first_row: int = 0) -> List[str]:
+        """Return the name of every sample. Unnamed samples are labelled by their row.
+
+        Args:
+            unnamed_prefix (str): Prefix of unnamed sample labels, which take the form `prefix(row + 1)`.
+            first_row (int, optional): Row number of the first sample, when the store holds a slice of samples.
+                Defaults to 0.
+
+        Returns:
+            List[str]: Sample names in row order.
+        """
+        names = self._names
+        return [
+            names[name_id] if name_id != self.UNNAMED else f"{unnamed_prefix}({row + 1})"
+            for row, name_id in enumerate(self._name_ids, start=first_row)
+        ]
+
+    def columns_since(
+        self, first_row: int, rows: int | None = None,
+    ) -> "Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]":
+        """Return copies of the name table and of the name id, start and stop columns from a row onwards.
+        Safe to call while another thread appends to the store.
+
+        Args:
+            first_row (int): First row to copy.
+            rows (int | None, optional): Row to copy up to. Defaults to None, which copies up to the last stored sample.
+
+        Returns:
+            Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]: Name table, name ids, starts and stops.
+        """
+        import numpy as np
+
+        # Stops are appended last, so every buffer holds at least this many rows,
+        # and every name they reference is already interned.
+        # Slicing copies the buffers, so appends can still resize them.
+        rows = len(self._stops) if rows is None else rows
+        return (
+            self._names[:],
+            np.frombuffer(self._name_ids[first_row:rows], dtype=np.int64),
+            np.frombuffer(self._starts[first_row:rows], dtype=np.int64),
+            np.frombuffer(self._stops[first_row:rows], dtype=np.int64),
+        )
+
+    def clock_columns_since(self, first_row: int, rows: int | None = None) -> "Dict[str, np.ndarray]":
+        """Return copies of the extra clock columns from a row onwards.
+        Safe to call while another thread appends to the store.
+
+        Args:
+            first_row (int): First row to copy.
+            rows (int | None, optional):
+                Row to copy up to, e.g. the number of stops returned by `columns_since`.
+                Defaults to None, which copies up to the last stored sample.
+
+        Returns:
+            Dict[str, np.ndarray]: Changes of the clocks, keyed by clock name.
+        """
+        import numpy as np
+
+        # Clocks are appended before stops, so every clock column holds at least this many rows.
+        rows = len(self._stops) if rows is None else rows
+        return {
+            clock: np.frombuffer(column[first_row:rows], dtype=np.int64)
+            for clock, column in zip(self._clocks, self._clock_columns, strict=True)
+        }
+
+    def threads_since(self, first_row: int, rows: int | None = None) -> "np.ndarray":
+        """Return a copy of the thread column from a row onwards.
+        Safe to call while another thread appends to the store.
+
+        Args:
+            first_row (int): First row to copy.
+            rows (int | None, optional):
+                Row to copy up to, e.g. the number of stops returned by `columns_since`.
+                Defaults to None, which copies up to the last stored sample.
+
+        Returns:
+            np.ndarray: `threading.get_native_id()` of the thread that recorded each sample.
+        """
+        import numpy as np
+
+        # Threads are appended before stops, so the thread column holds at least this many rows.
+        rows = len(self._stops) if rows is None else rows
+        return np.frombuffer(self._threads[first_row:rows], dtype=np.int64)
+
+    def columns(self) -> "Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]":
+        """Return the name table and zero-copy views of the name id, start and stop buffers.
+        The views must not be used after more samples are appended.
+
+        Returns:
+            Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]: Name table, name ids, starts and stops.
+        """
+        import numpy as np
+
+        return (
+            self._names,
+            np.frombuffer(self._name_ids, dtype=np.int64),
+            np.frombuffer(self._starts, dtype=np.int64),
+            np.frombuffer(self._stops, dtype=np.int64),
+        )
+
+    def durations_ns(self) -> "np.ndarray":
+        """Return the durations of all samples, computed over zero-copy views of the buffers.
+
+        Returns:
+            np.ndarray: int64 array of durations in nanoseconds, in row order.
+        """
+        import numpy as np
+
+        starts = np.frombuffer(self._starts, dtype=np.int64)
+        stops = np.frombuffer(self._stops, dtype=np.int64)
+        return stops - starts
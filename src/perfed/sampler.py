@@ -0,0 +1,73 @@
+import math
+import time
+
+from perfed.calibration import instrumentation_overhead_ns
+
+
+class Sampler:
+    """Chooses which calls of a decorated function are timed: one in every `every` calls.
+
+    With a maximum sample rate or overhead budget, `every` is adapted at most once per window
+    from the call rate observed since the last adaptation, and never drops below the fixed rate.
+    The overhead budget is converted to a sample rate using the calibrated instrumentation overhead.
+    """
+    __slots__ = ("every", "_min_every", "_max_rate", "_window_ns", "_window_start_ns", "_window_start_call")
+
+    def __init__(
+        self,
+        every: int = 1,
+        max_samples_per_sec: float | None = None,
+        max_overhead: float | None = None,
+        window_ns: int = 1_000_000_000,
+    ) -> None:
+        """Create a sampler.
+
+        Args:
+            every (int, optional): Time one in every this many calls. Defaults to 1.
+            max_samples_per_sec (float | None, optional): Maximum number of timed calls per second. Defaults to None.
+            max_overhead (float | None, optional):
+                Maximum fraction of wall time spent timing calls, e.g. 0.01 for 1%. Defaults to None.
+            window_ns (int, optional): Minimum time between adaptations in nanoseconds. Defaults to 1 second.
+
+        Raises:
+            ValueError: Invalid sampling rate, sample rate or overhead.
+        """
+        if every < 1:
+            raise ValueError("Invalid sampling rate: Every must be at least 1.")
+        if max_samples_per_sec is not None and max_samples_per_sec <= 0:
+            raise ValueError("Invalid sample rate: Max samples per second must be positive.")
+        if max_overhead is not None and not 0 < max_overhead < 1:
+            raise ValueError("Invalid overhead: Max overhead must be between 0 and 1.")
+
+        self.every = every
+        self._min_every = every
+        self._max_rate = math.inf
+        if max_samples_per_sec is not None:
+            self._max_rate = max_samples_per_sec
+        if max_overhead is not None:
+            self._max_rate = min(self._max_rate, max_overhead * 1e9 / max(instrumentation_overhead_ns(), 1.0))
+        self._window_ns = window_ns
+        self._window_start_ns = time.perf_counter_ns()
+        self._window_start_call = 0
+
+    @property
+    def adaptive(self) -> bool:
+        """Whether the sampling rate adapts to the call rate.
+        """
+        return self._max_rate != math.inf
+
+    def adapt(self, call: int) -> None:
+        """Update the sampling rate if the current window has ended. Called on timed calls only.
+
+        Args:
+            call (int): Number of calls so far, including the current one.
+        """
+        now = time.perf_counter_ns()
+        elapsed = now - self._window_start_ns
+        if elapsed < self._window_ns:
+            return
+
+        call_rate = (call - self._window_start_call) * 1e9 / elapsed
+        self.every = max(self._min_every, math.ceil(call_rate / self._max_rate))
+        self._window_start_ns = now
+        self._window_start_call = call
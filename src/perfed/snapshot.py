@@ -0,0 +1,18 @@
+from perfed.call_tree import CallTree
+from perfed.sample_store import SampleStore
+from perfed.stats import RunningStats
+
+
+class TimerSnapshot:
+    """A picklable copy of the stopped timers of a timer manager, for merging across processes.
+    """
+    __slots__ = ("name", "samples", "stats", "tree")
+
+    def __init__(self, name: str, samples: SampleStore, stats: RunningStats, tree: CallTree | None = None) -> None:
+        self.name = name
+        self.samples = samples
+        self.stats = stats
+        self.tree = tree if tree is not None else CallTree()
+
+    def __len__(self) -> int:
+        return len(self.samples) + self.stats.count
@@ -0,0 +1,224 @@
+import math
+from typing import TYPE_CHECKING, List, Sequence
+
+from perfed.histogram import LatencyHistogram
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class RunningStats:
+    """Running aggregate statistics of durations in nanoseconds, kept in constant memory.
+    Quantiles are estimated from a log-linear latency histogram.
+    """
+    __slots__ = ("count", "total", "min", "max", "_mean", "_m2", "histogram")
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: int = 0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+        self._mean: float = 0.0
+        self._m2: float = 0.0
+        self.histogram = LatencyHistogram()
+
+    @classmethod
+    def from_values(cls, values) -> "RunningStats":
+        """Build aggregates from an array of durations in a single vectorized pass.
+
+        Args:
+            values (np.ndarray): Durations in nanoseconds.
+
+        Returns:
+            RunningStats: Aggregates of the durations.
+        """
+        stats = cls()
+        if len(values) == 0:
+            return stats
+
+        stats.count = len(values)
+        stats.total = int(values.sum())
+        stats.min = int(values.min())
+        stats.max = int(values.max())
+        stats._mean = stats.total / stats.count
+        stats._m2 = float(((values - stats._mean) ** 2).sum())
+        stats.histogram.add_values(values)
+        return stats
+
+    def add(self, value: int) -> None:
+        """Add a duration to the aggregates.
+
+        Args:
+            value (int): Duration in nanoseconds.
+        """
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        # Welford's online algorithm for the sum of squared deviations.
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+        # Inlined LatencyHistogram.add, as this runs on every recorded sample.
+        histogram = self.histogram
+        if value < histogram._sub_buckets:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - histogram._precision
+            index = histogram._sub_buckets + (shift - 1) * histogram._half + (value >> shift) - histogram._half
+        counts = histogram._counts
+        if index >= len(counts):
+            histogram._grow(index + 1)
+            counts = histogram._counts
+        counts[index] += 1
+        histogram.count += 1
+
+    def merge(self, other: "RunningStats") -> None:
+        """Merge the aggregates of another instance into this one.
+
+        Args:
+            other (RunningStats): Aggregates to merge.
+        """
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram.merge(other.histogram)
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Return the estimated durations at the given quantiles, clamped to the exact min and max.
+
+        Args:
+            qs (Sequence[float]): Quantiles between 0 and 1.
+
+        Returns:
+            List[float]: Durations at each quantile in nanoseconds, NaN if no durations were added.
+        """
+        return [min(max(value, self.min), self.max) for value in self.histogram.quantiles(qs)]
+
+    @property
+    def mean(self) -> float:
+        """Mean duration in nanoseconds. NaN if no durations were added.
+        """
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the durations in nanoseconds squared. NaN if no durations were added.
+        """
+        if self.count == 0:
+            return math.nan
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation of the durations in nanoseconds. NaN if no durations were added.
+        """
+        return math.sqrt(self.variance)
+
+
+class SampleStats:
+    """Exact aggregate statistics of durations in nanoseconds, updated incrementally as durations are added.
+
+    Durations are kept sorted, so quantiles are exact. Each update only sorts the new durations into a chunk,
+    and chunks are merged into the sorted durations when quantiles are next read, in a single pass however
+    many updates came in between, instead of recomputing over every duration.
+    """
+    __slots__ = ("count", "total", "min", "max", "_mean", "_m2", "_sorted", "_chunks")
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+        self._mean: float = 0.0
+        self._m2: float = 0.0
+        self._sorted: "np.ndarray | None" = None
+        # Sorted chunks of durations added since the last merge.
+        self._chunks: "List[np.ndarray]" = []
+
+    def add_values(self, values) -> None:
+        """Add an array of durations in a single vectorized pass.
+
+        Args:
+            values (np.ndarray): Durations in nanoseconds.
+        """
+        import numpy as np
+
+        if len(values) == 0:
+            return
+
+        values = np.sort(np.asarray(values, dtype=np.float64))
+        count = self.count + len(values)
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        # Chan's parallel algorithm for combining the sums of squared deviations.
+        delta = mean - self._mean
+        self._m2 += m2 + delta * delta * self.count * len(values) / count
+        self._mean += delta * len(values) / count
+        self.count = count
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values[0]))
+        self.max = max(self.max, float(values[-1]))
+        self._chunks.append(values)
+
+    def _merge_chunks(self) -> "np.ndarray":
+        """Merge the chunks added since the last merge into the sorted durations.
+
+        Returns:
+            np.ndarray: All durations, sorted.
+        """
+        import numpy as np
+
+        if self._chunks:
+            runs = self._chunks if self._sorted is None else [self._sorted, *self._chunks]
+            # The stable sort is a merge sort that finds the sorted runs, so merging costs one pass over them.
+            self._sorted = np.sort(np.concatenate(runs), kind="stable") if len(runs) > 1 else runs[0]
+            self._chunks = []
+        return self._sorted
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Return the durations at the given quantiles, linearly interpolated like `np.quantile`.
+
+        Args:
+            qs (Sequence[float]): Quantiles between 0 and 1.
+
+        Returns:
+            List[float]: Durations at each quantile in nanoseconds, NaN if no durations were added.
+        """
+        import numpy as np
+
+        if self.count == 0:
+            return [math.nan] * len(qs)
+
+        durations = self._merge_chunks()
+        positions = np.asarray(qs, dtype=np.float64) * (self.count - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.minimum(lower + 1, self.count - 1)
+        below, above = durations[lower], durations[upper]
+        return (below + (above - below) * (positions - lower)).tolist()
+
+    @property
+    def mean(self) -> float:
+        """Mean duration in nanoseconds. NaN if no durations were added.
+        """
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation of the durations in nanoseconds. NaN if no durations were added.
+        """
+        if self.count == 0:
+            return math.nan
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
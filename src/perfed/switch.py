@@ -0,0 +1,33 @@
+import os
+
+ENV_VAR = "PERFED_ENABLED"
+
+# Read on every decorated call and every TimerManager.start, so toggling takes effect immediately.
+enabled: bool = os.environ.get(ENV_VAR, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def enable() -> None:
+    """Turn instrumentation on for the whole process.
+    """
+    global enabled
+    enabled = True
+
+
+def disable() -> None:
+    """Turn instrumentation off for the whole process.
+
+    Decorated functions then call straight through to the function, and `TimerManager.start` returns a timer
+    that ignores starts and stops. Timers started before are still stopped. Turn it back on with `enable`.
+    """
+    global enabled
+    enabled = False
+
+
+def is_enabled() -> bool:
+    """Return whether instrumentation is on. It starts on unless the `PERFED_ENABLED` environment variable
+    is set to "0", "false", "no" or "off".
+
+    Returns:
+        bool: Whether instrumentation is on.
+    """
+    return enabled
@@ -1,31 +1,70 @@
+import threading
 import time
-from typing import Literal
+from typing import Callable, Dict, List, Literal, Sequence, Tuple
 
+from perfed.clocks import ClockReader, clock_reader
 from perfed.util import convert_from_ns
 
 
 class Timer:
     """A single timer.
+
+    Extra clocks, see `ClockReader`, are read just outside the wall-clock timestamps,
+    so reading them is not included in the duration.
     """
-    def __init__(self, name: str) -> None:
+    __slots__ = ("_name", "_start", "_stop", "_thread", "_on_stop", "_path", "_clock_reader", "_clocks")
+
+    def __init__(
+        self,
+        name: str,
+        on_stop: Callable[["Timer"], None] | None = None,
+        clocks: Sequence[str] = (),
+    ) -> None:
+        """Create a timer.
+
+        Args:
+            name (str): Name of timer.
+            on_stop (Callable[[Timer], None] | None, optional): Called with the timer when it stops. Defaults to None.
+            clocks (Sequence[str], optional):
+                Extra clocks to capture with the duration, among "thread_time", "process_time", "alloc" and "gc".
+                Defaults to ().
+
+        Raises:
+            ValueError: Invalid clock.
+        """
         self._name: str = name
         self._start: int = -1
         self._stop: int = -1
+        # `threading.get_native_id()` of the thread that started the timer, for traces, or 0 before it starts.
+        self._thread: int = 0
+        self._on_stop = on_stop
+        # Call path of the timer in hierarchical mode, set by its timer manager.
+        self._path: Tuple[str, ...] | None = None
+        self._clock_reader: ClockReader | None = clock_reader(tuple(clocks)) if clocks else None
+        # Clock readings at the start, replaced by their changes when the timer stops.
+        self._clocks: List[int] | None = None
 
     def start(self) -> None:
         """Start timer. Ignores multiple starts.
         """
         if self._start < 0:
+            self._thread = threading.get_native_id()
+            if self._clock_reader is not None:
+                self._clocks = self._clock_reader()
             self._start = time.perf_counter_ns()
 
     def stop(self) -> None:
-        """Stop timer. Ignores multiple stops.
+        """Stop timer and invoke the on_stop callback, if any. Ignores multiple stops.
         """
         if self._start < 0:
             raise RuntimeError("Timer has not been started.")
 
         if self._stop < 0:
             self._stop = time.perf_counter_ns()
+            if self._clock_reader is not None:
+                self._clocks = [now - then for now, then in zip(self._clock_reader(), self._clocks, strict=True)]
+            if self._on_stop is not None:
+                self._on_stop(self)
 
     def __enter__(self) -> None:
         self.start()
@@ -34,6 +73,12 @@ class Timer:
         self.stop()
         return True
 
+    async def __aenter__(self) -> None:
+        self.__enter__()
+
+    async def __aexit__(self, _type, _value, _traceback) -> bool:
+        return self.__exit__(_type, _value, _traceback)
+
     def get(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> float:
         """Get timer duration.
 
@@ -56,3 +101,63 @@ class Timer:
         timer_value = curr_stop - self._start
 
         return convert_from_ns(time_ns=timer_value, unit=unit)
+
+    def _clock_deltas(self) -> List[int]:
+        """Return the changes of the extra clocks, up to now for a running timer.
+
+        Returns:
+            List[int]: Changes in the order of the clocks, or zeros for clocks that were not read.
+        """
+        if self._clock_reader is None:
+            return []
+        if self._clocks is None:
+            return [0] * len(self._clock_reader.clocks)
+        if self._stop < 0:
+            return [now - then for now, then in zip(self._clock_reader(), self._clocks, strict=True)]
+        return self._clocks
+
+    def get_clocks(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> Dict[str, float]:
+        """Get the changes of the extra clocks over the timer, up to now for a running timer.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the clock times in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Raises:
+            RuntimeError: Timer has not been started.
+
+        Returns:
+            Dict[str, float]: Dictionary mapping clock names to their changes. Allocations are in bytes.
+        """
+        if self._start < 0:
+            raise RuntimeError("Timer has not been started.")
+
+        if self._clock_reader is None:
+            return {}
+        return self._clock_reader.to_dict(self._clock_deltas(), unit=unit)
+
+
+class _NullTimer(Timer):
+    """Timer returned by timer managers while instrumentation is disabled, which ignores starts and stops.
+    """
+    __slots__ = ()
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, _type, _value, _traceback) -> bool:
+        # Suppresses exceptions like an enabled timer, so disabling instrumentation does not change behaviour.
+        return True
+
+
+NULL_TIMER = _NullTimer(name="")
+# Stopped at once, so its duration reads as 0.
+NULL_TIMER._start = NULL_TIMER._stop = 1
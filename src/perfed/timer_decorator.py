@@ -1,22 +1,222 @@
-from typing import Any, Callable, Dict
+import inspect
+import itertools
+import math
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Literal, Sequence, Tuple
 
+from perfed import switch
+from perfed.call_tree import CallTree, _call_path
+from perfed.sampler import Sampler
+from perfed.snapshot import TimerSnapshot
 from perfed.timer_manager import TimerManager
+from perfed.util import convert_array_from_ns
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from perfed.collector import SharedMemoryCollector
+
+REPORT_STATS = ["Count", "Total", "Average", "Max", "Min", "P99"]
+
+
+def _key_function(func: Callable, key: "Callable[..., Hashable] | str") -> Callable[..., Hashable]:
+    """Return a function deriving the key of a call from its arguments.
+
+    Args:
+        func (Callable): Decorated function.
+        key (Callable[..., Hashable] | str): Key function, or the name of the argument to use as the key.
+
+    Raises:
+        ValueError: The function does not take an argument with the name.
+
+    Returns:
+        Callable[..., Hashable]: Function called with the arguments of a call that returns its key.
+    """
+    if not isinstance(key, str):
+        return key
+
+    argument = key
+    signature = inspect.signature(func)
+    if (parameter := signature.parameters.get(argument)) is None:
+        name = getattr(func, "__name__", repr(func))
+        raise ValueError(f"Function {name} does not take an argument with the name {argument}.")
+
+    default = parameter.default if parameter.default is not inspect.Parameter.empty else None
+
+    def argument_key(*args, **kwargs) -> Hashable:
+        if argument in kwargs:
+            return kwargs[argument]
+        return signature.bind(*args, **kwargs).arguments.get(argument, default)
+    return argument_key
+
+
+def _keyed_wrapper(
+    func: Callable,
+    key_fn: Callable[..., Hashable],
+    record_key: Callable[[str, int, int], None],
+) -> Callable:
+    """Return a wrapper timing each call of a function and recording it under the key derived from its arguments.
+
+    Args:
+        func (Callable): Decorated function.
+        key_fn (Callable[..., Hashable]): Function called with the arguments of each call to derive its key.
+        record_key (Callable[[str, int, int], None]): Records a call with its key, start and stop timestamps.
+
+    Returns:
+        Callable: Wrapper of the function.
+    """
+    perf_counter_ns = time.perf_counter_ns
+    if inspect.iscoroutinefunction(func):
+        async def inner_key_async(*args, **kwargs) -> Any:
+            if not switch.enabled:
+                return await func(*args, **kwargs)
+            call_key = str(key_fn(*args, **kwargs))
+            start = perf_counter_ns()
+            res = await func(*args, **kwargs)
+            record_key(call_key, start, perf_counter_ns())
+            return res
+        return inner_key_async
+
+    def inner_key(*args, **kwargs) -> Any:
+        if not switch.enabled:
+            return func(*args, **kwargs)
+        call_key = str(key_fn(*args, **kwargs))
+        start = perf_counter_ns()
+        res = func(*args, **kwargs)
+        record_key(call_key, start, perf_counter_ns())
+        return res
+    return inner_key
+
+
+def _clocked_wrapper(
+    func: Callable,
+    read_clocks: Callable[[], List[int]],
+    record_clocks: Callable[[int, int, List[int]], None],
+) -> Callable:
+    """Return a wrapper timing each call of a function and recording how far each extra clock advanced over it.
+
+    Args:
+        func (Callable): Decorated function.
+        read_clocks (Callable[[], List[int]]): Reads the current value of each extra clock.
+        record_clocks (Callable[[int, int, List[int]], None]): Records a call with its start and stop timestamps
+            and the clock deltas.
+
+    Returns:
+        Callable: Wrapper of the function.
+    """
+    perf_counter_ns = time.perf_counter_ns
+    if inspect.iscoroutinefunction(func):
+        async def inner_clocks_async(*args, **kwargs) -> Any:
+            if not switch.enabled:
+                return await func(*args, **kwargs)
+            before = read_clocks()
+            start = perf_counter_ns()
+            res = await func(*args, **kwargs)
+            stop = perf_counter_ns()
+            record_clocks(start, stop, [now - then for now, then in zip(read_clocks(), before, strict=True)])
+            return res
+        return inner_clocks_async
+
+    def inner_clocks(*args, **kwargs) -> Any:
+        if not switch.enabled:
+            return func(*args, **kwargs)
+        before = read_clocks()
+        start = perf_counter_ns()
+        res = func(*args, **kwargs)
+        stop = perf_counter_ns()
+        record_clocks(start, stop, [now - then for now, then in zip(read_clocks(), before, strict=True)])
+        return res
+    return inner_clocks
 
 
 class TimerDecorator:
     """Manages a collection of timer managers for use when decorating functions.
     """
     _decorated_managers: Dict[str, TimerManager] = {}
+    _collector: "SharedMemoryCollector | None" = None
 
     @classmethod
-    def decorate(cls, name: str) -> Callable:
+    def decorate(
+        cls,
+        name: str,
+        aggregate: bool = False,
+        columnar: bool = False,
+        thread_safe: bool = False,
+        quantiles: Sequence[float] = (0.5, 0.95, 0.99, 0.999),
+        subtract_overhead: bool = False,
+        hierarchical: bool = False,
+        sample_every: int = 1,
+        max_samples_per_sec: float | None = None,
+        max_overhead: float | None = None,
+        rolling_window: float | None = None,
+        rolling_interval: float = 10.0,
+        key: "Callable[..., Hashable] | str | None" = None,
+        max_keys: int = 100,
+        clocks: Sequence[str] = (),
+    ) -> Callable:
         """Decorator for functions which assigns a dedicated timer manager to the decorated function.
+        Coroutine functions are timed until their coroutine completes.
+        While instrumentation is disabled, see `perfed.disable`, calls go straight through to the function.
+
+        In hierarchical mode, calls are added to the call tree of the timer manager under its name,
+        nested inside the hierarchical timers and decorated functions they are called from.
+        Calls are then stored in columnar mode unless aggregate mode is enabled.
+
+        With sampling, only some calls are timed, and skipped calls only count the call.
+        Stats then report the number of calls up to the last timed call as Count, the number of timed calls
+        as Sampled, and Total estimated for all calls by weighting each timed call by the sampling rate
+        it was timed at; the other stats are estimated from the timed calls.
+        Calls that raise are counted like any other, whether they are timed or skipped.
+
+        With a key, timed calls are also aggregated per key derived from their arguments,
+        see `TimerManager.get_key_stats` and `TimerManager.top_keys`. The key is derived before the call is timed.
+        Calls are then stored in columnar mode unless aggregate mode is enabled.
+
+        With extra clocks, they are read just before and after each timed call, see `ClockReader`.
+        The thread time of a coroutine call also covers the other tasks run while it awaits.
 
         Args:
             name (str): Name of the timer manager to assign.
+            aggregate (bool, optional):
+                Whether to only keep running aggregate stats of the calls instead of a timer per call.
+                Defaults to False.
+            columnar (bool, optional):
+                Whether to store the calls in the timer manager's columnar sample store instead of a timer per call.
+                Defaults to False.
+            thread_safe (bool, optional):
+                Whether the decorated function is called from multiple threads.
+                Each thread then records into its own buffer without taking a lock. Defaults to False.
+            quantiles (Sequence[float], optional):
+                Quantiles reported in the stats of the timer manager. Defaults to (0.5, 0.95, 0.99, 0.999).
+            subtract_overhead (bool, optional):
+                Whether to subtract the estimated instrumentation overhead from reported durations.
+                Defaults to False.
+            hierarchical (bool, optional):
+                Whether to aggregate calls into a call tree of nested calls. Defaults to False.
+            sample_every (int, optional): Time one in every this many calls. Defaults to 1.
+            max_samples_per_sec (float | None, optional):
+                Adapt the sampling rate to time at most this many calls per second. Defaults to None.
+            max_overhead (float | None, optional):
+                Adapt the sampling rate to spend at most this fraction of wall time timing calls, e.g. 0.01 for 1%.
+                Defaults to None.
+            rolling_window (float | None, optional):
+                Longest window in seconds for which stats of recent calls can be shown, see `TimerManager`.
+                Implies aggregate mode. Defaults to None.
+            rolling_interval (float, optional): Length of each rolling window bucket in seconds. Defaults to 10.0.
+            key (Callable[..., Hashable] | str | None, optional):
+                Function called with the arguments of each call to derive its key, or the name of the argument
+                to use as the key. Keys are converted to strings. Defaults to None.
+            max_keys (int, optional):
+                Maximum number of keys aggregated per thread. Beyond it, the least recently used key is evicted
+                and its calls are reported under the `(other)` key. Defaults to 100.
+            clocks (Sequence[str], optional):
+                Extra clocks captured with every timed call, among "thread_time", "process_time", "alloc" and "gc".
+                Defaults to ().
 
         Raises:
-            ValueError: Timer manager with the name already exists.
+            ValueError: Timer manager with the name already exists, invalid sampling options or clocks,
+                sampling, a key or clocks in hierarchical mode, clocks with a key,
+                or a key argument the function does not take.
 
         Returns:
             Callable: A decorated version of the function.
@@ -24,17 +224,164 @@ class TimerDecorator:
         if name in cls._decorated_managers:
             raise ValueError(f"TimerManager with the name: {name} already exists.")
 
-        timer_manager = TimerManager(name=name)
+        sampler = Sampler(every=sample_every, max_samples_per_sec=max_samples_per_sec, max_overhead=max_overhead)
+        sampling = sample_every > 1 or sampler.adaptive
+        if sampling and hierarchical:
+            raise ValueError("Sampling is not supported in hierarchical mode.")
+        if key is not None and hierarchical:
+            raise ValueError("Keys are not supported in hierarchical mode.")
+        if clocks and (key is not None or hierarchical):
+            raise ValueError("Clocks are not supported with keys or in hierarchical mode.")
+
+        records = aggregate or columnar or thread_safe or rolling_window is not None
+        timer_manager = TimerManager(
+            name=name,
+            aggregate=aggregate,
+            columnar=columnar or hierarchical or key is not None,
+            thread_safe=thread_safe,
+            quantiles=quantiles,
+            subtract_overhead=subtract_overhead,
+            # Only the dict mode wrapper times calls with start and stop, the others pass their timestamps to record.
+            overhead_path="record" if records or hierarchical or key is not None else "timer",
+            hierarchical=hierarchical,
+            rolling_window=rolling_window,
+            rolling_interval=rolling_interval,
+            max_keys=max_keys,
+            clocks=clocks,
+        )
+        timer_manager.attach_collector(cls._collector)
         cls._decorated_managers[name] = timer_manager
+        # next() on a count is atomic, so concurrent calls never share a timer name.
+        call_count = itertools.count(1)
+        # Bound once, so the record path does no attribute lookups between the two timestamps.
+        record = timer_manager.record
+        record_key = timer_manager.record_key
+        record_clocks = timer_manager.record_clocks
+        read_clocks = timer_manager._clock_reader
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed_wrapper(func) -> Callable:
+            is_coroutine = inspect.iscoroutinefunction(func)
+            if hierarchical and is_coroutine:
+                async def inner_tree_async(*args, **kwargs) -> Any:
+                    if not switch.enabled:
+                        return await func(*args, **kwargs)
+                    token = _call_path.set(_call_path.get() + (name,))
+                    try:
+                        start = perf_counter_ns()
+                        res = await func(*args, **kwargs)
+                        stop = perf_counter_ns()
+                    finally:
+                        _call_path.reset(token)
+                    record(start, stop)
+                    return res
+                return inner_tree_async
+
+            if hierarchical:
+                def inner_tree(*args, **kwargs) -> Any:
+                    if not switch.enabled:
+                        return func(*args, **kwargs)
+                    # The call is entered into the call path so nested calls see it as their parent,
+                    # and exited before recording, which adds it under the caller's path.
+                    token = _call_path.set(_call_path.get() + (name,))
+                    try:
+                        start = perf_counter_ns()
+                        res = func(*args, **kwargs)
+                        stop = perf_counter_ns()
+                    finally:
+                        _call_path.reset(token)
+                    record(start, stop)
+                    return res
+                return inner_tree
+
+            if key is not None:
+                return _keyed_wrapper(func, _key_function(func, key), record_key)
+
+            if records and read_clocks is not None:
+                return _clocked_wrapper(func, read_clocks, record_clocks)
+
+            if records and is_coroutine:
+                async def inner_record_async(*args, **kwargs) -> Any:
+                    if not switch.enabled:
+                        return await func(*args, **kwargs)
+                    start = perf_counter_ns()
+                    res = await func(*args, **kwargs)
+                    record(start, perf_counter_ns())
+                    return res
+                return inner_record_async
+
+            if records:
+                def inner_record(*args, **kwargs) -> Any:
+                    if not switch.enabled:
+                        return func(*args, **kwargs)
+                    start = perf_counter_ns()
+                    res = func(*args, **kwargs)
+                    record(start, perf_counter_ns())
+                    return res
+                return inner_record
+
+            if is_coroutine:
+                async def inner_async(*args, **kwargs) -> Any:
+                    if not switch.enabled:
+                        return await func(*args, **kwargs)
+                    timer_name = f"{name}({next(call_count)})"
+                    timer_manager.start(timer_name)
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        # Stopped on errors too, or the timer would stay running and never be exported or cached.
+                        timer_manager.stop(timer_name)
+                return inner_async
 
-        def wrapper(func) -> Callable:
             def inner(*args, **kwargs) -> Any:
-                timer_name = f"{name}({len(timer_manager) + 1})"
+                if not switch.enabled:
+                    return func(*args, **kwargs)
+                timer_name = f"{name}({next(call_count)})"
                 timer_manager.start(timer_name)
-                res = func(*args, **kwargs)
-                timer_manager.stop(timer_name)
-                return res
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    timer_manager.stop(timer_name)
             return inner
+
+        def wrapper(func) -> Callable:
+            timed = timed_wrapper(func)
+            if not sampling:
+                return timed
+
+            # Counted separately from timer names, so the count covers skipped calls too. Calls are counted
+            # before they run, so a call that raises counts the same whether it is timed or skipped.
+            # Timed calls pass the sampling rate they were picked at, which each sample is weighted by.
+            calls = itertools.count(1)
+            count_calls = timer_manager.count_calls
+            adapt = sampler.adapt if sampler.adaptive else None
+
+            if inspect.iscoroutinefunction(func):
+                async def inner_sampled_async(*args, **kwargs) -> Any:
+                    if not switch.enabled:
+                        return await func(*args, **kwargs)
+                    call = next(calls)
+                    every = sampler.every
+                    if call % every:
+                        return await func(*args, **kwargs)
+                    count_calls(call, every)
+                    if adapt is not None:
+                        adapt(call)
+                    return await timed(*args, **kwargs)
+                return inner_sampled_async
+
+            def inner_sampled(*args, **kwargs) -> Any:
+                if not switch.enabled:
+                    return func(*args, **kwargs)
+                call = next(calls)
+                every = sampler.every
+                if call % every:
+                    return func(*args, **kwargs)
+                count_calls(call, every)
+                if adapt is not None:
+                    adapt(call)
+                return timed(*args, **kwargs)
+            return inner_sampled
         return wrapper
 
     @classmethod
@@ -63,3 +410,180 @@ class TimerDecorator:
             Dict[str, TimerManager]: Dictionary of timer manager names and timer managers.
         """
         return cls._decorated_managers
+
+    @classmethod
+    def unregister(cls, name: str) -> TimerManager:
+        """Remove a timer manager, so its name can be decorated again. Functions decorated with it keep recording
+        into it.
+
+        Args:
+            name (str): Name of the timer manager.
+
+        Raises:
+            ValueError: Timer manager with the name does not exist.
+
+        Returns:
+            TimerManager: Removed timer manager.
+        """
+        if (manager := cls._decorated_managers.pop(name, None)) is None:
+            raise ValueError(f"TimerManager with the name {name} does not exist.")
+
+        return manager
+
+    @classmethod
+    def clear(cls) -> None:
+        """Remove every timer manager, e.g. between tests.
+        """
+        cls._decorated_managers.clear()
+
+    @classmethod
+    def reset(cls) -> None:
+        """Discard the stopped timers and aggregates of every timer manager, see `TimerManager.reset`.
+        """
+        for manager in list(cls._decorated_managers.values()):
+            manager.reset()
+
+    @classmethod
+    def snapshot(cls, reset: bool = False) -> Dict[str, TimerSnapshot]:
+        """Return a snapshot of every timer manager, see `TimerManager.snapshot`.
+
+        Args:
+            reset (bool, optional): Whether to reset each timer manager after its snapshot,
+                so the next snapshot only holds the timers of the next interval. Defaults to False.
+
+        Returns:
+            Dict[str, TimerSnapshot]: Dictionary of timer manager names and snapshots.
+        """
+        snapshots = {}
+        for name, manager in list(cls._decorated_managers.items()):
+            snapshots[name] = manager.snapshot()
+            if reset:
+                manager.reset()
+        return snapshots
+
+    @classmethod
+    def _report_rows(
+        cls,
+        unit: Literal["ns", "ms", "sec", "min"],
+        sort_by: str,
+        reset: bool,
+    ) -> Tuple[List[str], List[List[float]]]:
+        """Collect the stats of every timer manager and convert them to the unit in one pass.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"]): The unit of time of the stats.
+            sort_by (str): Stat to sort the timer managers by, largest first.
+            reset (bool): Whether to reset each timer manager after reading its stats.
+
+        Raises:
+            ValueError: Invalid sort_by.
+
+        Returns:
+            Tuple[List[str], List[List[float]]]: Timer manager names and their stats in the order of `REPORT_STATS`.
+        """
+        import numpy as np
+
+        if sort_by not in REPORT_STATS:
+            raise ValueError(f"Invalid sort_by: Sort by must be one of {REPORT_STATS}.")
+
+        names = []
+        rows = []
+        for name, manager in list(cls._decorated_managers.items()):
+            # Stats in nanoseconds are cached by the timer manager, so only the unit conversion below is new work.
+            stats = manager.get_stats(unit="ns")
+            names.append(name)
+            rows.append([stats.get(stat, math.nan) for stat in REPORT_STATS])
+            if reset:
+                manager.reset()
+
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), len(REPORT_STATS))
+        values[:, 1:] = convert_array_from_ns(values[:, 1:], unit=unit)
+        # Stable sort, largest first, with NaN stats last.
+        order = np.argsort(-np.nan_to_num(values[:, REPORT_STATS.index(sort_by)], nan=-np.inf), kind="stable")
+        return [names[i] for i in order], [[int(row[0]), *row[1:]] for row in values[order].tolist()]
+
+    @classmethod
+    def get_report(
+        cls,
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+        sort_by: str = "Total",
+        reset: bool = False,
+    ) -> "pd.DataFrame":
+        """Return one table of the stats of every timer manager, sorted by a stat, largest first.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+            sort_by (str, optional): Stat to sort by, one of Count, Total, Average, Max, Min and P99.
+                Defaults to "Total".
+            reset (bool, optional): Whether to reset each timer manager after reading its stats,
+                so the next report only covers the next interval. Defaults to False.
+
+        Raises:
+            ValueError: Invalid sort_by.
+
+        Returns:
+            pd.DataFrame: DataFrame with a row per timer manager and columns Timer Manager, Count, Total, Average,
+                Max, Min and P99. P99 is NaN for timer managers that do not report the 0.99 quantile.
+        """
+        import pandas as pd
+
+        names, rows = cls._report_rows(unit, sort_by, reset)
+        return pd.DataFrame(rows, index=pd.Index(names, name="Timer Manager"), columns=REPORT_STATS).reset_index()
+
+    @classmethod
+    def show_report(
+        cls,
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+        sort_by: str = "Total",
+        reset: bool = False,
+        print_fn: Callable = print,
+    ) -> None:
+        """Output one table of the stats of every timer manager, see `get_report`. Prints to stdout by default.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to display the durations.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+            sort_by (str, optional): Stat to sort by. Defaults to "Total".
+            reset (bool, optional): Whether to reset each timer manager after reading its stats. Defaults to False.
+            print_fn (Callable, optional):
+                A callable function used to output the report (e.g., `print`, `logger.debug`).
+                Defaults to the built-in `print` function.
+
+        Raises:
+            ValueError: Invalid sort_by.
+        """
+        from tabulate import tabulate
+
+        names, rows = cls._report_rows(unit, sort_by, reset)
+        print_fn(tabulate(
+            [[name, *row] for name, row in zip(names, rows, strict=True)],
+            headers=["Timer Manager", *REPORT_STATS],
+        ))
+
+    @classmethod
+    def get_call_tree(cls) -> CallTree:
+        """Return the call tree of every hierarchical decorated function, merged into one tree.
+
+        Returns:
+            CallTree: Merged call tree.
+        """
+        tree = CallTree()
+        for manager in cls._decorated_managers.values():
+            tree.merge(manager.get_call_tree())
+        return tree
+
+    @classmethod
+    def attach_collector(cls, collector: "SharedMemoryCollector | None") -> None:
+        """Forward the timers of every decorated function, including ones decorated later, to a collector.
+
+        Args:
+            collector (SharedMemoryCollector | None): Collector to forward to, or None to detach.
+        """
+        cls._collector = collector
+        for manager in cls._decorated_managers.values():
+            manager.attach_collector(collector)
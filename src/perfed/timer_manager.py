@@ -1,22 +1,380 @@
+import itertools
 import json
-from typing import Callable, Dict, List, Literal, Tuple
+import math
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Sequence, Tuple, cast
 
-import pandas as pd
-from tabulate import tabulate
+from perfed import switch
+from perfed.accumulator import NULL_ACCUMULATOR, Accumulator
+from perfed.binary_format import read_segments, truncate_torn_segment, write_segment
+from perfed.calibration import instrumentation_overhead_ns
+from perfed.call_tree import CallTree, _call_path, enter_call, exit_call
+from perfed.clocks import CLOCK_LABELS, TIME_CLOCKS, clock_reader
+from perfed.keyed import KeyedStats
+from perfed.rolling import RollingStats
+from perfed.sample_store import SampleStore
+from perfed.snapshot import TimerSnapshot
+from perfed.stats import RunningStats, SampleStats
+from perfed.timer import NULL_TIMER, Timer
+from perfed.util import convert_array_from_ns, convert_from_ns
 
-from perfed.timer import Timer
-from perfed.util import convert_from_ns
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+    from perfed.collector import SharedMemoryCollector
+
+
+def _current_thread() -> Tuple[int, str]:
+    """Return the native id and name of the current thread.
+
+    Returns:
+        Tuple[int, str]: Native thread id and thread name.
+    """
+    return threading.get_native_id(), threading.current_thread().name
+
+
+# Thread of samples that were not attributed to a thread, e.g. loaded from the binary format.
+UNKNOWN_THREAD: Tuple[int, str] = (SampleStore.UNKNOWN_THREAD, "Unknown thread")
+
+# Serial numbers of shards, which readers key their positions in the shards by, as ids are reused once shards are freed.
+_shard_serials = itertools.count()
+
+
+class _ThreadShard:
+    """Running timers, samples, aggregates, call tree, keyed aggregates, clock totals and accumulators
+    recorded by a single thread of a thread-safe timer manager.
+    Created by the thread it belongs to, whose native id and name it keeps to name its track in traces.
+
+    When its thread exits, the shard is folded into the retired shard of its timer manager, see `TimerManager._retire`,
+    which also logs where the samples of each folded shard start, so readers that keep positions in shards
+    can tell the samples they already read apart.
+    """
+    __slots__ = (
+        "_timers", "_samples", "_stats", "_tree", "_rolling", "_keys", "_clock_totals", "_accumulators", "_threads",
+        "_serial", "_folded",
+    )
+
+    def __init__(
+        self,
+        rolling: RollingStats | None = None,
+        max_keys: int = 100,
+        clocks: Tuple[str, ...] = (),
+    ) -> None:
+        self._timers: Dict[str, Timer] = {}
+        self._samples = SampleStore(clocks=clocks)
+        self._stats = RunningStats()
+        self._tree = CallTree()
+        self._rolling = rolling
+        self._keys = KeyedStats(max_keys=max_keys)
+        self._clock_totals = [0] * len(clocks)
+        self._accumulators: Dict[str, Accumulator] = {}
+        # Names of the threads whose samples the shard holds, keyed by native id.
+        self._threads = dict([_current_thread()])
+        self._serial = next(_shard_serials)
+        # Serial, first row and number of rows of the samples of each shard folded into this one, in row order.
+        self._folded: List[Tuple[int, int, int]] = []
+
+
+class _ThreadOwner:
+    """Held in the thread-local storage of a thread-safe timer manager, so it is freed when its thread exits.
+    """
+    __slots__ = ("__weakref__",)
+
+
+def _retire_shard(ref: "weakref.ref[TimerManager]", shard: _ThreadShard) -> None:
+    """Fold the shard of a thread that exited into its timer manager, unless the timer manager was freed first.
+    """
+    if (manager := ref()) is not None:
+        manager._retire(shard)
 
 
 class TimerManager:
     """Manages a collection of timers.
+
+    In aggregate mode, stopped timers are folded into running statistics and discarded,
+    so memory stays constant no matter how many timers are recorded.
+
+    In columnar mode, stopped timers are moved into a `SampleStore` of int64 start/stop buffers,
+    and exports and stats are computed with vectorized operations over those buffers.
+    Aggregate mode takes precedence if both are enabled.
+
+    In thread-safe mode, each thread records into its own shard without taking a lock,
+    and shards are merged when read. Samples are stored in columnar mode unless aggregate mode is enabled.
+    When a thread exits, its shard is folded into a single shard of exited threads.
+    Named timers must be started and stopped on the same thread, and their names only need to be unique per thread.
+
+    Stats include the durations at the configured quantiles. In aggregate mode they are estimated
+    from a latency histogram with a relative error below 1%; otherwise they are computed exactly from the samples.
+
+    Stats also report the instrumentation overhead included in each duration, calibrated once per process
+    for the path the durations are timed along. With subtract_overhead, it is subtracted from every reported duration.
+
+    In hierarchical mode, timers nest inside the hierarchical timers active in the same thread or asyncio task,
+    including ones of other timer managers, and are aggregated into a call tree per call path.
+
+    In rolling mode, durations are also aggregated into per-interval buckets covering the last rolling_window seconds,
+    so stats of a recent window can be shown. Rolling mode implies aggregate mode, so memory stays constant.
+
+    Samples recorded with a key are also aggregated per key, for up to max_keys keys per thread,
+    so stats can be broken down by key and the slowest keys reported.
+
+    With extra clocks, the CPU time, traced allocations or garbage collection pauses of each timer are captured
+    alongside its duration, see `ClockReader`. They are stored as extra sample store columns in columnar mode,
+    and as totals in aggregate mode, and reported by the stats and dataframes. Without them, nothing is read.
+
+    Accumulators are timers that can be started and stopped repeatedly under one name, such as around a loop body.
+    They fold every lap into running aggregates, so they take constant memory no matter how many laps are timed.
+
+    Recording only needs the standard library. NumPy, pandas and tabulate are imported on first use
+    by the exports and stats.
+
+    Stats and exports are cached until timers are added or stopped, so repeated queries are cheap.
+    Exact stats are updated incrementally with the timers stopped since the previous query.
+    While timers are running, their durations keep growing, so nothing is cached.
     """
-    def __init__(self, name: str = "") -> None:
+    def __init__(
+        self,
+        name: str = "",
+        aggregate: bool = False,
+        columnar: bool = False,
+        thread_safe: bool = False,
+        quantiles: Sequence[float] = (0.5, 0.95, 0.99, 0.999),
+        subtract_overhead: bool = False,
+        overhead_path: Literal["timer", "record"] = "timer",
+        hierarchical: bool = False,
+        rolling_window: float | None = None,
+        rolling_interval: float = 10.0,
+        max_keys: int = 100,
+        clocks: Sequence[str] = (),
+    ) -> None:
+        """Create a timer manager.
+
+        Args:
+            name (str, optional): Name of the timer manager. Defaults to "".
+            aggregate (bool, optional): Whether to only keep running aggregate stats. Defaults to False.
+            columnar (bool, optional): Whether to store stopped timers in a sample store. Defaults to False.
+            thread_safe (bool, optional): Whether to record into a shard per thread. Defaults to False.
+            quantiles (Sequence[float], optional):
+                Quantiles reported in the stats. Defaults to (0.5, 0.95, 0.99, 0.999).
+            subtract_overhead (bool, optional):
+                Whether to subtract the instrumentation overhead from reported durations. Defaults to False.
+            overhead_path (Literal["timer", "record"], optional):
+                Path the durations are timed along, whose overhead is reported and subtracted, see
+                `instrumentation_overhead_ns`. Accepts "timer" for `start` and `stop`, and "record" for calls timed
+                by the caller and passed to `record`, as decorated functions do. Defaults to "timer".
+            hierarchical (bool, optional): Whether to aggregate timers into a call tree. Defaults to False.
+            rolling_window (float | None, optional):
+                Longest window in seconds for which stats can be shown. Implies aggregate mode. Defaults to None.
+            rolling_interval (float, optional): Length of each rolling window bucket in seconds. Defaults to 10.0.
+            max_keys (int, optional): Maximum number of keys aggregated per thread. Defaults to 100.
+            clocks (Sequence[str], optional):
+                Extra clocks captured with every timer, among "thread_time", "process_time", "alloc" and "gc".
+                Defaults to ().
+
+        Raises:
+            ValueError: Invalid quantiles, overhead path or clocks.
+        """
+        if overhead_path not in ["timer", "record"]:
+            raise ValueError('Invalid overhead path: Overhead path must be one of ["timer" or "record"].')
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("Invalid quantiles: Quantiles must be between 0 and 1.")
+        # Validates the clocks, and starts what they need before the first timer.
+        self._clock_reader = clock_reader(tuple(clocks)) if clocks else None
+        self._clocks: Tuple[str, ...] = tuple(clocks)
+
         self._name = name
+        # Unnamed samples are labelled `name(n)`, so explicit timer names of that form are reserved in columnar mode.
+        self._unnamed_label = re.compile(re.escape(name) + r"\(\d+\)")
+        self._quantiles = tuple(quantiles)
+        self._subtract_overhead = subtract_overhead
+        self._overhead_path = overhead_path
+        self._aggregate = aggregate or rolling_window is not None
+        self._columnar = (columnar or thread_safe) and not self._aggregate
+        self._thread_safe = thread_safe
+        self._hierarchical = hierarchical
         self._timers: Dict[str, Timer] = {}
+        self._stats = RunningStats()
+        self._samples = SampleStore(clocks=self._clocks)
+        self._tree = CallTree()
+        self._clock_totals = [0] * len(self._clocks)
+        self._accumulators: Dict[str, Accumulator] = {}
+        # Samples can be recorded from any thread, so only the thread of each sample, see `SampleStore`, is known.
+        self._threads = dict([UNKNOWN_THREAD])
+        self._serial = next(_shard_serials)
+        self._local = threading.local()
+        self._thread_shards: List[_ThreadShard] = []
+        self._thread_shards_lock = threading.Lock()
+        # Shards of threads that exited, folded into one, so threads coming and going do not grow the shards.
+        self._retired: _ThreadShard | None = None
+        self._collector: "SharedMemoryCollector | None" = None
+        self._calls = 0
+        self._calls_offset = 0
+        # Sampling rate of the samples recorded from now on, and the Horvitz-Thompson estimates of the Total
+        # and clock totals of all calls up to the last rate change, when the reported totals were at the base.
+        self._sample_every = 1
+        self._weighted_totals = [0.0] * (1 + len(self._clocks))
+        self._weighted_base = [0.0] * (1 + len(self._clocks))
+        # Number of resets, so readers holding positions in the timers can tell they were discarded.
+        self._resets = 0
+        self._rolling_window_ns = int(rolling_window * 1e9) if rolling_window is not None else None
+        self._rolling_interval_ns = int(rolling_interval * 1e9)
+        self._rolling = self._new_rolling()
+        self._max_keys = max_keys
+        self._keys = KeyedStats(max_keys=max_keys)
+        # Timers started in dict mode that may still be running, checked before serving cached results.
+        self._started: List[Timer] = []
+        # Timers of dict mode in creation order, only ever appended to, so the ones created after a position
+        # can be read without copying the timers dictionary, e.g. by an exporter.
+        self._timer_order: List[Timer] = []
+        self._cache: Dict[Tuple, Any] = {}
+        self._cache_state: Tuple | None = None
+        self._cache_lock = threading.RLock()
+        # Exact stats of the stored timers, and how many rows of each shard, or timers in dict mode, they include,
+        # keyed by the serial of the shard or the id of the timers dictionary.
+        self._sample_stats = SampleStats()
+        self._sample_stats_rows: Dict[int, int] = {}
+
+    def _new_rolling(self) -> RollingStats | None:
+        """Create empty rolling stats, or None unless in rolling mode.
+
+        Raises:
+            ValueError: Rolling interval is not positive or is longer than the rolling window.
+
+        Returns:
+            RollingStats | None: Rolling stats.
+        """
+        if self._rolling_window_ns is None:
+            return None
+        return RollingStats(window_ns=self._rolling_window_ns, interval_ns=self._rolling_interval_ns)
 
     def __len__(self) -> int:
-        return len(self._timers)
+        if self._aggregate:
+            return sum(shard._stats.count for shard in self._shards())
+        return sum(len(shard._timers) + len(shard._samples) for shard in self._shards())
+
+    def _shard(self) -> "TimerManager | _ThreadShard":
+        """Return the shard the current thread records into.
+        The timer manager is its own single shard unless in thread-safe mode.
+
+        Returns:
+            TimerManager | _ThreadShard: Shard of the current thread.
+        """
+        if not self._thread_safe:
+            return self
+
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _ThreadShard(rolling=self._new_rolling(), max_keys=self._max_keys, clocks=self._clocks)
+            self._local.shard = shard
+            self._local.owner = _ThreadOwner()
+            # Not run at interpreter exit, where folding the shards of running threads is of no use.
+            weakref.finalize(self._local.owner, _retire_shard, weakref.ref(self), shard).atexit = False
+            with self._thread_shards_lock:
+                self._thread_shards.append(shard)
+            return shard
+
+    def _retire(self, shard: _ThreadShard) -> None:
+        """Fold the shard of a thread that exited into the retired shard, and drop it.
+        Its running timers, which can no longer be stopped, are kept running in the retired shard.
+
+        Args:
+            shard (_ThreadShard): Shard of the thread.
+        """
+        # Readers merging the shards hold the cache lock, so they never see the samples in both shards.
+        with self._cache_lock, self._thread_shards_lock:
+            if shard not in self._thread_shards:
+                return
+
+            if (retired := self._retired) is None:
+                retired = self._retired = _ThreadShard(
+                    rolling=self._new_rolling(), max_keys=self._max_keys, clocks=self._clocks,
+                )
+                retired._threads = {}
+                self._thread_shards.insert(0, retired)
+
+            first = len(retired._samples)
+            retired._samples.extend(shard._samples)
+            if (rows := len(retired._samples) - first) > 0:
+                # Logged after the samples are added, so readers of the log always find them.
+                retired._folded.append((shard._serial, first, rows))
+            retired._timers.update(shard._timers)
+            retired._stats.merge(shard._stats)
+            retired._tree.merge(shard._tree)
+            if (into := retired._rolling) is not None and (rolling := shard._rolling) is not None:
+                into.merge(rolling)
+            retired._keys.merge(shard._keys)
+            retired._clock_totals = [a + b for a, b in zip(retired._clock_totals, shard._clock_totals, strict=True)]
+            for name, accumulator in shard._accumulators.items():
+                if name not in retired._accumulators:
+                    retired._accumulators[name] = Accumulator(name=name, max_laps=accumulator.max_laps)
+                retired._accumulators[name].merge(accumulator)
+            retired._threads.update(shard._threads)
+            self._thread_shards.remove(shard)
+
+    def _new_rows(self, positions: Dict[int, int]) -> "List[Tuple[TimerManager | _ThreadShard, int, int]]":
+        """Return the rows of every shard a reader has not read yet, and move its positions past them.
+        Samples of a shard folded into the retired shard are only returned if they were not read in their shard.
+
+        Args:
+            positions (Dict[int, int]): Rows read in each shard, keyed by shard serial. Updated in place.
+
+        Returns:
+            List[Tuple[TimerManager | _ThreadShard, int, int]]: Shard, first row and end row of each range to read.
+        """
+        ranges: "List[Tuple[TimerManager | _ThreadShard, int, int]]" = []
+        for shard in self._shards():
+            first = positions.get(shard._serial, 0)
+            if shard is not self._retired:
+                rows = len(shard._samples)
+                ranges.append((shard, first, rows))
+                positions[shard._serial] = rows
+                continue
+
+            # Folded samples are read by the log rather than the row count, so samples added by a fold
+            # that has not logged them yet are left for the next read.
+            folded = list(shard._folded)
+            for serial, start, rows in folded[bisect_left(folded, first, key=lambda entry: entry[1]):]:
+                read = positions.pop(serial, 0)
+                ranges.append((shard, start + read, start + rows))
+                positions[shard._serial] = start + rows
+        return ranges
+
+    def _shards(self) -> "List[TimerManager | _ThreadShard]":
+        """Return a snapshot of all shards.
+
+        Returns:
+            List[TimerManager | _ThreadShard]: All shards.
+        """
+        if not self._thread_safe:
+            return [self]
+
+        with self._thread_shards_lock:
+            return list(self._thread_shards)
+
+    def _merged(self) -> Tuple[Dict[str, Timer], SampleStore, RunningStats]:
+        """Return the running timers, sample store and aggregates of all shards.
+        In thread-safe mode, the shards are merged into new instances.
+
+        Returns:
+            Tuple[Dict[str, Timer], SampleStore, RunningStats]: Running timers, sample store and aggregates.
+        """
+        if not self._thread_safe:
+            return self._timers, self._samples, self._stats
+
+        timers: Dict[str, Timer] = {}
+        samples = SampleStore(clocks=self._clocks)
+        stats = RunningStats()
+        for shard in self._shards():
+            timers.update(shard._timers.copy())
+            samples.extend(shard._samples)
+            stats.merge(shard._stats)
+        return timers, samples, stats
 
     def _create_timer(self, name: str) -> Timer:
         """Create a timer.
@@ -25,33 +383,558 @@ class TimerManager:
             name (str): Name of timer
 
         Raises:
-            ValueError: Timer with name already exists.
+            ValueError: Timer with name already exists, or in columnar mode, name is reserved for unnamed samples.
 
         Returns:
             Timer: Created timer.
         """
-        if name in self._timers:
+        shard = self._shard()
+        if name in shard._timers or name in shard._samples:
             raise ValueError(f"Timer with the name: {name} already exists.")
+        if self._columnar and self._unnamed_label.fullmatch(name):
+            raise ValueError(f"Timer name: {name} is reserved for unnamed samples.")
+
+        collects = self._aggregate or self._columnar or self._hierarchical or self._collector is not None
+        timer = Timer(name=name, on_stop=self._collect if collects else None, clocks=self._clocks)
+        shard._timers[name] = timer
+        if not (self._aggregate or self._columnar):
+            self._timer_order.append(timer)
+        return timer
+
+    def _collect(self, timer: Timer) -> None:
+        """Move a stopped timer into the aggregates or the sample store and discard it.
+        Used in aggregate and columnar mode, to add the timer to the call tree in hierarchical mode,
+        and to forward the timer to an attached collector.
+
+        Args:
+            timer (Timer): Stopped timer.
+        """
+        if self._collector is not None:
+            self._collector.record(self._name, timer._stop - timer._start)
+
+        shard = self._shard()
+        if (path := timer._path) is not None:
+            exit_call(path)
+            shard._tree.add(path, timer._stop - timer._start)
+        if not (self._aggregate or self._columnar):
+            return
+
+        del shard._timers[timer._name]
+        if self._aggregate:
+            shard._stats.add(timer._stop - timer._start)
+            if shard._rolling is not None:
+                shard._rolling.add(timer._stop - timer._start, timer._stop)
+            if self._clocks:
+                self._add_clock_totals(shard, timer._clocks)
+        else:
+            if self._clocks:
+                shard._samples.append_clocks(timer._clocks)
+            shard._samples.append(shard._samples.intern(timer._name), timer._start, timer._stop, timer._thread)
+
+    @staticmethod
+    def _stored_timer(samples: SampleStore, name: str, row: int) -> Timer:
+        """Build a stopped timer from a row of a sample store.
+
+        Args:
+            samples (SampleStore): Sample store holding the row.
+            name (str): Name of timer.
+            row (int): Row of the sample.
 
-        timer = Timer(name=name)
-        self._timers[name] = timer
+        Returns:
+            Timer: Stopped timer.
+        """
+        timer = Timer(name=name, clocks=samples._clocks)
+        timer._start, timer._stop = samples.get(row)
+        timer._thread = samples._threads[row]
+        if samples._clocks:
+            timer._clocks = [column[row] for column in samples._clock_columns]
         return timer
 
+    def record(self, start_ns: int, stop_ns: int) -> None:
+        """Record a completed, unnamed sample without creating a timer.
+        Only available in aggregate and columnar mode.
+
+        In columnar mode, unnamed samples are exported as `name(n)`,
+        where name is the timer manager name and n is the position of the sample,
+        so timers cannot be started with names of that form.
+        In hierarchical mode, the sample is added to the call tree under the timer manager name,
+        nested inside the current call path.
+
+        Args:
+            start_ns (int): Start timestamp in nanoseconds, from `time.perf_counter_ns()`.
+            stop_ns (int): Stop timestamp in nanoseconds, from `time.perf_counter_ns()`.
+
+        Raises:
+            RuntimeError: Timer manager is not in aggregate or columnar mode.
+        """
+        if self._collector is not None:
+            self._collector.record(self._name, stop_ns - start_ns)
+
+        # This is the hot path of decorated functions, so the shard lookup is inlined.
+        shard = self._shard() if self._thread_safe else self
+        if self._aggregate:
+            shard._stats.add(stop_ns - start_ns)
+            if shard._rolling is not None:
+                shard._rolling.add(stop_ns - start_ns, stop_ns)
+        elif self._columnar:
+            shard._samples.append(SampleStore.UNNAMED, start_ns, stop_ns, threading.get_native_id())
+        else:
+            raise RuntimeError("Samples can only be recorded in aggregate or columnar mode.")
+
+        if self._hierarchical:
+            shard._tree.add(_call_path.get() + (self._name,), stop_ns - start_ns)
+
+    @staticmethod
+    def _add_clock_totals(shard: "TimerManager | _ThreadShard", deltas: Sequence[int]) -> None:
+        """Add the changes of the extra clocks over a sample to the clock totals of a shard, in aggregate mode.
+
+        Args:
+            shard (TimerManager | _ThreadShard): Shard the sample is recorded into.
+            deltas (Sequence[int]): Changes of the clocks, in the order of the clocks.
+        """
+        totals = shard._clock_totals
+        for i, delta in enumerate(deltas):
+            totals[i] += delta
+
+    def record_clocks(self, start_ns: int, stop_ns: int, deltas: Sequence[int]) -> None:
+        """Record a completed, unnamed sample with the changes of the extra clocks over it.
+        Only available in aggregate and columnar mode.
+
+        Args:
+            start_ns (int): Start timestamp in nanoseconds, from `time.perf_counter_ns()`.
+            stop_ns (int): Stop timestamp in nanoseconds, from `time.perf_counter_ns()`.
+            deltas (Sequence[int]): Changes of the clocks over the sample, in the order of the timer manager clocks.
+
+        Raises:
+            RuntimeError: Timer manager is not in aggregate or columnar mode.
+        """
+        if not (self._aggregate or self._columnar):
+            raise RuntimeError("Samples can only be recorded in aggregate or columnar mode.")
+
+        shard = self._shard() if self._thread_safe else self
+        if self._aggregate:
+            self._add_clock_totals(shard, deltas)
+        else:
+            # Clocks are appended before the sample, which record appends.
+            shard._samples.append_clocks(deltas)
+        self.record(start_ns, stop_ns)
+
+    def record_key(self, key: str, start_ns: int, stop_ns: int) -> None:
+        """Record a completed, unnamed sample, and add it to the aggregates of a key.
+        Only available in aggregate and columnar mode.
+
+        Args:
+            key (str): Key of the sample, e.g. derived from the arguments of a decorated function.
+            start_ns (int): Start timestamp in nanoseconds, from `time.perf_counter_ns()`.
+            stop_ns (int): Stop timestamp in nanoseconds, from `time.perf_counter_ns()`.
+
+        Raises:
+            RuntimeError: Timer manager is not in aggregate or columnar mode.
+        """
+        self.record(start_ns, stop_ns)
+        shard = self._shard() if self._thread_safe else self
+        shard._keys.add(key, stop_ns - start_ns)
+
+    def count_calls(self, calls: int, every: int = 1) -> None:
+        """Set the number of calls the recorded samples were drawn from, when only some calls are timed,
+        and the sampling rate of the samples recorded from now on. Stats then report it as Count,
+        and estimate Total from the samples weighted by the sampling rate they were recorded at.
+        Counts lower than the current one are ignored.
+
+        Args:
+            calls (int): Number of calls so far, including timed ones.
+            every (int, optional): One in every this many calls is timed from now on. Defaults to 1.
+        """
+        # Callers count calls from the start, so the calls before the last reset are taken off.
+        calls -= self._calls_offset
+        if calls > self._calls:
+            self._calls = calls
+        if every != self._sample_every:
+            with self._cache_lock:
+                totals = self._reported_totals_ns()
+                self._weighted_totals = self._weighted(totals)
+                self._weighted_base = totals
+                self._sample_every = every
+
+    def _reported_totals_ns(self) -> List[float]:
+        """Return the reported Total of the recorded samples in nanoseconds, followed by their clock totals.
+
+        Returns:
+            List[float]: Total and clock totals.
+        """
+        if self._aggregate:
+            stats = self._merged()[2]
+            total = max(stats.total - self._overhead_ns() * stats.count, 0.0)
+        else:
+            total = float(self._durations_ns().sum())
+        return [total, *self._merged_clock_totals()]
+
+    def _weighted(self, totals: Sequence[float]) -> List[float]:
+        """Weight reported totals by the sampling rate of the samples they were recorded from,
+        each sample standing for as many calls as were sampled from when it was recorded.
+
+        Args:
+            totals (Sequence[float]): Reported Total in nanoseconds, followed by the clock totals.
+
+        Returns:
+            List[float]: Estimated totals of all calls.
+        """
+        return [
+            weighted + self._sample_every * (total - base)
+            for weighted, total, base in zip(self._weighted_totals, totals, self._weighted_base, strict=True)
+        ]
+
+    def attach_collector(self, collector: "SharedMemoryCollector | None") -> None:
+        """Forward every timer stopped from now on to a shared memory collector, keyed by the timer manager name.
+
+        Args:
+            collector (SharedMemoryCollector | None): Collector to forward to, or None to detach.
+        """
+        self._collector = collector
+
+    def snapshot(self) -> TimerSnapshot:
+        """Return a picklable copy of the stopped timers, which can be merged into another timer manager.
+        Running timers are not included.
+
+        Returns:
+            TimerSnapshot: Snapshot of the stopped timers.
+        """
+        timers, samples, stats = self._merged()
+        snapshot = TimerSnapshot(name=self._name, samples=SampleStore(clocks=self._clocks), stats=RunningStats())
+        snapshot.tree.merge(self.get_call_tree())
+        if self._aggregate:
+            snapshot.stats.merge(stats)
+        elif self._columnar:
+            snapshot.samples.extend(samples)
+        else:
+            for name, timer in timers.items():
+                if timer._stop >= 0:
+                    if self._clocks:
+                        snapshot.samples.append_clocks(timer._clock_deltas())
+                    snapshot.samples.append(snapshot.samples.intern(name), timer._start, timer._stop, timer._thread)
+        return snapshot
+
+    def merge(self, snapshot: TimerSnapshot) -> None:
+        """Merge a snapshot, typically taken by a timer manager in another process.
+
+        In aggregate mode, snapshot samples are folded into the aggregates.
+        In columnar mode, unnamed snapshot samples are relabelled after the samples already held.
+        The call tree of the snapshot is merged in every mode.
+
+        Args:
+            snapshot (TimerSnapshot): Snapshot to merge.
+
+        Raises:
+            ValueError: Snapshot only holds aggregates but the timer manager is not in aggregate mode,
+                or a timer with the same name already exists.
+        """
+        self._shard()._tree.merge(snapshot.tree)
+        if self._aggregate:
+            shard = self._shard()
+            shard._stats.merge(snapshot.stats)
+            if len(snapshot.samples) > 0:
+                shard._stats.merge(RunningStats.from_values(snapshot.samples.durations_ns()))
+                clocks = snapshot.samples.clock_columns_since(0)
+                self._add_clock_totals(
+                    shard,
+                    [int(clocks[clock].sum()) if clock in clocks else 0 for clock in self._clocks],
+                )
+            return
+
+        if snapshot.stats.count > 0:
+            raise ValueError("Snapshots of aggregate timer managers can only be merged in aggregate mode.")
+
+        if self._columnar:
+            self._shard()._samples.extend(snapshot.samples)
+            return
+
+        labels = snapshot.samples.labels(snapshot.name)
+        if duplicates := [label for label in labels if label in self._timers]:
+            raise ValueError(f"Timer with the name: {duplicates[0]} already exists.")
+
+        for row, label in enumerate(labels):
+            timer = self._stored_timer(snapshot.samples, label, row)
+            self._timers[label] = timer
+            self._timer_order.append(timer)
+
+    def reset(self) -> None:
+        """Discard the stopped timers and every aggregate, so the stats cover only the timers recorded from now on,
+        e.g. to report per interval. Running timers and accumulators are kept.
+
+        In thread-safe mode, a sample recorded by another thread while the timer manager is reset may be lost.
+        """
+        with self._cache_lock:
+            for shard in self._shards():
+                shard._samples = SampleStore(clocks=self._clocks)
+                shard._stats = RunningStats()
+                shard._tree = CallTree()
+                shard._rolling = self._new_rolling()
+                shard._keys = KeyedStats(max_keys=self._max_keys)
+                shard._clock_totals = [0] * len(self._clocks)
+            if self._retired is not None:
+                self._retired._folded = []
+
+            if not (self._aggregate or self._columnar):
+                self._timers = {name: timer for name, timer in self._timers.copy().items() if timer._stop < 0}
+                self._started = list(self._timers.values())
+                self._timer_order = list(self._timers.values())
+            self._calls_offset += self._calls
+            self._calls = 0
+            self._weighted_totals = [0.0] * (1 + len(self._clocks))
+            self._weighted_base = [0.0] * (1 + len(self._clocks))
+            self._resets += 1
+            self._sample_stats = SampleStats()
+            self._sample_stats_rows.clear()
+            self._cache.clear()
+            self._cache_state = None
+
+    def get_call_tree(self) -> CallTree:
+        """Return the call tree of the stopped hierarchical timers, merged across threads in thread-safe mode.
+
+        Returns:
+            CallTree: Call tree of the timer manager.
+        """
+        if not self._thread_safe:
+            return self._tree
+
+        tree = CallTree()
+        for shard in self._shards():
+            tree.merge(shard._tree)
+        return tree
+
+    def _overhead_ns(self) -> float:
+        """Return the instrumentation overhead to subtract from reported durations.
+
+        Returns:
+            float: Overhead in nanoseconds, 0 unless the timer manager subtracts overhead.
+        """
+        return instrumentation_overhead_ns(self._overhead_path) if self._subtract_overhead else 0.0
+
+    def _state(self) -> Tuple | None:
+        """Return a token that changes whenever timers are added or stopped, without scanning the timers.
+        Timers are only ever added, and samples appended, so counts identify the state.
+
+        Returns:
+            Tuple | None: State token, or None while timers are running, as their durations keep growing.
+        """
+        shards = self._shards()
+        if self._aggregate:
+            return (self._calls, *(shard._stats.count for shard in shards))
+
+        if self._columnar:
+            # Stopped timers are moved out of the running timers into the sample store.
+            if any(shard._timers for shard in shards):
+                return None
+            return (self._calls, *(len(shard._samples) for shard in shards))
+
+        if self._started:
+            self._started = [timer for timer in self._started if timer._stop < 0]
+            if self._started:
+                return None
+        return (self._calls, id(self._timers), len(self._timers))
+
+    def _cached(self, key: Tuple, compute: Callable[[bool], Any]) -> Any:
+        """Return a cached result, computing it if timers were added or stopped since it was cached.
+
+        Args:
+            key (Tuple): Key of the result.
+            compute (Callable[[bool], Any]):
+                Computes the result. Called with True if no timers are running and the result will be cached.
+
+        Returns:
+            Any: The result.
+        """
+        with self._cache_lock:
+            state = self._state()
+            if state is None:
+                return compute(False)
+
+            if state != self._cache_state:
+                self._cache.clear()
+                self._cache_state = state
+            if key not in self._cache:
+                self._cache[key] = compute(True)
+            return self._cache[key]
+
+    def _update_sample_stats(self) -> SampleStats:
+        """Add the timers stored since the previous update to the exact stats. Only called while no timers are running.
+
+        Returns:
+            SampleStats: Exact stats of the stored timers.
+        """
+        import numpy as np
+
+        rows = self._sample_stats_rows
+        if self._columnar:
+            new = []
+            for shard, first, last in self._new_rows(rows):
+                _, _, starts, stops = shard._samples.columns_since(first, last)
+                new.append(stops - starts)
+            durations = np.concatenate(new) if new else np.empty(0, dtype=np.int64)
+        else:
+            # Timers are only ever added to the dictionary, so the new ones come last.
+            # Replacing the dictionary starts the stats over.
+            if id(self._timers) not in rows:
+                self._sample_stats = SampleStats()
+                rows.clear()
+            first = rows.get(id(self._timers), 0)
+            durations = self._timer_durations_ns(list(itertools.islice(self._timers.values(), first, None)))
+            rows[id(self._timers)] = first + len(durations)
+
+        if self._subtract_overhead:
+            durations = np.maximum(durations - self._overhead_ns(), 0.0)
+        self._sample_stats.add_values(durations)
+        return self._sample_stats
+
+    @staticmethod
+    def _timer_durations_ns(timers: Sequence[Timer]) -> "np.ndarray":
+        """Return the durations of timers, gathering their timestamps into arrays and subtracting them in one pass.
+        Running timers are timed up to now.
+
+        Args:
+            timers (Sequence[Timer]): Started timers.
+
+        Raises:
+            RuntimeError: A timer has not been started.
+
+        Returns:
+            np.ndarray: int64 array of durations in nanoseconds.
+        """
+        import numpy as np
+
+        starts = np.fromiter((timer._start for timer in timers), dtype=np.int64, count=len(timers))
+        stops = np.fromiter((timer._stop for timer in timers), dtype=np.int64, count=len(timers))
+        if len(starts) and starts.min() < 0:
+            raise RuntimeError("Timer has not been started.")
+        return np.where(stops > 0, stops, time.perf_counter_ns()) - starts
+
+    def _durations_ns(self) -> "np.ndarray":
+        """Return the reported durations of all timers, stored samples first in columnar mode.
+
+        Returns:
+            np.ndarray: Array of durations in nanoseconds.
+        """
+        import numpy as np
+
+        if not self._columnar:
+            durations = self._timer_durations_ns(list(self._timers.values()))
+        else:
+            timers, samples, _ = self._merged()
+            durations = samples.durations_ns()
+            if timers:
+                durations = np.concatenate((durations, self._timer_durations_ns(list(timers.values()))))
+
+        if self._subtract_overhead:
+            durations = np.maximum(durations - self._overhead_ns(), 0.0)
+        return durations
+
+    def _labels_and_durations(self) -> Tuple[List[str], "np.ndarray"]:
+        """Return the names and reported durations of all timers, stored samples first in columnar mode.
+        Cached until timers are added or stopped.
+
+        Returns:
+            Tuple[List[str], np.ndarray]: Timer names and array of their durations in nanoseconds.
+        """
+        return self._columns()[:2]
+
+    def _columns(self) -> "Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]":
+        """Return the names, reported durations and extra clock changes of all timers, from a single read of them.
+        Cached until timers are added or stopped.
+
+        Returns:
+            Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]: Timer names, array of their durations
+                in nanoseconds and arrays of their clock changes keyed by clock name.
+        """
+        return self._cached(("labels",), lambda _: self._compute_labels_and_durations())
+
+    def _compute_labels_and_durations(self) -> "Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]":
+        """Compute the names, reported durations and extra clock changes of all timers,
+        stored samples first in columnar mode.
+
+        Returns:
+            Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]: Timer names, array of their durations
+                in nanoseconds and arrays of their clock changes keyed by clock name.
+        """
+        import numpy as np
+
+        if not self._columnar:
+            labels = list(self._timers)
+            running = list(self._timers.values())
+            durations = self._timer_durations_ns(running)
+            stored_clocks = None
+        else:
+            timers, samples, _ = self._merged()
+            labels = samples.labels(self._name)
+            durations = samples.durations_ns()
+            running = list(timers.values())
+            stored_clocks = samples.clock_columns_since(0, len(durations)) if self._clocks else None
+            if timers:
+                labels.extend(timers.keys())
+                durations = np.concatenate((durations, self._timer_durations_ns(running)))
+
+        clocks = {}
+        if self._clocks:
+            running_clocks = np.array([timer._clock_deltas() for timer in running], dtype=np.int64)
+            running_clocks = running_clocks.reshape(len(running), len(self._clocks))
+            for i, clock in enumerate(self._clocks):
+                columns = (stored_clocks[clock], running_clocks[:, i]) if stored_clocks else (running_clocks[:, i],)
+                clocks[clock] = np.concatenate(columns)
+
+        if self._subtract_overhead:
+            durations = np.maximum(durations - self._overhead_ns(), 0.0)
+        return labels, durations, clocks
+
+    def _merged_clock_totals(self) -> List[int]:
+        """Return the totals of the extra clock changes of all timers, up to now for running timers.
+
+        Returns:
+            List[int]: Totals in the order of the clocks.
+        """
+        shards = self._shards()
+        totals = [0] * len(self._clocks)
+        for shard in shards:
+            if self._aggregate:
+                deltas = [shard._clock_totals]
+            elif self._columnar:
+                rows = len(shard._samples)
+                columns = shard._samples.clock_columns_since(0, rows).values()
+                deltas = [[int(column.sum()) for column in columns]]
+                deltas.extend(timer._clock_deltas() for timer in list(shard._timers.copy().values()))
+            else:
+                deltas = [timer._clock_deltas() for timer in list(shard._timers.copy().values())]
+            for delta in deltas:
+                for i, value in enumerate(delta):
+                    totals[i] += value
+        return totals
+
     def start(self, name: str) -> Timer:
         """Create and start a timer.
+        In hierarchical mode, the timer is entered into the call path of the current thread or task until it stops.
+        While instrumentation is disabled, see `perfed.disable`, returns a shared timer that ignores starts and stops.
 
         Args:
             name (str): Name of timer.
 
+        Raises:
+            ValueError: Timer with name already exists, or in columnar mode, name is reserved for unnamed samples.
+
         Returns:
             Timer: Started timer.
         """
-        timer = self._timers.get(name, self._create_timer(name))
+        if not switch.enabled:
+            return NULL_TIMER
+
+        timer = self._create_timer(name)
+        if not (self._aggregate or self._columnar):
+            self._started.append(timer)
+        if self._hierarchical:
+            timer._path = enter_call(name)
         timer.start()
         return timer
 
     def stop(self, name: str) -> None:
-        """Stop a timer.
+        """Stop a timer. While instrumentation is disabled, ignores timers that do not exist,
+        as they were not created by `start`.
 
         Args:
             name (str): Name of timer.
@@ -59,11 +942,100 @@ class TimerManager:
         Raises:
             ValueError: Timer with name does not exist.
         """
-        if (timer := self._timers.get(name)) is None:
+        if (timer := self._shard()._timers.get(name)) is None:
+            if not switch.enabled:
+                return
             raise ValueError(f"Timer with the name {name} does not exist.")
 
         timer.stop()
 
+    def accumulator(self, name: str, max_laps: int = 0) -> Accumulator:
+        """Return the accumulator with the given name, creating it if needed.
+        Unlike timers, accumulators can be started and stopped repeatedly, each start and stop timing a lap:
+
+            for item in items:
+                with tm.accumulator("loop"):
+                    ...
+
+        In thread-safe mode, each thread times its own laps, and accumulators are merged by name when read.
+        While instrumentation is disabled, see `perfed.disable`, returns a shared accumulator that ignores laps.
+
+        Args:
+            name (str): Name of the accumulator.
+            max_laps (int, optional):
+                Number of most recent lap durations to keep when creating the accumulator. Defaults to 0.
+
+        Raises:
+            ValueError: Max laps is negative.
+
+        Returns:
+            Accumulator: Accumulator with the given name.
+        """
+        if not switch.enabled:
+            return NULL_ACCUMULATOR
+
+        accumulators = self._shard()._accumulators
+        if (accumulator := accumulators.get(name)) is None:
+            accumulator = accumulators[name] = Accumulator(name=name, max_laps=max_laps)
+        return accumulator
+
+    def get_accumulators(self) -> Dict[str, Accumulator]:
+        """Return a dictionary mapping accumulator names to accumulators.
+        In thread-safe mode, the accumulators of every thread are merged into new ones, without their running laps.
+
+        Returns:
+            Dict[str, Accumulator]: Dictionary of accumulator names and accumulators.
+        """
+        if not self._thread_safe:
+            return dict(self._accumulators)
+
+        merged: Dict[str, Accumulator] = {}
+        for shard in self._shards():
+            for name, accumulator in list(shard._accumulators.items()):
+                if name not in merged:
+                    merged[name] = Accumulator(name=name, max_laps=accumulator.max_laps)
+                merged[name].merge(accumulator)
+        return merged
+
+    def get_accumulator_stats(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> Dict[str, Dict[str, float]]:
+        """Return the aggregate stats of the laps of each accumulator.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            Dict[str, Dict[str, float]]: Dictionary mapping accumulator names to their stats, with the same stat names
+                as `get_stats`. Quantiles are estimated from latency histograms.
+        """
+        return {
+            name: self._stats_dict(accumulator.stats.count, self._running_aggregates(accumulator.stats), unit)
+            for name, accumulator in self.get_accumulators().items()
+        }
+
+    def show_accumulators(self, unit: Literal["ns", "ms", "sec", "min"] = "sec", print_fn: Callable = print) -> None:
+        """
+        Output the stats of the laps of each accumulator, one row per accumulator. Prints to stdout by default.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to display the durations.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+            print_fn (Callable, optional):
+                A callable function used to output the stats (e.g., `print`, `logger.debug`).
+                Defaults to the built-in `print` function.
+        """
+        from tabulate import tabulate
+
+        accumulator_stats = self.get_accumulator_stats(unit=unit)
+        first = next(iter(accumulator_stats.values()), {})
+        headers = ["Accumulator", *first]
+        rows = [[name, *stats.values()] for name, stats in accumulator_stats.items()]
+        print_fn(tabulate(rows, headers=headers))
+
     def get_timer(self, name: str) -> Timer:
         """Return a timer with the given name
 
@@ -76,18 +1048,303 @@ class TimerManager:
         Returns:
             Timer: Timer with the given name.
         """
-        if (timer := self._timers.get(name)) is None:
-            raise ValueError(f"Timer with the name {name} does not exist.")
+        timers, samples, _ = self._merged()
+        if (timer := timers.get(name)) is not None:
+            return timer
 
-        return timer
+        if name in samples:
+            return self._stored_timer(samples, name, samples.find(name))
+
+        raise ValueError(f"Timer with the name {name} does not exist.")
 
     def get_timers(self) -> Dict[str, Timer]:
-        """Return a dictionary mapping timer name to timer.
+        """Return a dictionary mapping timer name to timer. In aggregate mode, only running timers are kept.
+        In columnar mode, timers are rebuilt from the sample store on every call.
 
         Returns:
             Dict[str, Timer]: Dictionary of timer names and timers.
         """
-        return self._timers
+        running, samples, _ = self._merged()
+        if not self._columnar:
+            return running
+
+        timers = {
+            label: self._stored_timer(samples, label, row)
+            for row, label in enumerate(samples.labels(self._name))
+        }
+        timers.update(running)
+        return timers
+
+    def _window_stats(self, window: float) -> RunningStats:
+        """Return the aggregates of the durations recorded in the last window seconds, merged across threads.
+
+        Args:
+            window (float): Length of the window in seconds.
+
+        Raises:
+            ValueError: Timer manager is not in rolling mode, or the window is longer than the rolling window.
+
+        Returns:
+            RunningStats: Aggregates of the window.
+        """
+        if self._rolling_window_ns is None:
+            raise ValueError("Windowed stats are only available in rolling mode.")
+
+        now_ns = time.perf_counter_ns()
+        stats = RunningStats()
+        for shard in self._shards():
+            stats.merge(shard._rolling.window(int(window * 1e9), now_ns))
+        return stats
+
+    def get_stats(
+        self,
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+        window: float | None = None,
+    ) -> Dict[str, float]:
+        """Return the aggregate stats of the timers.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+            window (float | None, optional):
+                Only include the durations recorded in the last window seconds, extended to whole rolling intervals.
+                Only available in rolling mode. Defaults to None, which includes all durations.
+
+        Raises:
+            ValueError: Window is given but the timer manager is not in rolling mode,
+                or the window is longer than the rolling window.
+
+        Returns:
+            Dict[str, float]: Dictionary mapping stat names (Count, Total, Average, Max, Min, Std,
+                a P<percentile> entry per quantile, e.g. P99, then Overhead) to their values.
+                Overhead is the estimated instrumentation overhead of each duration,
+                which is also subtracted from the other stats if the timer manager subtracts overhead.
+                If only some calls are timed, Count is the number of calls, Total is estimated for them
+                by weighting each timed call by the sampling rate it was timed at, see `count_calls`,
+                and a Sampled entry holds the number of timed calls.
+                With extra clocks, `<Clock> Total` and `<Clock> Average` entries follow for each clock,
+                e.g. "Thread Time Total", outside windows. Allocations are in bytes.
+        """
+        if window is not None:
+            return self._compute_stats(unit=unit, window=window, incremental=False)
+        return dict(self._cached(("stats", unit), lambda cached: self._compute_stats(unit, incremental=cached)))
+
+    def _running_aggregates(self, stats: RunningStats) -> List[float]:
+        """Return the aggregates of running stats in the order of the stat names, less the subtracted overhead.
+
+        Args:
+            stats (RunningStats): Running stats.
+
+        Returns:
+            List[float]: Total, Average, Max, Min, Std, the quantiles and Overhead, in nanoseconds.
+        """
+        offset = self._overhead_ns()
+        return [
+            max(stats.total - offset * stats.count, 0.0),
+            *(max(value - offset, 0.0) for value in (stats.mean, stats.max, stats.min)),
+            stats.std,
+            *(max(value - offset, 0.0) for value in stats.quantiles(self._quantiles)),
+            instrumentation_overhead_ns(self._overhead_path),
+        ]
+
+    def _stats_dict(
+        self,
+        count: int,
+        aggregates: List[float],
+        unit: Literal["ns", "ms", "sec", "min"],
+    ) -> Dict[str, float]:
+        """Convert aggregates to the given unit in one pass and name them.
+
+        Args:
+            count (int): Number of durations.
+            aggregates (List[float]): Total, Average, Max, Min, Std, the quantiles and Overhead, in nanoseconds.
+            unit (Literal["ns", "ms", "sec", "min"]): The unit of time of the stats.
+
+        Returns:
+            Dict[str, float]: Dictionary mapping stat names to their values.
+        """
+        import numpy as np
+
+        names = ["Total", "Average", "Max", "Min", "Std", *(f"P{q * 100:g}" for q in self._quantiles), "Overhead"]
+        if count == 0:
+            overhead = instrumentation_overhead_ns(self._overhead_path)
+            return {"Count": 0, "Total": 0.0, **dict.fromkeys(names[1:-1], math.nan), "Overhead": overhead}
+
+        values = convert_array_from_ns(np.array(aggregates, dtype=np.float64), unit=unit).tolist()
+        return {"Count": count, **dict(zip(names, values, strict=True))}
+
+    def _compute_stats(
+        self,
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+        window: float | None = None,
+        incremental: bool = False,
+    ) -> Dict[str, float]:
+        """Compute the aggregate stats of the timers.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional): The unit of time of the durations. Defaults to "sec".
+            window (float | None, optional): Only include the durations recorded in the last window seconds.
+                Defaults to None.
+            incremental (bool, optional):
+                Whether to update the exact stats of the stored timers with the new ones instead of recomputing them.
+                Only valid while no timers are running. Defaults to False.
+
+        Returns:
+            Dict[str, float]: Dictionary mapping stat names to their values.
+        """
+        import numpy as np
+
+        overhead = instrumentation_overhead_ns(self._overhead_path)
+        if self._aggregate or window is not None:
+            stats = self._merged()[2] if window is None else self._window_stats(window)
+            count = stats.count
+            aggregates = self._running_aggregates(stats)
+        elif incremental:
+            stats = self._update_sample_stats()
+            count = stats.count
+            aggregates = [
+                stats.total,
+                stats.mean,
+                stats.max,
+                stats.min,
+                stats.std,
+                *stats.quantiles(self._quantiles),
+                overhead,
+            ]
+        else:
+            durations = self._durations_ns()
+            count = len(durations)
+            aggregates = [
+                durations.sum(),
+                durations.mean(),
+                durations.max(),
+                durations.min(),
+                durations.std(ddof=1) if count > 1 else 0.0,
+                *cast("np.ndarray", np.quantile(durations, self._quantiles)),
+                overhead,
+            ] if count else []
+
+        stats = self._stats_dict(count, aggregates, unit)
+        if window is not None:
+            return stats
+        clock_totals = self._merged_clock_totals()
+        for clock, total in zip(self._clocks, clock_totals, strict=True):
+            value = convert_from_ns(total, unit=unit) if clock in TIME_CLOCKS else total
+            stats[f"{CLOCK_LABELS[clock]} Total"] = value
+            stats[f"{CLOCK_LABELS[clock]} Average"] = value / count if count else math.nan
+        if self._calls > count:
+            # Weighted by sample, as the sampling rate may have changed while they were recorded.
+            totals = self._weighted([aggregates[0] if count else 0.0, *clock_totals])
+            stats["Total"] = convert_from_ns(totals[0], unit=unit)
+            for clock, total in zip(self._clocks, totals[1:], strict=True):
+                value = convert_from_ns(total, unit=unit) if clock in TIME_CLOCKS else total
+                stats[f"{CLOCK_LABELS[clock]} Total"] = value
+            stats["Count"] = self._calls
+            stats["Sampled"] = count
+        return stats
+
+    def _merged_keys(self) -> KeyedStats:
+        """Return the keyed aggregates of all shards.
+        In thread-safe mode, the shards are merged into a new instance that can hold the keys of every shard.
+
+        Returns:
+            KeyedStats: Keyed aggregates.
+        """
+        if not self._thread_safe:
+            return self._keys
+
+        shards = self._shards()
+        keys = KeyedStats(max_keys=self._max_keys * max(len(shards), 1))
+        for shard in shards:
+            keys.merge(shard._keys)
+        return keys
+
+    def get_key_stats(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> Dict[str, Dict[str, float]]:
+        """Return the aggregate stats of the samples recorded with each key.
+        Samples of evicted keys are reported under the `(other)` key.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Returns:
+            Dict[str, Dict[str, float]]: Dictionary mapping keys to their stats, with the same stat names as
+                `get_stats`. Quantiles are estimated from latency histograms.
+        """
+        keys = self._merged_keys()
+        items = keys.items()
+        if keys.other.count > 0:
+            items[KeyedStats.OTHER] = keys.other
+        return {
+            key: self._stats_dict(stats.count, self._running_aggregates(stats), unit)
+            for key, stats in items.items()
+        }
+
+    def top_keys(
+        self,
+        k: int = 10,
+        by: str = "Average",
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+    ) -> List[Tuple[str, Dict[str, float]]]:
+        """Return the k slowest keys, excluding evicted ones.
+
+        Args:
+            k (int, optional): Number of keys to return. Defaults to 10.
+            by (str, optional): Stat to rank keys by, e.g. "Average", "Total" or "P99". Defaults to "Average".
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to return the durations in.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+
+        Raises:
+            ValueError: Invalid stat.
+
+        Returns:
+            List[Tuple[str, Dict[str, float]]]: List of tuples with each tuple containing a key and its stats,
+                slowest first.
+        """
+        names = ["Count", "Total", "Average", "Max", "Min", "Std", *(f"P{q * 100:g}" for q in self._quantiles)]
+        if by not in names:
+            raise ValueError(f"Invalid stat: Stat must be one of {names}.")
+
+        key_stats = self.get_key_stats(unit=unit)
+        key_stats.pop(KeyedStats.OTHER, None)
+        return sorted(key_stats.items(), key=lambda item: item[1][by], reverse=True)[:k]
+
+    def show_keys(
+        self,
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+        print_fn: Callable = print,
+        k: int = 10,
+        by: str = "Average",
+    ) -> None:
+        """
+        Output the stats of the k slowest keys, one row per key. Prints to stdout by default.
+
+        Args:
+            unit (Literal["ns", "ms", "sec", "min"], optional):
+                The unit of time to display the durations.
+                Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+                and "min" for minutes. Defaults to "sec".
+            print_fn (Callable, optional):
+                A callable function used to output the stats (e.g., `print`, `logger.debug`).
+                Defaults to the built-in `print` function.
+            k (int, optional): Number of keys to output. Defaults to 10.
+            by (str, optional): Stat to rank keys by. Defaults to "Average".
+
+        Raises:
+            ValueError: Invalid stat.
+        """
+        from tabulate import tabulate
+
+        top = self.top_keys(k=k, by=by, unit=unit)
+        headers = ["Key", *(top[0][1] if top else [])]
+        tabulated = tabulate([[key, *stats.values()] for key, stats in top], headers=headers)
+        print_fn(tabulated)
 
     def to_tuples(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> List[Tuple[str, float]]:
         """Return timers in list of tuples format.
@@ -100,8 +1357,18 @@ class TimerManager:
 
         Returns:
             List[Tuple[str, float]]: List of tuples with each tuple containing the timer name and its duration.
+                In aggregate mode, each tuple contains a stat name and its value instead.
+        """
+        if self._aggregate:
+            return list(self.get_stats(unit=unit).items())
+
+        return list(self._cached(("tuples", unit), lambda _: self._compute_tuples(unit)))
+
+    def _compute_tuples(self, unit: Literal["ns", "ms", "sec", "min"]) -> List[Tuple[str, float]]:
+        """Compute the timer names and their durations in the given unit.
         """
-        return [(name, timer.get(unit=unit)) for name, timer in self._timers.items()]
+        labels, durations = self._labels_and_durations()
+        return list(zip(labels, convert_array_from_ns(durations, unit=unit).tolist(), strict=True))
 
     def to_dict(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> Dict[str, float]:
         """Return timers in dictionary format.
@@ -114,13 +1381,14 @@ class TimerManager:
 
         Returns:
             Dict[str, float]: Dictionary mapping timer names to their durations.
+                In aggregate mode, maps stat names to their values instead.
         """
-        return {
-            name: timer.get(unit=unit)
-            for name, timer in self._timers.items()
-        }
+        if self._aggregate:
+            return self.get_stats(unit=unit)
+
+        return dict(self._cached(("dict", unit), lambda _: dict(self.to_tuples(unit=unit))))
 
-    def to_dataframe(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> pd.DataFrame:
+    def to_dataframe(self, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> "pd.DataFrame":
         """Return timers in dataframe format.
 
         Args:
@@ -130,27 +1398,50 @@ class TimerManager:
                 and "min" for minutes. Defaults to "sec".
 
         Returns:
-            pd.Dataframe: A dataframe of the timers.
+            pd.Dataframe: A dataframe of the timers, with a column per extra clock after their durations.
+                In aggregate mode, a dataframe of the stats.
+        """
+        # A copy, so callers changing it can not corrupt the cache.
+        return self._cached(("dataframe", unit), lambda _: self._compute_dataframe(unit)).copy()
+
+    def _compute_dataframe(self, unit: Literal["ns", "ms", "sec", "min"]) -> "pd.DataFrame":
+        """Compute the dataframe of the timers, or of the stats in aggregate mode, in the given unit.
         """
-        return pd.DataFrame({
-            "Timer": self._timers.keys(),
-            "Duration": [timer.get(unit=unit) for timer in self._timers.values()],
-        })
+        import pandas as pd
+
+        if self._aggregate:
+            stats = self.get_stats(unit=unit)
+            return pd.DataFrame({"Stat": stats.keys(), "Value": stats.values()})
+
+        labels, durations, clocks = self._columns()
+        columns = {"Timer": labels, "Duration": convert_array_from_ns(durations, unit=unit)}
+        for clock, deltas in clocks.items():
+            columns[CLOCK_LABELS[clock]] = convert_array_from_ns(deltas, unit=unit) if clock in TIME_CLOCKS else deltas
+        return pd.DataFrame(columns, copy=False)
 
     def save(
         self,
         path: str,
-        fmt: Literal["csv", "json"],
+        fmt: Literal["csv", "json", "binary", "trace"],
         mode: Literal["w", "x", "a"] = "w",
         unit: Literal["ns", "ms", "sec", "min"] = "sec",
     ) -> None:
         """Save timers with their respective durations to file.
 
+        The binary format holds the start and stop timestamps of the stopped timers in nanoseconds
+        as int64 columns with a name table, is appended to with mode "a", and is read back with `load`.
+        Appending first cuts off a save that was interrupted, so the file stays readable.
+        It is not available in aggregate mode, and ignores unit.
+
+        The trace format holds the stopped timers as Chrome trace events with their start timestamps,
+        for Perfetto and `chrome://tracing`, see `TraceWriter`. It is not available in aggregate mode or with mode "a",
+        and ignores unit.
+
         Args:
             path (str):
                 File path to save to.
-            fmt (Literal[&quot;csv&quot;, &quot;json&quot;]):
-                Format of file to save to. Accepts "csv" and "json".
+            fmt (Literal[&quot;csv&quot;, &quot;json&quot;, &quot;binary&quot;, &quot;trace&quot;]):
+                Format of file to save to. Accepts "csv", "json", "binary" and "trace".
             mode (Literal[&quot;w&quot;, &quot;x&quot;, &quot;a&quot;], optional):
                 File write type.
                 Accepts "w" for write, "x" for create and write and "a" for append. Defaults to "w".
@@ -160,11 +1451,37 @@ class TimerManager:
                 and "min" for minutes. Defaults to "sec".
 
         Raises:
-            ValueError: Invalid fmt or mode.
+            ValueError: Invalid fmt or mode, binary or trace format in aggregate mode, trace format with mode "a",
+                or appending in the binary format to a file in another format.
         """
         if mode not in ["w", "x", "a"]:
             raise ValueError('Invalid mode: Mode must be one of ["w", "x" or "a"].')
 
+        if fmt == "binary":
+            if self._aggregate:
+                raise ValueError("The binary format is not available in aggregate mode.")
+
+            # Running timers are not saved, and in columnar mode they are not in the sample store.
+            samples = self._merged()[1] if self._columnar else self.snapshot().samples
+            if mode == "a":
+                truncate_torn_segment(path)
+            with open(path, mode=f"{mode}b") as fp:
+                names, name_ids, starts, stops = samples.columns()
+                write_segment(fp, names, name_ids, starts, stops)
+            return
+
+        if fmt == "trace":
+            from perfed.trace import TraceWriter
+
+            if self._aggregate:
+                raise ValueError("The trace format is not available in aggregate mode.")
+            if mode == "a":
+                raise ValueError("The trace format can not be appended to.")
+
+            with TraceWriter(path, mode=mode) as writer:
+                writer.write_manager(self)
+            return
+
         with open(path, mode=mode) as fp:
             match fmt:
                 case "csv":
@@ -174,11 +1491,38 @@ class TimerManager:
                 case "json":
                     fp.write(json.dumps(self.to_dict(unit=unit)))
                 case _:
-                    raise ValueError('Invalid format: Format must be one of ["csv", "json"].')
+                    raise ValueError('Invalid format: Format must be one of ["csv", "json", "binary" or "trace"].')
+
+    @classmethod
+    def load(cls, path: str, name: str = "", aggregate: bool = False) -> "TimerManager":
+        """Load timers saved in the binary format into a new columnar timer manager.
+        The file is memory-mapped and its columns are copied straight into the sample store.
+        Unnamed samples are labelled after the new timer manager name.
+
+        Args:
+            path (str): File path to load from.
+            name (str, optional): Name of the new timer manager. Defaults to "".
+            aggregate (bool, optional):
+                Whether to only keep the aggregate stats of the loaded timers. Defaults to False.
+
+        Raises:
+            ValueError: File is not in the binary format.
+
+        Returns:
+            TimerManager: Timer manager holding the loaded timers.
+        """
+        manager = cls(name=name, aggregate=aggregate, columnar=True)
+        for segment in read_segments(path):
+            if aggregate:
+                manager._stats.merge(RunningStats.from_values(segment.stops - segment.starts))
+            else:
+                manager._samples.extend_columns(segment.names, segment.name_ids, segment.starts, segment.stops)
+        return manager
 
     def show(self, unit: Literal["ns", "ms", "sec", "min"] = "sec", print_fn: Callable = print) -> None:
         """
         Output the timers with their respective durations. Prints to stdout by default.
+        In aggregate mode, outputs the aggregate stats instead.
 
         Args:
             unit (Literal["ns", "ms", "sec", "min"], optional):
@@ -189,12 +1533,18 @@ class TimerManager:
                 A callable function used to output the timers (e.g., `print`, `logger.debug`).
                 Defaults to the built-in `print` function.
         """
-        headers = ["Timer", "Duration"]
-        data = self.to_tuples(unit=unit)
-        tabulated = tabulate(data, headers=headers)
+        from tabulate import tabulate
+
+        headers = ["Stat", "Value"] if self._aggregate else ["Timer", "Duration"]
+        tabulated = self._cached(("show", unit), lambda _: tabulate(self.to_tuples(unit=unit), headers=headers))
         print_fn(tabulated)
 
-    def show_stats(self, unit: Literal["ns", "ms", "sec", "min"] = "sec", print_fn: Callable = print) -> None:
+    def show_stats(
+        self,
+        unit: Literal["ns", "ms", "sec", "min"] = "sec",
+        print_fn: Callable = print,
+        window: float | None = None,
+    ) -> None:
         """
         Output the aggregate stats of the timers. Prints to stdout by default.
 
@@ -206,13 +1556,22 @@ class TimerManager:
             print_fn (Callable, optional):
                 A callable function used to output the stats (e.g., `print`, `logger.debug`).
                 Defaults to the built-in `print` function.
+            window (float | None, optional):
+                Only include the durations recorded in the last window seconds. Only available in rolling mode.
+                Defaults to None, which includes all durations.
+
+        Raises:
+            ValueError: Window is given but the timer manager is not in rolling mode,
+                or the window is longer than the rolling window.
         """
-        timer_values = [timer.get("ns") for timer in self._timers.values()]
-        ave = convert_from_ns(sum(timer_values) / len(self), unit=unit)
-        _max = convert_from_ns(max(timer_values), unit=unit)
-        _min = convert_from_ns(min(timer_values), unit=unit)
+        from tabulate import tabulate
 
-        headers = ["Stat", "Duration"]
-        data = [["Average", ave], ["Max", _max], ["Min", _min]]
-        tabulated = tabulate(data, headers=headers)
+        headers = ["Stat", "Value"]
+        if window is not None:
+            tabulated = tabulate(list(self.get_stats(unit=unit, window=window).items()), headers=headers)
+        else:
+            tabulated = self._cached(
+                ("show_stats", unit),
+                lambda _: tabulate(list(self.get_stats(unit=unit).items()), headers=headers),
+            )
         print_fn(tabulated)
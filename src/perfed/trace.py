@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Literal
+
+from perfed.timer_manager import UNKNOWN_THREAD
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from perfed.exporter import ExportBatch
+    from perfed.timer_manager import TimerManager
+
+CHUNK_ROWS = 65536
+
+
+class TraceWriter:
+    """Streams timers to a file as Chrome trace events, which Perfetto and `chrome://tracing` open as a timeline.
+
+    Each stopped timer becomes a complete event starting at its `time.perf_counter_ns()` start timestamp,
+    so overlap, concurrency and gaps between timed sections are visible. Every timer is drawn on the track
+    of the thread that recorded it, named after the thread; samples that are not attributed to a thread,
+    e.g. loaded from the binary format, share a single "Unknown thread" track.
+    Events are formatted and written in chunks as they are added, so a trace never has to fit in memory as text.
+
+    Asyncio tasks share the track of their thread. Tasks are not recorded per sample: the trace format
+    has no track per task, and telling them apart would cost a `asyncio.current_task()` lookup on every timer,
+    which decorated functions called outside of tasks pay for nothing.
+    """
+    def __init__(self, path: str, mode: Literal["w", "x"] = "w", chunk_rows: int = CHUNK_ROWS) -> None:
+        """Open the file and start the trace. Call `close` or use it as a context manager to finish it.
+
+        Args:
+            path (str): File path to write to.
+            mode (Literal["w", "x"], optional): File write type. Accepts "w" for write and "x" for create and write.
+                Defaults to "w".
+            chunk_rows (int, optional): Number of events formatted at a time. Defaults to 65536.
+
+        Raises:
+            ValueError: Invalid mode or chunk size.
+        """
+        if mode not in ["w", "x"]:
+            raise ValueError('Invalid mode: Mode must be one of ["w" or "x"].')
+        if chunk_rows < 1:
+            raise ValueError("Invalid chunk rows: Chunk rows must be at least 1.")
+
+        self._pid = os.getpid()
+        self._chunk_rows = chunk_rows
+        self._threads: Dict[int, str] = {}
+        self._events = 0
+        self._fp = open(path, mode=mode)
+        self._fp.write("[")
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, _type, _value, _traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._events
+
+    def _write(self, events: List[str]) -> None:
+        """Write formatted events, separated by commas.
+
+        Args:
+            events (List[str]): JSON objects of the events.
+        """
+        if not events:
+            return
+        self._fp.write(",\n" if self._events else "\n")
+        self._fp.write(",\n".join(events))
+        self._events += len(events)
+
+    def write_columns(
+        self,
+        category: str,
+        names: List[str],
+        name_ids: "np.ndarray",
+        starts: "np.ndarray",
+        stops: "np.ndarray",
+        threads: "np.ndarray",
+        thread_names: Dict[int, str] | None = None,
+    ) -> None:
+        """Write columns of samples as complete events on the tracks of their threads,
+        converting timestamps a chunk at a time.
+
+        Args:
+            category (str): Category of the events, e.g. the timer manager name. Names unnamed samples.
+            names (List[str]): Name table of the samples.
+            name_ids (np.ndarray): Index of each sample name in the name table, or `SampleStore.UNNAMED`.
+            starts (np.ndarray): Start timestamps in nanoseconds.
+            stops (np.ndarray): Stop timestamps in nanoseconds.
+            threads (np.ndarray): `threading.get_native_id()` of the thread that recorded each sample,
+                or `SampleStore.UNKNOWN_THREAD`.
+            thread_names (Dict[int, str] | None, optional):
+                Names of the threads, shown on their tracks. Threads missing from it are named after
+                the running thread with the same native id, if any. Defaults to None.
+        """
+        import numpy as np
+
+        self._name_threads(np.unique(threads).tolist(), thread_names or {})
+
+        # Names are escaped once per name table entry, and UNNAMED (-1) indexes the category at the end.
+        encoded = [json.dumps(name) for name in names] + [json.dumps(category)]
+        prefix = f'"cat":{json.dumps(category)},"ph":"X","pid":{self._pid}'
+        for first in range(0, len(stops), self._chunk_rows):
+            rows = slice(first, first + self._chunk_rows)
+            # Trace timestamps and durations are in microseconds.
+            ts = (starts[rows] / 1e3).tolist()
+            durations = ((stops[rows] - starts[rows]) / 1e3).tolist()
+            self._write([
+                f'{{"name":{encoded[name_id]},{prefix},"tid":{thread},"ts":{start},"dur":{duration}}}'
+                for name_id, thread, start, duration in zip(
+                    name_ids[rows].tolist(), threads[rows].tolist(), ts, durations, strict=True,
+                )
+            ])
+
+    def _name_threads(self, threads: List[int], thread_names: Dict[int, str]) -> None:
+        """Name the tracks of threads seen for the first time.
+
+        Args:
+            threads (List[int]): Native ids of the threads.
+            thread_names (Dict[int, str]): Known names of threads.
+        """
+        if not (new := [thread for thread in threads if thread not in self._threads]):
+            return
+
+        running = {thread.native_id: thread.name for thread in threading.enumerate()}
+        for thread in new:
+            if thread == UNKNOWN_THREAD[0]:
+                self._threads[thread] = UNKNOWN_THREAD[1]
+            else:
+                self._threads[thread] = thread_names.get(thread) or running.get(thread) or f"Thread {thread}"
+
+    def write_manager(self, manager: "TimerManager") -> None:
+        """Write the stopped timers of a timer manager. Aggregate timer managers hold no timers and are skipped.
+
+        Args:
+            manager (TimerManager): Timer manager to write.
+        """
+        import numpy as np
+
+        if manager._aggregate:
+            return
+
+        if manager._columnar:
+            for shard in manager._shards():
+                names, name_ids, starts, stops = shard._samples.columns_since(0)
+                threads = shard._samples.threads_since(0, len(stops))
+                self.write_columns(manager._name, names, name_ids, starts, stops, threads, shard._threads)
+            return
+
+        timers = [timer for timer in list(manager._timers.copy().values()) if timer._stop >= 0]
+        for first in range(0, len(timers), self._chunk_rows):
+            chunk = timers[first:first + self._chunk_rows]
+            self.write_columns(
+                manager._name,
+                [timer._name for timer in chunk],
+                np.arange(len(chunk), dtype=np.int64),
+                np.fromiter((timer._start for timer in chunk), dtype=np.int64, count=len(chunk)),
+                np.fromiter((timer._stop for timer in chunk), dtype=np.int64, count=len(chunk)),
+                np.fromiter((timer._thread for timer in chunk), dtype=np.int64, count=len(chunk)),
+            )
+
+    def close(self) -> None:
+        """Write the thread names and finish the trace. Ignores multiple closes.
+        """
+        if self._fp.closed:
+            return
+
+        self._write([
+            json.dumps({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": thread_id, "args": {"name": name}})
+            for thread_id, name in self._threads.items()
+        ])
+        self._fp.write("\n]\n")
+        self._fp.close()
+
+
+class TraceSink:
+    """Streams the batches of a `BackgroundExporter` to a trace file, see `TraceWriter`.
+    Stats of aggregate batches are skipped.
+    """
+    def __init__(self, path: str, chunk_rows: int = CHUNK_ROWS) -> None:
+        self._writer = TraceWriter(path, chunk_rows=chunk_rows)
+
+    def write(self, batch: "ExportBatch") -> None:
+        if (samples := batch.samples) is None:
+            return
+
+        names, name_ids, starts, stops = samples.columns_since(0)
+        threads = samples.threads_since(0, len(stops))
+        self._writer.write_columns(batch.name, names, name_ids, starts, stops, threads, batch.threads)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def save_trace(path: str, managers: "Dict[str, TimerManager] | None" = None) -> None:
+    """Save the stopped timers of timer managers to a single trace file, see `TraceWriter`.
+
+    Args:
+        path (str): File path to save to.
+        managers (Dict[str, TimerManager] | None, optional):
+            Timer managers to save. Defaults to None, which saves every `TimerDecorator` timer manager.
+    """
+    if managers is None:
+        from perfed.timer_decorator import TimerDecorator
+
+        managers = TimerDecorator.get_managers()
+
+    with TraceWriter(path) as writer:
+        for manager in list(managers.values()):
+            writer.write_manager(manager)
@@ -1,4 +1,7 @@
-from typing import Literal
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 def convert_from_ns(time_ns: float, unit: Literal["ns", "ms", "sec", "min"] = "sec") -> float:
@@ -26,3 +29,29 @@ def convert_from_ns(time_ns: float, unit: Literal["ns", "ms", "sec", "min"] = "s
             return time_ns / 1e9 / 60
         case _:
             raise ValueError('Invalid format: Format must be one of ["ns", "ms", "sec" or "min"].')
+
+
+def convert_array_from_ns(times_ns: "np.ndarray", unit: Literal["ns", "ms", "sec", "min"] = "sec") -> "np.ndarray":
+    """Convert an array of nanoseconds to specified time unit in a single vectorized operation.
+
+    Args:
+        times_ns (np.ndarray): Times in nanoseconds.
+        unit (Literal[&quot;ns&quot;, &quot;ms&quot;, &quot;sec&quot;, &quot;min&quot;], optional):
+            The unit of time to convert to.
+            Accepts "ns" for nanoseconds, "ms" for milliseconds, "sec" for seconds,
+            and "min" for minutes. Defaults to "sec".
+
+    Returns:
+        np.ndarray: float64 array of converted times.
+    """
+    match unit:
+        case "ns":
+            return times_ns.astype("float64")
+        case "ms":
+            return times_ns / 1e3
+        case "sec":
+            return times_ns / 1e9
+        case "min":
+            return times_ns / 1e9 / 60
+        case _:
+            raise ValueError('Invalid format: Format must be one of ["ns", "ms", "sec" or "min"].')
@@ -0,0 +1,290 @@
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from tabulate import tabulate
+
+import perfed
+from perfed.calibration import instrumentation_overhead_ns
+from perfed.timer import Timer
+from perfed.timer_decorator import TimerDecorator
+from perfed.timer_manager import TimerManager
+from perfed.util import convert_array_from_ns, convert_from_ns
+
+CALLS_PER_THREAD = 100_000
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+DECORATOR_CALLS = 200_000
+TIMER_CALLS = 200_000
+CONVERT_SIZE = 1_000_000
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+FULL_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def measure(name: str, ops: int, run: Callable[[], None], memory: bool = True) -> Dict:
+    """Time a benchmark, then run it again under tracemalloc to measure its peak memory.
+
+    Args:
+        name (str): Name of the benchmark.
+        ops (int): Number of operations a run performs.
+        run (Callable[[], None]): Runs the benchmark once.
+        memory (bool, optional): Whether to measure peak memory. Defaults to True.
+
+    Returns:
+        Dict: Result with the benchmark name, operation count, elapsed time, throughput and peak memory.
+    """
+    gc.collect()
+    start_ns = time.perf_counter_ns()
+    run()
+    elapsed_ns = time.perf_counter_ns() - start_ns
+
+    peak_bytes = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "ops": ops,
+        "elapsed_ns": elapsed_ns,
+        "ops_per_sec": ops / max(elapsed_ns, 1) * 1e9,
+        "peak_bytes": peak_bytes,
+    }
+
+
+def bench_timer() -> List[Dict]:
+    """Create, start and stop timers.
+    """
+    def run() -> None:
+        for _ in range(TIMER_CALLS):
+            timer = Timer("bench_timer")
+            timer.start()
+            timer.stop()
+
+    return [measure("timer.start_stop", TIMER_CALLS, run, memory=False)]
+
+
+def bench_manager(sizes: List[int]) -> List[Dict]:
+    """Start and stop a growing number of named timers on a timer manager, in every storage mode.
+    """
+    results = []
+    for mode in ["dict", "aggregate", "columnar"]:
+        for size in sizes:
+            names = [f"t{i}" for i in range(size)]
+
+            def run(names=names, mode=mode) -> None:
+                tm = TimerManager(mode, aggregate=mode == "aggregate", columnar=mode == "columnar")
+                for name in names:
+                    tm.start(name)
+                    tm.stop(name)
+
+            results.append(measure(f"manager.start_stop[{mode},{size}]", size, run))
+    return results
+
+
+def bench_decorator() -> List[Dict]:
+    """Compare the call overhead of decorated functions in every mode against a bare call,
+    with instrumentation enabled and disabled.
+    """
+    def bare() -> None:
+        pass
+
+    functions = {"bare": bare}
+    for mode in ["dict", "aggregate", "columnar", "thread_safe"]:
+        options = {mode: True} if mode != "dict" else {}
+        functions[mode] = TimerDecorator.decorate(f"bench_decorator[{mode}]", **options)(bare)
+
+    def calls(func: Callable) -> Callable[[], None]:
+        def run() -> None:
+            for _ in range(DECORATOR_CALLS):
+                func()
+        return run
+
+    results = [
+        measure(f"decorator.call[{mode}]", DECORATOR_CALLS, calls(func), memory=False)
+        for mode, func in functions.items()
+    ]
+    # The residual cost of decorated calls with instrumentation turned off.
+    perfed.disable()
+    try:
+        for mode, func in functions.items():
+            if mode != "bare":
+                results.append(measure(f"decorator.call[{mode},disabled]", DECORATOR_CALLS, calls(func), memory=False))
+    finally:
+        perfed.enable()
+    return results
+
+
+def bench_exports(sizes: List[int]) -> List[Dict]:
+    """Export a timer manager with many timers through to_dataframe, save and show_stats.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ["dict", "columnar"]:
+            for size in sizes:
+                tm = TimerManager(mode, columnar=mode == "columnar")
+                for i in range(size):
+                    tm.start(f"t{i}")
+                    tm.stop(f"t{i}")
+
+                exports = {
+                    "to_dataframe": lambda tm=tm: tm.to_dataframe(),
+                    "save_csv": lambda tm=tm: tm.save(os.path.join(directory, "timers.csv"), "csv"),
+                    "save_json": lambda tm=tm: tm.save(os.path.join(directory, "timers.json"), "json"),
+                    "show_stats": lambda tm=tm: tm.show_stats(print_fn=io.StringIO().write),
+                }
+                for export, run in exports.items():
+                    results.append(measure(f"export.{export}[{mode},{size}]", size, run))
+    return results
+
+
+def bench_convert() -> List[Dict]:
+    """Convert a million durations to seconds one value at a time, then as a single array, as the exports do.
+    """
+    import numpy as np
+
+    durations = np.arange(CONVERT_SIZE, dtype=np.int64)
+    values = durations.tolist()
+    return [
+        measure(
+            f"convert.scalar[{CONVERT_SIZE}]",
+            CONVERT_SIZE,
+            lambda: [convert_from_ns(value, unit="sec") for value in values],
+        ),
+        measure(
+            f"convert.array[{CONVERT_SIZE}]",
+            CONVERT_SIZE,
+            lambda: convert_array_from_ns(durations, unit="sec"),
+        ),
+        # to_tuples and to_dict also pay for building Python floats.
+        measure(
+            f"convert.array_tolist[{CONVERT_SIZE}]",
+            CONVERT_SIZE,
+            lambda: convert_array_from_ns(durations, unit="sec").tolist(),
+        ),
+    ]
+
+
+def bench_threads() -> List[Dict]:
+    """Call a thread-safe decorated function from multiple threads and check every call is recorded.
+    """
+    results = []
+    for thread_count in THREAD_COUNTS:
+        name = f"bench_threads({thread_count})"
+
+        @TimerDecorator.decorate(name, thread_safe=True)
+        def noop() -> None:
+            pass
+
+        def work(_) -> None:
+            for _ in range(CALLS_PER_THREAD):
+                noop()
+
+        def run(thread_count=thread_count) -> None:
+            with ThreadPoolExecutor(max_workers=thread_count) as executor:
+                list(executor.map(work, range(thread_count)))
+
+        expected = thread_count * CALLS_PER_THREAD
+        result = measure(f"threads.record[{thread_count}]", expected, run, memory=False)
+        result["lost"] = expected - len(TimerDecorator.get_manager(name))
+        results.append(result)
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], max_slowdown: float, max_memory_growth: float) -> List[str]:
+    """Compare benchmark results against a baseline.
+
+    Args:
+        results (List[Dict]): Results of the current run.
+        baseline (List[Dict]): Results of a previous run.
+        max_slowdown (float): Largest allowed relative drop in throughput, e.g. 0.2 for 20%.
+        max_memory_growth (float): Largest allowed relative growth in peak memory, e.g. 0.2 for 20%.
+
+    Returns:
+        List[str]: Description of every regression, empty if there are none.
+    """
+    previous = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        if (base := previous.get(result["name"])) is None:
+            continue
+
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - max_slowdown):
+            regressions.append(
+                f"{result['name']}: throughput {result['ops_per_sec']:.0f} ops/sec, "
+                f"baseline {base['ops_per_sec']:.0f} ops/sec",
+            )
+        if result["peak_bytes"] and base["peak_bytes"] and (
+            result["peak_bytes"] > base["peak_bytes"] * (1 + max_memory_growth)
+        ):
+            regressions.append(
+                f"{result['name']}: peak memory {result['peak_bytes']} bytes, baseline {base['peak_bytes']} bytes",
+            )
+    return regressions
+
+
+def start():
+    parser = argparse.ArgumentParser(description="Benchmark the overhead and scaling of perfed.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Fail if the results regress against this JSON results file.")
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="Allowed relative drop in throughput.")
+    parser.add_argument("--max-memory-growth", type=float, default=0.2, help="Allowed relative growth in memory.")
+    parser.add_argument("--full", action="store_true", help="Scale timer managers up to 10^7 timers.")
+    parser.add_argument("--only", help="Only run benchmarks whose name starts with this prefix.")
+    args = parser.parse_args()
+
+    sizes = FULL_SIZES if args.full else DEFAULT_SIZES
+    suites = {
+        "timer": bench_timer,
+        "manager": lambda: bench_manager(sizes),
+        "decorator": bench_decorator,
+        "export": lambda: bench_exports(sizes),
+        "convert": bench_convert,
+        "threads": bench_threads,
+    }
+
+    # Calibrate up front, so the first report does not pay for it.
+    instrumentation_overhead_ns("timer")
+    instrumentation_overhead_ns("record")
+
+    print("Starting benchmarks:")
+    print("------------------------------------------------------------")
+    results = []
+    for suite, run in suites.items():
+        if args.only and not suite.startswith(args.only.split(".")[0]):
+            continue
+        suite_results = [result for result in run() if not args.only or result["name"].startswith(args.only)]
+        results.extend(suite_results)
+        print(tabulate(
+            [(r["name"], r["ops"], r["ops_per_sec"], r["peak_bytes"]) for r in suite_results],
+            headers=["Benchmark", "Ops", "Ops/sec", "Peak bytes"],
+            floatfmt=".0f",
+        ))
+        print()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version, "platform": platform.platform(), "results": results}, f, indent=2)
+
+    failures = [
+        f"{result['name']}: lost {result['lost']} samples" for result in results if result.get("lost")
+    ]
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        failures.extend(compare(results, baseline, args.max_slowdown, args.max_memory_growth))
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    exit(1 if failures else 0)
@@ -0,0 +1,34 @@
+import argparse
+
+from perfed.compare import compare_files, show_comparisons
+
+
+def start():
+    parser = argparse.ArgumentParser(description="Compare two runs of timers saved in the perfed binary format.")
+    parser.add_argument("baseline", help="Binary file of the baseline run.")
+    parser.add_argument("candidate", help="Binary file of the candidate run.")
+    parser.add_argument("--name", default="", help="Name unnamed samples are grouped under.")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of intervals and tests.")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Smallest relative change to flag.")
+    parser.add_argument("--unit", choices=["ns", "ms", "sec", "min"], default="sec", help="Unit of durations.")
+    args = parser.parse_args()
+
+    comparisons = compare_files(
+        args.baseline,
+        args.candidate,
+        name=args.name,
+        confidence=args.confidence,
+        threshold=args.threshold,
+    )
+    print("Comparing timers:")
+    print("------------------------------------------------------------")
+    show_comparisons(comparisons, unit=args.unit)
+    print()
+
+    slower = [comparison for comparison in comparisons if comparison.slower]
+    for comparison in slower:
+        print(
+            f"REGRESSION {comparison.name}: median {comparison.change:+.1%} "
+            f"(p={comparison.p_value:.2g})",
+        )
+    exit(1 if slower else 0)
@@ -0,0 +1,12 @@
+import tracemalloc
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def stop_tracemalloc():
+    """Stop the tracing started by the alloc clock, which would slow every later test.
+    """
+    yield
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
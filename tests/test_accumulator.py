@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from perfed.accumulator import Accumulator
+
+
+@pytest.fixture
+def accumulator():
+    return Accumulator("test_accumulator", max_laps=2)
+
+
+class TestAccumulator:
+    def test_laps(self, accumulator):
+        for _ in range(3):
+            with accumulator:
+                time.sleep(0.001)
+        assert len(accumulator) == 3
+        assert not accumulator.running
+        assert accumulator.get(unit="ms") >= 3000
+        assert accumulator.stats.min >= 1_000_000
+        assert len(accumulator.laps()) == 2
+        assert sum(accumulator.laps(unit="ns")) <= accumulator.get(unit="ns")
+
+    def test_start_running(self, accumulator):
+        accumulator.start()
+        start = accumulator._start
+        accumulator.start()
+        assert accumulator._start == start
+        assert accumulator.running
+        accumulator.stop()
+        assert len(accumulator) == 1
+
+    def test_stop_not_running(self, accumulator):
+        with pytest.raises(RuntimeError):
+            accumulator.stop()
+
+    def test_exception_propagates(self, accumulator):
+        with pytest.raises(KeyError), accumulator:
+            raise KeyError
+        assert len(accumulator) == 1
+
+    def test_async(self, accumulator):
+        async def run():
+            for _ in range(2):
+                async with accumulator:
+                    await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert len(accumulator) == 2
+
+    def test_no_history(self):
+        accumulator = Accumulator("test_accumulator")
+        with accumulator:
+            pass
+        assert accumulator.max_laps == 0
+        assert accumulator.laps() == []
+
+    def test_merge(self, accumulator):
+        other = Accumulator("other", max_laps=5)
+        for duration in [10, 20, 30]:
+            other.stats.add(duration)
+            other._laps.append(duration)
+        accumulator.merge(other)
+        assert len(accumulator) == 3
+        assert accumulator.laps(unit="ns") == [20.0, 30.0]
+
+    def test_reset(self, accumulator):
+        with accumulator:
+            pass
+        accumulator.start()
+        accumulator.reset()
+        assert len(accumulator) == 0
+        assert not accumulator.running
+        assert accumulator.laps() == []
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            Accumulator("test_accumulator", max_laps=-1)
@@ -0,0 +1,67 @@
+import gc
+import time
+
+import pytest
+
+import perfed
+from perfed.benchmark import bench, calibrate_loops
+from perfed.timer_manager import TimerManager
+
+
+class TestBench:
+    def test_bench(self):
+        calls = []
+        tm = bench(calls.append, args=(1,), samples=10, warmup=2, loops=5)
+        assert tm._name == "list.append"
+        assert tm._columnar
+        assert len(tm) == 10
+        assert len(calls) == (2 + 10) * 5
+        assert tm.get_stats("ns")["Count"] == 10
+
+    def test_kwargs(self):
+        calls = []
+
+        def dummy_func(x, y=0):
+            calls.append((x, y))
+
+        bench(dummy_func, args=(1,), kwargs={"y": 2}, samples=1, warmup=0, loops=1)
+        assert calls == [(1, 2)]
+
+    def test_mean_per_call(self):
+        tm = bench(time.sleep, args=(0.001,), name="sleep", samples=3, warmup=0, loops=2)
+        assert tm._name == "sleep"
+        assert tm.get_stats("ns")["Min"] >= 1_000_000
+
+    def test_calibrate(self):
+        loops = calibrate_loops(lambda: None, sample_time=0.001)
+        assert loops > 1
+        assert calibrate_loops(time.sleep, args=(0.002,), sample_time=0.001) == 1
+
+    def test_gc(self):
+        enabled = []
+        bench(lambda: enabled.append(gc.isenabled()), samples=1, warmup=0, loops=1)
+        assert enabled == [False]
+        assert gc.isenabled()
+
+        bench(lambda: enabled.append(gc.isenabled()), samples=1, warmup=0, loops=1, disable_gc=False)
+        assert enabled[-1]
+
+    def test_manager(self):
+        tm = TimerManager("tm", aggregate=True)
+        assert bench(lambda: None, samples=5, loops=10, manager=tm) is tm
+        assert tm.get_stats()["Count"] == 5
+        with pytest.raises(RuntimeError):
+            bench(lambda: None, manager=TimerManager("tm"))
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            bench(lambda: None, samples=0)
+        with pytest.raises(ValueError):
+            bench(lambda: None, warmup=-1)
+        with pytest.raises(ValueError):
+            bench(lambda: None, loops=0)
+        with pytest.raises(ValueError):
+            bench(lambda: None, sample_time=0)
+
+    def test_exported(self):
+        assert perfed.bench is bench
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from perfed.binary_format import read_segments, truncate_torn_segment, write_segment
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "timers.bin"
+    with open(path, "wb") as fp:
+        write_segment(fp, ["a", "bb"], np.array([0, 1, -1]), np.array([0, 10, 20]), np.array([5, 30, 60]))
+    with open(path, "ab") as fp:
+        write_segment(fp, ["c"], np.array([0]), np.array([100]), np.array([200]))
+    return path
+
+
+def test_read_segments(path):
+    first, second = read_segments(str(path))
+    assert first.names == ["a", "bb"]
+    assert first.name_ids.tolist() == [0, 1, -1]
+    assert first.starts.tolist() == [0, 10, 20]
+    assert first.stops.tolist() == [5, 30, 60]
+    assert second.names == ["c"]
+    assert len(second) == 1
+
+
+def test_read_segments_zero_copy(path):
+    segment = read_segments(str(path))[0]
+    assert not segment.starts.flags.owndata
+    assert not segment.starts.flags.writeable
+
+
+def test_read_segments_truncated(path):
+    with open(path, "ab") as fp:
+        write_segment(fp, ["d"], np.array([0]), np.array([0]), np.array([1]))
+    with open(path, "r+b") as fp:
+        fp.truncate(path.stat().st_size - 4)
+    assert len(read_segments(str(path))) == 2
+
+
+def test_truncate_torn_segment_truncated(path):
+    with open(path, "ab") as fp:
+        write_segment(fp, ["d"], np.array([0]), np.array([0]), np.array([1]))
+    with open(path, "r+b") as fp:
+        fp.truncate(path.stat().st_size - 4)
+    truncate_torn_segment(str(path))
+    with open(path, "ab") as fp:
+        write_segment(fp, ["e"], np.array([0]), np.array([0]), np.array([2]))
+    segments = read_segments(str(path))
+    assert [segment.names for segment in segments] == [["a", "bb"], ["c"], ["e"]]
+
+
+def test_truncate_torn_segment_invalid(tmp_path):
+    path = tmp_path / "timers.csv"
+    path.write_text("a,0.1\n" * 10)
+    with pytest.raises(ValueError):
+        truncate_torn_segment(str(path))
+    assert path.read_text() == "a,0.1\n" * 10
+
+
+def test_read_segments_empty(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.touch()
+    assert read_segments(str(path)) == []
+
+
+def test_read_segments_invalid(tmp_path):
+    path = tmp_path / "timers.csv"
+    path.write_text("a,0.1\n" * 10)
+    with pytest.raises(ValueError):
+        read_segments(str(path))
+
+
+def test_to_dataframe(path):
+    df = read_segments(str(path))[0].to_dataframe()
+    assert list(df.columns) == ["Timer", "Start", "Stop"]
+    assert df["Timer"].tolist()[:2] == ["a", "bb"]
+    assert df["Timer"].isna().tolist() == [False, False, True]
+    assert df["Stop"].tolist() == [5, 30, 60]
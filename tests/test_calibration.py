@@ -0,0 +1,20 @@
+import pytest
+
+from perfed.calibration import instrumentation_overhead_ns
+
+
+def test_instrumentation_overhead_ns():
+    overhead = instrumentation_overhead_ns()
+    assert 0 < overhead < 1e6
+    assert instrumentation_overhead_ns() == overhead
+
+
+def test_instrumentation_overhead_ns_record():
+    overhead = instrumentation_overhead_ns("record")
+    assert 0 < overhead < 1e6
+    assert instrumentation_overhead_ns("record") == overhead
+
+
+def test_instrumentation_overhead_ns_invalid():
+    with pytest.raises(ValueError):
+        instrumentation_overhead_ns("invalid")
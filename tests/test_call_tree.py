@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from perfed.call_tree import CallTree, current_call_path, enter_call, exit_call
+
+
+@pytest.fixture
+def tree():
+    tree = CallTree()
+    tree.add(("request",), 1000)
+    tree.add(("request",), 3000)
+    tree.add(("request", "db"), 1500)
+    tree.add(("request", "db"), 500)
+    tree.add(("request", "render"), 1000)
+    return tree
+
+
+class TestCallPath:
+    def test_enter_exit(self):
+        assert current_call_path() == ()
+        outer = enter_call("a")
+        inner = enter_call("b")
+        assert current_call_path() == ("a", "b")
+        exit_call(inner)
+        assert current_call_path() == ("a",)
+        exit_call(outer)
+        assert current_call_path() == ()
+
+    def test_exit_out_of_order(self):
+        outer = enter_call("a")
+        inner = enter_call("b")
+        exit_call(outer)
+        assert current_call_path() == ("a", "b")
+        exit_call(inner)
+        assert current_call_path() == ("a",)
+        exit_call(outer)
+
+
+class TestCallTree:
+    def test_add(self, tree):
+        assert len(tree) == 3
+        assert tree._nodes[("request",)] == [2, 4000]
+
+    def test_merge(self, tree):
+        other = CallTree()
+        other.add(("request", "db"), 1000)
+        other.add(("job",), 500)
+        tree.merge(other)
+        assert tree._nodes[("request", "db")] == [3, 3000]
+        assert tree._nodes[("job",)] == [1, 500]
+
+    def test_to_tuples(self, tree):
+        rows = tree.to_tuples("ns")
+        assert [row[0] for row in rows] == [("request",), ("request", "db"), ("request", "render")]
+        path, count, total, self_time, percent = rows[0]
+        assert (count, total, self_time) == (2, 4000, 1000)
+        assert math.isnan(percent)
+        assert rows[1][1:] == (2, 2000, 2000, 50)
+        assert rows[2][1:] == (1, 1000, 1000, 25)
+
+    def test_to_dataframe(self, tree):
+        df = tree.to_dataframe("ns")
+        assert list(df.columns) == ["Path", "Name", "Depth", "Count", "Total", "Self", "% of Parent"]
+        assert df["Path"].tolist() == ["request", "request;db", "request;render"]
+        assert df["Depth"].tolist() == [0, 1, 1]
+        assert df["Self"].tolist() == [1000, 2000, 1000]
+
+    def test_to_collapsed(self, tree):
+        assert tree.to_collapsed() == "request 1000\nrequest;db 2000\nrequest;render 1000\n"
@@ -0,0 +1,41 @@
+import gc
+import tracemalloc
+
+import pytest
+
+from perfed.clocks import ClockReader, clock_reader
+
+
+class TestClockReader:
+    def test_read(self):
+        reader = ClockReader(["thread_time", "process_time"])
+        before = reader()
+        sum(range(100000))
+        deltas = [now - then for now, then in zip(reader(), before, strict=True)]
+        assert all(delta > 0 for delta in deltas)
+
+    def test_alloc(self):
+        reader = ClockReader(["alloc"])
+        assert tracemalloc.is_tracing()
+        before = reader()
+        data = bytearray(1_000_000)
+        assert reader()[0] - before[0] >= 1_000_000
+        del data
+
+    def test_gc(self):
+        reader = ClockReader(["gc"])
+        before = reader()
+        gc.collect()
+        assert reader()[0] > before[0]
+
+    def test_to_dict(self):
+        reader = ClockReader(["thread_time", "alloc"])
+        assert reader.to_dict([2_000_000_000, 64]) == {"thread_time": 2.0, "alloc": 64}
+        assert reader.to_dict([1000, 64], unit="ns") == {"thread_time": 1000.0, "alloc": 64}
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            ClockReader(["wall_time"])
+
+    def test_clock_reader_shared(self):
+        assert clock_reader(("thread_time",)) is clock_reader(("thread_time",))
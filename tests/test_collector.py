@@ -0,0 +1,147 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from perfed.collector import _OWNER, SharedMemoryCollector, _collectors
+from perfed.timer_decorator import TimerDecorator
+
+_worker_collector = None
+
+
+def init_worker(collector: SharedMemoryCollector) -> None:
+    global _worker_collector
+    _worker_collector = collector
+    collector.attach()
+
+
+def work(n: int) -> None:
+    for i in range(n):
+        _worker_collector.record("work", i)
+
+
+class YieldingWords:
+    def __init__(self, words) -> None:
+        self.words = words
+
+    def __getitem__(self, index):
+        value = self.words[index]
+        time.sleep(0.0001)
+        return value
+
+    def __setitem__(self, index, value):
+        self.words[index] = value
+
+
+@pytest.fixture
+def collector():
+    collector = SharedMemoryCollector(rings=8, capacity=1024, max_names=4)
+    yield collector
+    TimerDecorator.attach_collector(None)
+    collector.close()
+
+
+class TestSharedMemoryCollector:
+    def test_record(self, collector):
+        for i in range(10):
+            collector.record("a", i)
+        collector.record("b", 100)
+
+        stats = collector.get_stats("ns")
+        assert stats["a"]["Count"] == 10
+        assert stats["a"]["Total"] == 45
+        assert stats["b"]["Max"] == 100
+
+        collector.record("a", 10)
+        assert collector.get_stats("ns")["a"]["Count"] == 11
+
+    def test_dropped(self, collector):
+        for i in range(1500):
+            collector.record("a", i)
+
+        stats = collector.get_stats("ns")
+        assert stats["a"]["Count"] == 1024
+        assert collector.dropped == 476
+
+    def test_too_many_names(self, collector):
+        for name in "abcd":
+            collector.record(name, 1)
+        with pytest.warns(RuntimeWarning):
+            collector.record("e", 1)
+        collector.record("f", 1)
+        collector.record("a" * 65, 1)
+
+        stats = collector.get_stats("ns")
+        assert set(stats) == set("abcd")
+        assert collector.dropped == 3
+
+    def test_all_rings_claimed(self):
+        collector = SharedMemoryCollector(rings=1, capacity=16, max_names=4)
+        # Claimed by a process that is still running.
+        collector._words[_OWNER] = os.getppid()
+        with pytest.warns(RuntimeWarning):
+            collector.record("a", 1)
+        assert collector.dropped == 1
+        with pytest.raises(RuntimeError):
+            collector.attach()
+        collector.close()
+
+    def test_reclaim_exited(self):
+        collector = SharedMemoryCollector(rings=1, capacity=16, max_names=4)
+        with ProcessPoolExecutor(max_workers=1, initializer=init_worker, initargs=(collector,)) as executor:
+            executor.submit(work, 3).result()
+        collector.record("work", 10)
+
+        stats = collector.get_stats("ns")
+        assert stats["work"]["Count"] == 4
+        assert stats["work"]["Total"] == 13
+        collector.close()
+
+    def test_fork_handler_registered_once(self, collector):
+        with patch("os.register_at_fork") as register_at_fork:
+            # As unpickled in a worker, where the lock can only be passed at process creation.
+            copy = SharedMemoryCollector.__new__(SharedMemoryCollector)
+            copy.__setstate__(collector.__getstate__())
+            SharedMemoryCollector(rings=1, capacity=16, max_names=4).close()
+        register_at_fork.assert_not_called()
+        assert copy in _collectors
+        # Closed without unlinking, as this process also created the original.
+        copy._words.release()
+        copy._shm.close()
+
+    def test_threads(self):
+        collector = SharedMemoryCollector(rings=1, capacity=100000, max_names=4)
+        # Yield to other threads after every read of the ring, so unsynchronised slot claims would collide.
+        collector._words = YieldingWords(collector._words)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: [collector.record("a", 1) for _ in range(200)], range(8)))
+
+        stats = collector.get_stats("ns")
+        assert stats["a"]["Count"] == 1600
+        assert collector.dropped == 0
+        collector._words = collector._words.words
+        collector.close()
+
+    def test_processes(self, collector):
+        with ProcessPoolExecutor(max_workers=4, initializer=init_worker, initargs=(collector,)) as executor:
+            list(executor.map(work, [100] * 8))
+
+        stats = collector.get_stats("ns")
+        assert stats["work"]["Count"] == 800
+        assert stats["work"]["Total"] == 8 * sum(range(100))
+        assert collector.dropped == 0
+
+    def test_attach_decorator(self, collector):
+        @TimerDecorator.decorate("test_collector_tm", aggregate=True)
+        def dummy_func(x: int) -> int:
+            return x + 1
+
+        TimerDecorator.attach_collector(collector)
+        for i in range(5):
+            dummy_func(i)
+
+        managers = collector.get_managers()
+        assert len(managers["test_collector_tm"]) == 5
+        del TimerDecorator._decorated_managers["test_collector_tm"]
@@ -0,0 +1,122 @@
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from perfed.compare import (
+    COMPARISON_HEADERS,
+    compare_durations,
+    compare_files,
+    compare_managers,
+    comparisons_to_dataframe,
+    grouped_durations,
+    show_comparisons,
+)
+from perfed.timer_manager import TimerManager
+
+
+def columnar_manager(name: str, durations) -> TimerManager:
+    tm = TimerManager(name, columnar=True)
+    for duration in durations:
+        tm.record(0, int(duration))
+    return tm
+
+
+class TestCompareDurations:
+    def test_slower(self):
+        rng = np.random.default_rng(0)
+        baseline = rng.normal(1000, 50, size=5000)
+        candidate = rng.normal(1100, 50, size=5000)
+        comparison = compare_durations(baseline, candidate, name="a")
+        assert comparison.slower
+        assert not comparison.faster
+        assert comparison.p_value < 1e-10
+        assert comparison.delta_low < 100 < comparison.delta_high
+        assert comparison.change == pytest.approx(0.1, abs=0.01)
+
+    def test_faster(self):
+        rng = np.random.default_rng(0)
+        comparison = compare_durations(rng.normal(1100, 50, size=1000), rng.normal(1000, 50, size=1000))
+        assert comparison.faster
+        assert not comparison.slower
+
+    def test_unchanged(self):
+        rng = np.random.default_rng(0)
+        comparison = compare_durations(rng.normal(1000, 50, size=1000), rng.normal(1000, 50, size=1000))
+        assert not comparison.significant
+        assert comparison.delta_low < 0 < comparison.delta_high
+
+    def test_identical(self):
+        values = np.array([5, 5, 5, 5])
+        comparison = compare_durations(values, values)
+        assert comparison.p_value == 1.0
+        assert comparison.delta == 0
+
+    def test_p_value(self):
+        # U = 22.5, variance = 25 / 12 * (11 - 6 / 90) with one pair of ties, z = (10 - 0.5) / sqrt(variance).
+        comparison = compare_durations(np.array([1, 2, 3, 4, 5]), np.array([3, 6, 7, 8, 9]))
+        assert comparison.p_value == pytest.approx(0.046533, abs=1e-6)
+
+    def test_threshold(self):
+        rng = np.random.default_rng(0)
+        baseline = rng.normal(1000, 10, size=5000)
+        candidate = rng.normal(1020, 10, size=5000)
+        assert compare_durations(baseline, candidate).slower
+        assert not compare_durations(baseline, candidate, threshold=0.05).slower
+
+    def test_single(self):
+        comparison = compare_durations(np.array([100]), np.array([200]))
+        assert comparison.delta == 100
+        assert not comparison.significant
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            compare_durations(np.array([1]), np.array([1]), confidence=1)
+        with pytest.raises(ValueError):
+            compare_durations(np.array([]), np.array([1]))
+
+
+class TestCompareManagers:
+    def test_grouped_durations(self):
+        tm = TimerManager("tm")
+        for name, duration in [("f(1)", 10), ("f(2)", 20), ("load", 30)]:
+            tm.start(name)
+            tm._timers[name]._start, tm._timers[name]._stop = 0, duration
+        groups = grouped_durations(tm)
+        assert list(groups) == ["f", "load"]
+        assert groups["f"].tolist() == [10, 20]
+
+        columnar = columnar_manager("g", [1, 2])
+        columnar.start("h").stop()
+        assert set(grouped_durations(columnar)) == {"g", "h"}
+
+        with pytest.raises(ValueError):
+            grouped_durations(TimerManager("agg", aggregate=True))
+
+    def test_compare_managers(self):
+        baseline = columnar_manager("f", range(1000, 1100))
+        candidate = columnar_manager("f", range(2000, 2100))
+        candidate.start("only_candidate").stop()
+        comparisons = compare_managers(baseline, candidate)
+        assert [comparison.name for comparison in comparisons] == ["f"]
+        assert comparisons[0].slower
+
+    def test_compare_files(self, tmp_path):
+        columnar_manager("f", range(1000, 1100)).save(str(tmp_path / "baseline.bin"), "binary")
+        columnar_manager("f", range(1000, 1100)).save(str(tmp_path / "candidate.bin"), "binary")
+        comparisons = compare_files(str(tmp_path / "baseline.bin"), str(tmp_path / "candidate.bin"), name="f")
+        assert [comparison.name for comparison in comparisons] == ["f"]
+        assert comparisons[0].delta == 0
+        assert not comparisons[0].slower
+
+    def test_show(self):
+        comparisons = compare_managers(columnar_manager("f", [1000, 1001]), columnar_manager("f", [2000, 2001]))
+        df = comparisons_to_dataframe(comparisons, unit="ns")
+        assert list(df.columns) == COMPARISON_HEADERS
+        assert df["Delta"].tolist() == [1000.0]
+
+        print_fn = Mock()
+        with patch("tabulate.tabulate", return_value="table") as mocked_tabulate:
+            show_comparisons(comparisons, unit="ns", print_fn=print_fn)
+        print_fn.assert_called_once_with("table")
+        assert mocked_tabulate.call_args.args[0] == [comparisons[0].to_tuple(unit="ns")]
@@ -0,0 +1,223 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from perfed.binary_format import read_segments
+from perfed.exporter import BackgroundExporter, ExportBatch, FileSink, LogSink
+from perfed.sample_store import SampleStore
+from perfed.timer_manager import TimerManager
+
+
+class ListSink:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.batches = []
+        self.closed = False
+        self.delay = delay
+
+    def write(self, batch):
+        time.sleep(self.delay)
+        self.batches.append(batch.to_tuples("ns"))
+
+    def close(self):
+        self.closed = True
+
+
+class TestExportBatch:
+    def test_to_tuples(self):
+        samples = SampleStore()
+        samples.append(samples.intern("a"), 0, 10)
+        samples.append(SampleStore.UNNAMED, 0, 20)
+        batch = ExportBatch("tm", samples=samples, first_row=5)
+        assert batch.to_tuples("ns") == [("a", 10), ("tm(7)", 20)]
+        assert len(batch) == 2
+
+    def test_to_tuples_stats(self):
+        assert ExportBatch("tm", stats={"Count": 1}).to_tuples() == [("Count", 1)]
+
+
+class TestBackgroundExporter:
+    def test_deltas_columnar(self):
+        tm = TimerManager("tm", columnar=True)
+        sink = ListSink()
+        with BackgroundExporter([sink], [tm], interval=60) as exporter:
+            tm.record(0, 10)
+            exporter.flush()
+            tm.record(0, 20)
+            tm.record(0, 30)
+            exporter.flush()
+            exporter.flush()
+        assert sink.batches == [[("tm(1)", 10)], [("tm(2)", 20), ("tm(3)", 30)]]
+        assert sink.closed
+
+    def test_deltas_dict(self):
+        tm = TimerManager("tm")
+        sink = ListSink()
+        with BackgroundExporter([sink], [tm], interval=60) as exporter:
+            with tm.start("a"):
+                pass
+            tm.start("b")
+            with tm.start("c"):
+                pass
+            exporter.flush()
+            tm.stop("b")
+            with tm.start("d"):
+                pass
+        names = [[name for name, _ in batch] for batch in sink.batches]
+        assert names == [["a", "c"], ["b", "d"]]
+
+    def test_deltas_dict_merged(self):
+        source = TimerManager("source", columnar=True)
+        source.record(0, 10)
+        tm = TimerManager("tm")
+        sink = ListSink()
+        with BackgroundExporter([sink], [tm], interval=60) as exporter:
+            with tm.start("a"):
+                pass
+            exporter.flush()
+            tm.merge(source.snapshot())
+        names = [name for batch in sink.batches for name, _ in batch]
+        assert names == ["a", "source(1)"]
+
+    def test_deltas_reset_columnar(self):
+        tm = TimerManager("tm", columnar=True)
+        sink = ListSink()
+        with BackgroundExporter([sink], [tm], interval=60) as exporter:
+            tm.record(0, 10)
+            tm.record(0, 20)
+            exporter.flush()
+            tm.reset()
+            tm.record(0, 30)
+            exporter.flush()
+        assert sink.batches == [[("tm(1)", 10), ("tm(2)", 20)], [("tm(3)", 30)]]
+
+    def test_deltas_reset_dict(self):
+        tm = TimerManager("tm")
+        sink = ListSink()
+        with BackgroundExporter([sink], [tm], interval=60) as exporter:
+            with tm.start("a"):
+                pass
+            with tm.start("b"):
+                pass
+            exporter.flush()
+            tm.reset()
+            with tm.start("c"):
+                pass
+        names = [name for batch in sink.batches for name, _ in batch]
+        assert names == ["a", "b", "c"]
+
+    def test_deltas_thread_safe(self):
+        tm = TimerManager("tm", thread_safe=True)
+        sink = ListSink()
+        with BackgroundExporter([sink], [tm], interval=0.01):
+            threads = [
+                threading.Thread(target=lambda: [tm.record(0, 1) for _ in range(1000)]) for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert sum(len(batch) for batch in sink.batches) == 4000
+
+    def test_deltas_retired_threads(self):
+        tm = TimerManager("tm", thread_safe=True)
+        sink = ListSink()
+        exported, done = threading.Event(), threading.Event()
+
+        def work():
+            tm.record(0, 1)
+            tm.record(0, 2)
+            done.set()
+            exported.wait()
+            tm.record(0, 3)
+
+        with BackgroundExporter([sink], [tm], interval=60) as exporter:
+            thread = threading.Thread(target=work)
+            thread.start()
+            done.wait()
+            exporter.flush()
+            exported.set()
+            thread.join()
+            exporter.flush()
+            thread = threading.Thread(target=tm.record, args=(0, 4))
+            thread.start()
+            thread.join()
+        assert tm._thread_shards == [tm._retired]
+        assert [[duration for _, duration in batch] for batch in sink.batches] == [[1, 2], [3], [4]]
+
+    def test_aggregate(self, tmp_path):
+        tm = TimerManager("tm", aggregate=True)
+        path = tmp_path / "stats.csv"
+        with BackgroundExporter([FileSink(str(path), fmt="csv", unit="ns")], [tm], interval=60) as exporter:
+            tm.record(0, 10)
+            exporter.flush()
+            exporter.flush()
+        lines = path.read_text().splitlines()
+        assert lines[0] == "tm:Count,1"
+        assert "tm:Total,10.0" in lines
+        assert len([line for line in lines if line.startswith("tm:Count")]) == 1
+
+    def test_file_sink_binary(self, tmp_path):
+        tm = TimerManager("tm", columnar=True)
+        path = str(tmp_path / "timers.bin")
+        with BackgroundExporter([FileSink(path)], [tm], interval=60) as exporter:
+            tm.record(0, 10)
+            exporter.flush()
+            tm.record(0, 20)
+        assert TimerManager.load(path, name="tm").to_tuples("ns") == [("tm(1)", 10), ("tm(2)", 20)]
+        assert len(read_segments(path)) == 2
+
+    def test_log_sink(self):
+        print_fn = Mock()
+        tm = TimerManager("tm", columnar=True)
+        tm.record(0, 10)
+        with BackgroundExporter([LogSink(print_fn=print_fn, unit="ns")], [tm], interval=60):
+            pass
+        print_fn.assert_called_once()
+        assert "tm(1)" in print_fn.call_args.args[0]
+
+    @pytest.mark.parametrize("policy, expected", [("drop_oldest", [3]), ("drop_newest", [1])])
+    def test_drop_policy(self, policy, expected):
+        tm = TimerManager("tm", columnar=True)
+        sink = ListSink()
+        exporter = BackgroundExporter([sink], [tm], max_batches=1, drop_policy=policy)
+        for i in range(1, 4):
+            tm.record(0, i)
+            exporter.drain()
+        assert exporter.dropped == 2
+        assert [batch.to_tuples("ns")[0][1] for batch in exporter._queue] == expected
+
+    def test_block_policy(self):
+        tm = TimerManager("tm", columnar=True)
+        sink = ListSink(delay=0.01)
+        with BackgroundExporter([sink], [tm], interval=60, max_batches=1, drop_policy="block") as exporter:
+            for _ in range(5):
+                tm.record(0, 1)
+                exporter.drain()
+        assert exporter.dropped == 0
+        assert sum(len(batch) for batch in sink.batches) == 5
+
+    def test_failing_sink(self):
+        tm = TimerManager("tm", columnar=True)
+        failing = Mock()
+        failing.write.side_effect = OSError
+        sink = ListSink()
+        with BackgroundExporter([failing, sink], [tm], interval=60) as exporter:
+            tm.record(0, 1)
+            assert exporter.flush(timeout=5)
+        assert exporter.failed == 1
+        assert len(sink.batches) == 1
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            BackgroundExporter([], interval=0)
+        with pytest.raises(ValueError):
+            BackgroundExporter([], drop_policy="drop_all")
+        with pytest.raises(RuntimeError):
+            BackgroundExporter([]).flush()
+        exporter = BackgroundExporter([]).start()
+        with pytest.raises(RuntimeError):
+            exporter.start()
+        exporter.close()
+        exporter.close()
@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+import pytest
+
+from perfed.histogram import LatencyHistogram
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).lognormal(mean=12, sigma=1.5, size=100000).astype(np.int64)
+
+
+class TestLatencyHistogram:
+    def test_empty(self):
+        assert all(math.isnan(value) for value in LatencyHistogram().quantiles([0.5, 0.99]))
+
+    def test_small_values_exact(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        assert histogram.quantiles([0.01, 0.5, 1.0]) == [1.0, 50.0, 100.0]
+
+    def test_relative_error(self, values):
+        histogram = LatencyHistogram(precision=7)
+        for value in values.tolist():
+            histogram.add(value)
+
+        qs = [0.5, 0.9, 0.99, 0.999]
+        expected = np.quantile(values, qs, method="inverted_cdf")
+        for estimate, exact in zip(histogram.quantiles(qs), expected, strict=True):
+            assert abs(estimate - exact) / exact <= 2 ** -7
+
+    def test_add_values(self, values):
+        histogram = LatencyHistogram()
+        for value in values.tolist():
+            histogram.add(value)
+
+        vectorized = LatencyHistogram()
+        vectorized.add_values(values)
+        assert vectorized.count == histogram.count
+        assert vectorized._counts == histogram._counts
+
+    def test_merge(self, values):
+        histogram_a = LatencyHistogram()
+        histogram_a.add_values(values[:50000])
+        histogram_b = LatencyHistogram()
+        histogram_b.add_values(values[50000:])
+        histogram_a.merge(histogram_b)
+
+        expected = LatencyHistogram()
+        expected.add_values(values)
+        assert histogram_a.count == expected.count
+        assert histogram_a._counts == expected._counts
+
+        with pytest.raises(ValueError):
+            histogram_a.merge(LatencyHistogram(precision=5))
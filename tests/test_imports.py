@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = {"numpy", "pandas", "tabulate"}
+
+
+def imported_heavy_modules(code: str) -> list:
+    """Run code in a fresh interpreter and return the heavy modules it imported.
+    """
+    check = f"import sys\n{code}\nprint(','.join(sorted({{m.split('.')[0] for m in sys.modules}} & {HEAVY_MODULES!r})))"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    return [module for module in result.stdout.strip().split(",") if module]
+
+
+@pytest.mark.parametrize("module", ["perfed.timer", "perfed.timer_manager", "perfed.timer_decorator"])
+def test_import_is_stdlib_only(module):
+    assert imported_heavy_modules(f"import {module}") == []
+
+
+def test_recording_is_stdlib_only():
+    code = """
+from perfed.timer_decorator import TimerDecorator
+from perfed.timer_manager import TimerManager
+
+for mode in ["aggregate", "columnar", "thread_safe"]:
+    TimerDecorator.decorate(mode, **{mode: True})(lambda: None)()
+TimerDecorator.decorate("dict")(lambda: None)()
+
+tm = TimerManager("tm")
+with tm.start("a"):
+    pass
+"""
+    assert imported_heavy_modules(code) == []
+
+
+def test_exports_import_on_first_use():
+    code = """
+from perfed.timer_manager import TimerManager
+
+tm = TimerManager("tm")
+with tm.start("a"):
+    pass
+tm.to_dataframe()
+tm.show(print_fn=lambda _: None)
+"""
+    assert imported_heavy_modules(code) == sorted(HEAVY_MODULES)
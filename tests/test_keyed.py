@@ -0,0 +1,43 @@
+import pytest
+
+from perfed.keyed import KeyedStats
+
+
+class TestKeyedStats:
+    def test_add(self):
+        keys = KeyedStats()
+        keys.add("a", 100)
+        keys.add("a", 300)
+        keys.add("b", 50)
+        assert len(keys) == 2
+        assert keys.items()["a"].total == 400
+        assert keys.items()["b"].count == 1
+        assert keys.other.count == 0
+
+    def test_evict_least_recently_used(self):
+        keys = KeyedStats(max_keys=2)
+        keys.add("a", 100)
+        keys.add("b", 200)
+        keys.add("a", 100)
+        keys.add("c", 300)
+        assert list(keys.items()) == ["a", "c"]
+        assert keys.other.count == 1
+        assert keys.other.total == 200
+
+    def test_merge(self):
+        keys_a = KeyedStats(max_keys=2)
+        keys_a.add("a", 100)
+        keys_b = KeyedStats(max_keys=2)
+        keys_b.add("c", 300)
+        keys_b.add("a", 100)
+        keys_b.add("b", 200)
+
+        keys_a.merge(keys_b)
+        assert list(keys_a.items()) == ["a", "b"]
+        assert keys_a.items()["a"].count == 2
+        assert keys_a.other.total == 300
+        assert sum(stats.count for stats in keys_a.items().values()) + keys_a.other.count == 4
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            KeyedStats(max_keys=0)
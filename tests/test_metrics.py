@@ -0,0 +1,99 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from perfed.metrics import OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, MetricsServer, render_metrics
+from perfed.timer_decorator import TimerDecorator
+from perfed.timer_manager import TimerManager
+
+
+@pytest.fixture(autouse=True)
+def clear_timer_decorator():
+    TimerDecorator._decorated_managers = {}
+
+
+@pytest.fixture
+def managers():
+    aggregate = TimerManager("agg", aggregate=True)
+    for duration in [500_000, 2_000_000, 20_000_000]:
+        aggregate.record(0, duration)
+    columnar = TimerManager('col"umnar', columnar=True, quantiles=(0.5,))
+    for duration in [1_000_000, 3_000_000]:
+        columnar.record(0, duration)
+    return {"agg": aggregate, "columnar": columnar}
+
+
+class TestRenderMetrics:
+    def test_histogram(self, managers):
+        lines = render_metrics(managers, buckets=(0.001, 0.01)).splitlines()
+        assert lines[:3] == [
+            "# HELP perfed_duration_seconds Durations of timed calls in seconds.",
+            "# TYPE perfed_duration_seconds histogram",
+            "# UNIT perfed_duration_seconds seconds",
+        ]
+        assert 'perfed_duration_seconds_bucket{timer="agg",le="0.001"} 1' in lines
+        assert 'perfed_duration_seconds_bucket{timer="agg",le="0.01"} 2' in lines
+        assert 'perfed_duration_seconds_bucket{timer="agg",le="+Inf"} 3' in lines
+        assert 'perfed_duration_seconds_count{timer="agg"} 3' in lines
+        assert 'perfed_duration_seconds_sum{timer="agg"} 0.0225' in lines
+        assert lines[-1] == "# EOF"
+
+    def test_summary(self, managers):
+        lines = render_metrics(managers).splitlines()
+        assert "# TYPE perfed_duration_quantile_seconds summary" in lines
+        assert 'perfed_duration_quantile_seconds{timer="col\\"umnar",quantile="0.5"} 0.002' in lines
+        assert 'perfed_duration_quantile_seconds_count{timer="col\\"umnar"} 2' in lines
+        assert 'perfed_duration_quantile_seconds_sum{timer="col\\"umnar"} 0.004' in lines
+
+    def test_empty(self):
+        assert render_metrics({}) == "# EOF\n"
+        assert render_metrics({}, openmetrics=False) == "\n"
+        lines = render_metrics({"tm": TimerManager("tm", columnar=True)}, openmetrics=False).splitlines()
+        assert 'perfed_duration_quantile_seconds{timer="tm",quantile="0.5"} NaN' in lines
+        assert 'perfed_duration_quantile_seconds_count{timer="tm"} 0' in lines
+        assert not any(line.startswith("# UNIT") for line in lines)
+
+    def test_decorated(self):
+        @TimerDecorator.decorate("decorated_tm", aggregate=True)
+        def foo():
+            pass
+
+        for _ in range(5):
+            foo()
+        assert 'perfed_duration_seconds_count{timer="decorated_tm"} 5' in render_metrics().splitlines()
+
+    def test_sampled(self):
+        tm = TimerManager("tm", aggregate=False, columnar=True)
+        tm.record(0, 1000)
+        tm.count_calls(10)
+        lines = render_metrics({"tm": tm}).splitlines()
+        assert 'perfed_duration_quantile_seconds_count{timer="tm"} 1' in lines
+        assert 'perfed_duration_quantile_seconds_sum{timer="tm"} 1e-06' in lines
+
+
+class TestMetricsServer:
+    def test_serve(self, managers):
+        with MetricsServer(managers, port=0) as server:
+            request = urllib.request.Request(server.url, headers={"Accept": "application/openmetrics-text"})
+            with urllib.request.urlopen(request) as response:
+                assert response.headers["Content-Type"] == OPENMETRICS_CONTENT_TYPE
+                assert response.read().decode() == server.render()
+
+            with urllib.request.urlopen(server.url) as response:
+                assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+                assert response.read().decode() == server.render(openmetrics=False)
+
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(server.url.replace("/metrics", "/other"))
+            assert error.value.code == 404
+
+    def test_start_close(self):
+        server = MetricsServer(port=0)
+        with pytest.raises(RuntimeError):
+            _ = server.url
+        server.start()
+        with pytest.raises(RuntimeError):
+            server.start()
+        server.close()
+        server.close()
@@ -0,0 +1,61 @@
+import math
+
+import pytest
+
+from perfed.rolling import RollingStats
+
+SEC = 1_000_000_000
+
+
+@pytest.fixture
+def rolling():
+    # 60 second window in 10 second buckets.
+    return RollingStats(window_ns=60 * SEC, interval_ns=10 * SEC)
+
+
+class TestRollingStats:
+    def test_invalid_interval(self):
+        with pytest.raises(ValueError):
+            RollingStats(window_ns=SEC, interval_ns=0)
+        with pytest.raises(ValueError):
+            RollingStats(window_ns=SEC, interval_ns=2 * SEC)
+
+    def test_window(self, rolling):
+        rolling.add(100, 5 * SEC)
+        rolling.add(200, 15 * SEC)
+        rolling.add(300, 25 * SEC)
+        assert rolling.window(5 * SEC, 25 * SEC).total == 300
+        assert rolling.window(10 * SEC, 25 * SEC).total == 500
+        assert rolling.window(60 * SEC, 25 * SEC).count == 3
+
+        with pytest.raises(ValueError):
+            rolling.window(61 * SEC, 25 * SEC)
+
+    def test_eviction(self, rolling):
+        rolling.add(100, 5 * SEC)
+        rolling.add(200, 75 * SEC)
+        assert rolling.window(60 * SEC, 75 * SEC).total == 200
+        assert len(rolling._buckets) == 7
+
+    def test_window_expired(self, rolling):
+        rolling.add(100, 5 * SEC)
+        stats = rolling.window(60 * SEC, 500 * SEC)
+        assert stats.count == 0
+        assert math.isnan(stats.mean)
+
+    def test_add_evicted(self, rolling):
+        rolling.add(200, 70 * SEC)
+        rolling.add(100, 5 * SEC)
+        assert rolling.window(60 * SEC, 70 * SEC).total == 200
+
+    def test_merge(self, rolling):
+        other = RollingStats(window_ns=60 * SEC, interval_ns=10 * SEC)
+        rolling.add(100, 5 * SEC)
+        rolling.add(100, 15 * SEC)
+        other.add(200, 15 * SEC)
+        other.add(300, 75 * SEC)
+        rolling.merge(other)
+        assert rolling.window(60 * SEC, 75 * SEC).total == 600
+
+        with pytest.raises(ValueError):
+            rolling.merge(RollingStats(window_ns=60 * SEC, interval_ns=SEC))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from perfed.sample_store import SampleStore
+
+
+@pytest.fixture
+def store():
+    store = SampleStore()
+    store.append(store.intern("a"), 0, 1000)
+    store.append(SampleStore.UNNAMED, 500, 2500)
+    store.append(store.intern("b"), 1000, 4000)
+    return store
+
+
+class TestSampleStore:
+    def test_intern(self):
+        store = SampleStore()
+        assert store.intern("a") == 0
+        assert store.intern("b") == 1
+        assert store.intern("a") == 0
+        assert "a" in store
+        assert "z" not in store
+
+    def test_append(self, store):
+        assert len(store) == 3
+        assert store.get(1) == (500, 2500)
+
+    def test_find(self, store):
+        assert store.find("b") == 2
+        with pytest.raises(ValueError):
+            store.find("z")
+
+    def test_labels(self, store):
+        assert store.labels("tm") == ["a", "tm(2)", "b"]
+
+    def test_durations_ns(self, store):
+        assert store.durations_ns().tolist() == [1000, 2000, 3000]
+        store.append(SampleStore.UNNAMED, 0, 1)
+        assert store.durations_ns().tolist() == [1000, 2000, 3000, 1]
+
+    def test_durations_ns_empty(self):
+        assert SampleStore().durations_ns().tolist() == []
+
+    def test_extend(self, store):
+        other = SampleStore()
+        other.append(other.intern("b"), 0, 10)
+        other.append(other.intern("c"), 0, 20)
+        other.append(SampleStore.UNNAMED, 0, 30)
+
+        store.extend(other)
+        assert len(store) == 6
+        assert store.labels("tm") == ["a", "tm(2)", "b", "b", "c", "tm(6)"]
+        assert store.durations_ns().tolist() == [1000, 2000, 3000, 10, 20, 30]
+
+    def test_clocks(self):
+        store = SampleStore(clocks=["thread_time", "alloc"])
+        store.append_clocks([100, 64])
+        store.append(SampleStore.UNNAMED, 0, 1000)
+        clocks = store.clock_columns_since(0)
+        assert clocks["thread_time"].tolist() == [100]
+        assert clocks["alloc"].tolist() == [64]
+
+        other = SampleStore(clocks=["alloc"])
+        other.append_clocks([32])
+        other.append(SampleStore.UNNAMED, 0, 10)
+        store.extend(other)
+        clocks = store.clock_columns_since(1)
+        assert {clock: column.tolist() for clock, column in clocks.items()} == {"thread_time": [0], "alloc": [32]}
+
+    def test_threads(self, store):
+        other = SampleStore()
+        other.append(SampleStore.UNNAMED, 0, 10, thread=7)
+        store.extend(other)
+        store.extend_columns([], np.array([-1]), np.array([0]), np.array([20]))
+        assert store.threads_since(0).tolist() == [0, 0, 0, 7, 0]
+        assert store.threads_since(3, 4).tolist() == [7]
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+import pytest
+
+from perfed.sampler import Sampler
+
+
+class TestSampler:
+    def test_fixed(self):
+        sampler = Sampler(every=10)
+        assert sampler.every == 10
+        assert not sampler.adaptive
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            Sampler(every=0)
+        with pytest.raises(ValueError):
+            Sampler(max_samples_per_sec=0)
+        with pytest.raises(ValueError):
+            Sampler(max_overhead=1.5)
+
+    def test_adapt_max_samples_per_sec(self):
+        with patch("perfed.sampler.time.perf_counter_ns", return_value=0):
+            sampler = Sampler(every=2, max_samples_per_sec=1000)
+        assert sampler.adaptive
+
+        # Still inside the window.
+        with patch("perfed.sampler.time.perf_counter_ns", return_value=500_000_000):
+            sampler.adapt(1_000_000)
+        assert sampler.every == 2
+
+        # 1,000,000 calls per second with at most 1,000 samples per second.
+        with patch("perfed.sampler.time.perf_counter_ns", return_value=1_000_000_000):
+            sampler.adapt(1_000_000)
+        assert sampler.every == 1000
+
+        # Call rate dropped, but never below the fixed rate.
+        with patch("perfed.sampler.time.perf_counter_ns", return_value=2_000_000_000):
+            sampler.adapt(1_000_100)
+        assert sampler.every == 2
+
+    def test_adapt_max_overhead(self):
+        with (
+            patch("perfed.sampler.instrumentation_overhead_ns", return_value=100.0),
+            patch("perfed.sampler.time.perf_counter_ns", return_value=0),
+        ):
+            # 1% of a second at 100ns per timed call allows 100,000 samples per second.
+            sampler = Sampler(max_overhead=0.01)
+
+        with patch("perfed.sampler.time.perf_counter_ns", return_value=1_000_000_000):
+            sampler.adapt(10_000_000)
+        assert sampler.every == 100
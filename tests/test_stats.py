@@ -0,0 +1,105 @@
+import math
+import statistics
+
+import numpy as np
+import pytest
+
+from perfed.stats import RunningStats, SampleStats
+
+
+class TestRunningStats:
+    def test_init(self):
+        stats = RunningStats()
+        assert stats.count == 0
+        assert stats.total == 0
+        assert math.isnan(stats.mean)
+        assert math.isnan(stats.variance)
+
+    def test_add(self):
+        values = [300, 100, 200, 700]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+
+        assert stats.count == 4
+        assert stats.total == 1300
+        assert stats.min == 100
+        assert stats.max == 700
+        assert stats.mean == 325
+        assert math.isclose(stats.variance, statistics.variance(values))
+        assert math.isclose(stats.std, statistics.stdev(values))
+
+    def test_single_value(self):
+        stats = RunningStats()
+        stats.add(5)
+        assert stats.variance == 0.0
+
+    def test_merge(self):
+        values_a = [300, 100, 200]
+        values_b = [700, 50]
+        stats_a = RunningStats()
+        stats_b = RunningStats()
+        for value in values_a:
+            stats_a.add(value)
+        for value in values_b:
+            stats_b.add(value)
+
+        stats_a.merge(stats_b)
+        stats_a.merge(RunningStats())
+        assert stats_a.count == 5
+        assert stats_a.total == 1350
+        assert stats_a.min == 50
+        assert stats_a.max == 700
+        assert math.isclose(stats_a.variance, statistics.variance(values_a + values_b))
+
+    def test_from_values(self):
+        values = [300, 100, 200, 700]
+        stats = RunningStats.from_values(np.array(values, dtype=np.int64))
+        assert stats.count == 4
+        assert stats.total == 1300
+        assert stats.min == 100
+        assert stats.max == 700
+        assert math.isclose(stats.variance, statistics.variance(values))
+        assert RunningStats.from_values(np.array([], dtype=np.int64)).count == 0
+
+
+class TestSampleStats:
+    def test_init(self):
+        stats = SampleStats()
+        assert stats.count == 0
+        assert math.isnan(stats.mean)
+        assert math.isnan(stats.std)
+        assert all(math.isnan(value) for value in stats.quantiles([0.5, 0.99]))
+
+    def test_add_values(self):
+        rng = np.random.default_rng(0)
+        values = rng.integers(1, 1_000_000, size=1000)
+        stats = SampleStats()
+        for batch in np.array_split(values, 7):
+            stats.add_values(batch)
+        stats.add_values(np.array([], dtype=np.int64))
+
+        assert stats.count == 1000
+        assert stats.total == values.sum()
+        assert stats.min == values.min()
+        assert stats.max == values.max()
+        assert math.isclose(stats.std, values.std(ddof=1))
+        qs = [0, 0.5, 0.95, 0.999, 1]
+        assert stats.quantiles(qs) == pytest.approx(np.quantile(values, qs).tolist())
+
+    def test_single_value(self):
+        stats = SampleStats()
+        stats.add_values(np.array([5]))
+        assert stats.std == 0.0
+        assert stats.quantiles([0.5, 1]) == [5.0, 5.0]
+
+    def test_merges_chunks_on_read(self):
+        stats = SampleStats()
+        stats.add_values(np.array([3, 1]))
+        assert stats.quantiles([0, 1]) == [1.0, 3.0]
+        stats.add_values(np.array([4, 0]))
+        stats.add_values(np.array([2]))
+        assert len(stats._chunks) == 2
+        assert stats.quantiles([0, 0.5, 1]) == [0.0, 2.0, 4.0]
+        assert stats._chunks == []
+        assert stats._sorted.tolist() == [0, 1, 2, 3, 4]
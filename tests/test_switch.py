@@ -0,0 +1,93 @@
+import asyncio
+import importlib
+
+import pytest
+
+import perfed
+from perfed import switch
+from perfed.accumulator import NULL_ACCUMULATOR
+from perfed.timer import NULL_TIMER
+from perfed.timer_decorator import TimerDecorator
+from perfed.timer_manager import TimerManager
+
+
+@pytest.fixture(autouse=True)
+def enable_after():
+    yield
+    TimerDecorator._decorated_managers.clear()
+    perfed.enable()
+
+
+class TestSwitch:
+    def test_toggle(self):
+        assert perfed.is_enabled()
+        perfed.disable()
+        assert not perfed.is_enabled()
+        perfed.enable()
+        assert perfed.is_enabled()
+
+    @pytest.mark.parametrize(
+        "value, enabled", [("0", False), ("off", False), ("False", False), ("1", True), ("", True)],
+    )
+    def test_env_var(self, monkeypatch, value, enabled):
+        monkeypatch.setenv(switch.ENV_VAR, value)
+        importlib.reload(switch)
+        assert switch.is_enabled() == enabled
+        monkeypatch.delenv(switch.ENV_VAR)
+        importlib.reload(switch)
+        assert switch.is_enabled()
+
+    @pytest.mark.parametrize("mode", [{}, {"aggregate": True}, {"columnar": True}, {"hierarchical": True}])
+    def test_decorated(self, mode):
+        @TimerDecorator.decorate("test_tm", **mode)
+        def dummy_func(x: int) -> int:
+            return x
+
+        perfed.disable()
+        assert dummy_func(1) == 1
+        tm = TimerDecorator.get_manager("test_tm")
+        assert len(tm) == 0
+        perfed.enable()
+        assert dummy_func(2) == 2
+        assert len(tm) == 1
+
+    def test_decorated_async_sampled(self):
+        @TimerDecorator.decorate("test_tm", aggregate=True, sample_every=1, max_samples_per_sec=1000)
+        async def dummy_func(x: int) -> int:
+            return x
+
+        perfed.disable()
+        assert asyncio.run(dummy_func(1)) == 1
+        assert len(TimerDecorator.get_manager("test_tm")) == 0
+
+    def test_manager(self):
+        tm = TimerManager("test_timer_manager")
+        running = tm.start("running")
+        perfed.disable()
+        with tm.start("a"):
+            pass
+        assert tm.start("a") is NULL_TIMER
+        assert NULL_TIMER.get() == 0.0
+        tm.stop("a")
+        tm.stop("running")
+        assert running._stop > 0
+        assert list(tm.get_timers()) == ["running"]
+
+        perfed.enable()
+        with pytest.raises(ValueError):
+            tm.stop("a")
+
+    def test_accumulator(self):
+        tm = TimerManager("test_timer_manager")
+        perfed.disable()
+        for _ in range(3):
+            with tm.accumulator("loop"):
+                pass
+        assert tm.accumulator("loop") is NULL_ACCUMULATOR
+        assert len(NULL_ACCUMULATOR) == 0
+        assert tm.get_accumulators() == {}
+
+        perfed.enable()
+        with tm.accumulator("loop"):
+            pass
+        assert len(tm.accumulator("loop")) == 1
@@ -1,4 +1,6 @@
+import asyncio
 import time
+from unittest.mock import Mock
 
 import pytest
 
@@ -49,6 +51,14 @@ class TestTimer:
         timer.stop()
         assert curr_stop == timer._stop
 
+    def test_stop_on_stop(self):
+        on_stop = Mock()
+        timer = Timer("test_timer", on_stop=on_stop)
+        timer.start()
+        timer.stop()
+        timer.stop()
+        on_stop.assert_called_once_with(timer)
+
     def test_stop_not_started(self, timer):
         with pytest.raises(RuntimeError):
             timer.stop()
@@ -76,6 +86,46 @@ class TestTimer:
             time.sleep(sleep_dur_c)
         assert timer_c.get() > sleep_dur_c
 
+    def test_async_context_manager(self, timer):
+        async def run():
+            async with timer:
+                await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        assert timer.get() > 0.1
+
+    def test_async_with_per_task(self):
+        timers = [Timer(f"task_{i}") for i in range(1000)]
+
+        async def task(timer):
+            async with timer:
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(*(task(timer) for timer in timers))
+
+        asyncio.run(run())
+        assert all(timer.get() >= 0.01 for timer in timers)
+
     def test_get_without_start(self, timer):
         with pytest.raises(RuntimeError):
             timer.get()
+
+    def test_clocks(self):
+        timer = Timer("test_timer", clocks=["thread_time", "alloc"])
+        with pytest.raises(RuntimeError):
+            timer.get_clocks()
+        timer.start()
+        sum(range(100000))
+        assert timer.get_clocks(unit="ns")["thread_time"] > 0
+        timer.stop()
+        clocks = timer.get_clocks(unit="ns")
+        assert list(clocks) == ["thread_time", "alloc"]
+        assert clocks["thread_time"] > 0
+        assert timer.get_clocks(unit="ns") == clocks
+
+    def test_no_clocks(self, timer):
+        timer.start()
+        timer.stop()
+        assert timer.get_clocks() == {}
+        assert timer._clocks is None
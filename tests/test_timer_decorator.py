@@ -1,4 +1,7 @@
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
 
 import pytest
 
@@ -9,6 +12,7 @@ from perfed.timer_manager import TimerManager
 @pytest.fixture(autouse=True)
 def clear_timer_decorator():
     TimerDecorator._decorated_managers = {}
+    TimerDecorator._collector = None
 
 
 class TestTimerDecorator:
@@ -28,6 +32,312 @@ class TestTimerDecorator:
         for timer in tm._timers.values():
             assert timer.get() > 0.1
 
+    def test_decorate_aggregate(self):
+        @TimerDecorator.decorate("test_tm", aggregate=True)
+        def dummy_func(x: int) -> int:
+            time.sleep(0.01)
+            return x + 1
+
+        for i in range(5):
+            assert dummy_func(i) == i + 1
+
+        tm = TimerDecorator.get_manager("test_tm")
+        assert len(tm) == 5
+        assert tm._timers == {}
+        stats = tm.to_dict()
+        assert stats["Count"] == 5
+        assert stats["Min"] > 0.01
+
+    def test_decorate_columnar(self):
+        @TimerDecorator.decorate("test_tm", columnar=True)
+        def dummy_func(x: int) -> int:
+            return x + 1
+
+        for i in range(5):
+            assert dummy_func(i) == i + 1
+
+        tm = TimerDecorator.get_manager("test_tm")
+        assert len(tm) == 5
+        assert tm._timers == {}
+        assert list(tm.to_dict()) == [f"test_tm({i})" for i in range(1, 6)]
+
+    def test_decorate_subtract_overhead(self):
+        @TimerDecorator.decorate("test_tm", columnar=True, subtract_overhead=True)
+        def dummy_func() -> None:
+            pass
+
+        dummy_func()
+        tm = TimerDecorator.get_manager("test_tm")
+        assert tm._subtract_overhead
+        assert tm._overhead_path == "record"
+        assert tm.to_tuples("ns")[0][1] >= 0
+
+        TimerDecorator.decorate("test_tm_dict")(dummy_func)
+        assert TimerDecorator.get_manager("test_tm_dict")._overhead_path == "timer"
+
+    def test_decorate_hierarchical(self):
+        @TimerDecorator.decorate("db", hierarchical=True)
+        def db() -> None:
+            pass
+
+        @TimerDecorator.decorate("request", aggregate=True, hierarchical=True)
+        def request() -> None:
+            db()
+            db()
+
+        request()
+        db()
+        tree = TimerDecorator.get_call_tree()
+        assert {path: count for path, count, *_ in tree.to_tuples()} == {
+            ("db",): 1, ("request",): 1, ("request", "db"): 2,
+        }
+        assert len(TimerDecorator.get_manager("db")) == 3
+
+    def test_decorate_hierarchical_async(self):
+        @TimerDecorator.decorate("child", hierarchical=True)
+        async def child() -> None:
+            await asyncio.sleep(0.01)
+
+        @TimerDecorator.decorate("parent", hierarchical=True)
+        async def parent() -> None:
+            await asyncio.gather(child(), child())
+
+        async def run():
+            await asyncio.gather(parent(), child())
+
+        asyncio.run(run())
+        tree = TimerDecorator.get_call_tree()
+        assert {path: count for path, count, *_ in tree.to_tuples()} == {
+            ("child",): 1, ("parent",): 1, ("parent", "child"): 2,
+        }
+
+    def test_decorate_sampled(self):
+        @TimerDecorator.decorate("test_tm", aggregate=True, sample_every=10)
+        def dummy_func(x: int) -> int:
+            return x + 1
+
+        for i in range(1000):
+            assert dummy_func(i) == i + 1
+
+        tm = TimerDecorator.get_manager("test_tm")
+        assert len(tm) == 100
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 1000
+        assert stats["Sampled"] == 100
+        assert stats["Total"] == pytest.approx(stats["Average"] * 1000)
+
+    def test_decorate_sampled_dict(self):
+        @TimerDecorator.decorate("test_tm", sample_every=2)
+        def dummy_func() -> None:
+            pass
+
+        for _ in range(5):
+            dummy_func()
+        assert list(TimerDecorator.get_manager("test_tm").to_dict()) == ["test_tm(1)", "test_tm(2)"]
+
+    def test_decorate_sampled_async(self):
+        @TimerDecorator.decorate("test_tm", columnar=True, sample_every=3)
+        async def dummy_func() -> int:
+            return 1
+
+        async def run():
+            return [await dummy_func() for _ in range(9)]
+
+        assert asyncio.run(run()) == [1] * 9
+        assert TimerDecorator.get_manager("test_tm").get_stats()["Sampled"] == 3
+
+    def test_decorate_sampled_raising(self):
+        from perfed.metrics import render_metrics
+
+        @TimerDecorator.decorate("test_tm", aggregate=True, sample_every=2)
+        def dummy_func(fail: bool) -> None:
+            if fail:
+                raise KeyError
+
+        dummy_func(False)
+        with pytest.raises(KeyError):
+            dummy_func(True)
+        tm = TimerDecorator.get_manager("test_tm")
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 2
+        assert stats["Sampled"] == 0
+        assert stats["Total"] == 0
+        assert tm.to_dict("ns")["Count"] == 2
+        assert 'perfed_duration_seconds_count{timer="test_tm"} 0' in render_metrics().splitlines()
+        assert TimerDecorator.get_report()["Count"].tolist() == [2]
+
+    def test_decorate_raising(self):
+        @TimerDecorator.decorate("test_tm")
+        def dummy_func() -> None:
+            raise KeyError
+
+        with pytest.raises(KeyError):
+            dummy_func()
+        tm = TimerDecorator.get_manager("test_tm")
+        assert tm.get_stats("ns")["Count"] == 1
+        assert tm._state() is not None
+
+    def test_decorate_raising_async(self):
+        @TimerDecorator.decorate("test_tm")
+        async def dummy_func() -> None:
+            raise KeyError
+
+        with pytest.raises(KeyError):
+            asyncio.run(dummy_func())
+        assert TimerDecorator.get_manager("test_tm")._state() is not None
+
+    def test_decorate_adaptive(self):
+        @TimerDecorator.decorate("test_tm", aggregate=True, max_samples_per_sec=1e9)
+        def dummy_func() -> None:
+            pass
+
+        for _ in range(100):
+            dummy_func()
+        assert TimerDecorator.get_manager("test_tm").get_stats()["Count"] == 100
+
+    def test_decorate_sampled_invalid(self):
+        with pytest.raises(ValueError):
+            TimerDecorator.decorate("test_tm", sample_every=0)
+        with pytest.raises(ValueError):
+            TimerDecorator.decorate("test_tm", hierarchical=True, sample_every=2)
+
+    def test_decorate_rolling(self):
+        @TimerDecorator.decorate("test_tm", rolling_window=60)
+        def dummy_func() -> None:
+            pass
+
+        for _ in range(5):
+            dummy_func()
+        tm = TimerDecorator.get_manager("test_tm")
+        assert tm._timers == {}
+        assert tm.get_stats(window=60)["Count"] == 5
+
+    def test_decorate_key(self):
+        @TimerDecorator.decorate("test_tm", key=lambda table, **_: table)
+        def fetch(table: str, limit: int = 10) -> str:
+            return table[:limit]
+
+        for table in ["orders", "users", "orders"]:
+            assert fetch(table, limit=3) == table[:3]
+        tm = TimerDecorator.get_manager("test_tm")
+        assert tm._columnar
+        assert len(tm) == 3
+        stats = tm.get_key_stats()
+        assert stats["orders"]["Count"] == 2
+        assert stats["users"]["Count"] == 1
+
+    def test_decorate_key_argument(self):
+        @TimerDecorator.decorate("test_tm", aggregate=True, key="table", max_keys=2)
+        def fetch(table: str = "default", limit: int = 10) -> str:
+            return table[:limit]
+
+        fetch("orders")
+        fetch(table="users", limit=1)
+        fetch(limit=1)
+        tm = TimerDecorator.get_manager("test_tm")
+        assert list(tm.get_key_stats()) == ["users", "default", "(other)"]
+        assert [key for key, _ in tm.top_keys(by="Count")] == ["users", "default"]
+
+    def test_decorate_key_async(self):
+        @TimerDecorator.decorate("test_tm", key="x")
+        async def dummy_func(x: int) -> int:
+            return x
+
+        async def run():
+            return [await dummy_func(i % 2) for i in range(4)]
+
+        assert asyncio.run(run()) == [0, 1, 0, 1]
+        assert TimerDecorator.get_manager("test_tm").get_key_stats()["1"]["Count"] == 2
+
+    def test_decorate_key_invalid(self):
+        with pytest.raises(ValueError):
+            @TimerDecorator.decorate("test_tm", key="y")
+            def dummy_func(x: int) -> int:
+                return x
+        with pytest.raises(ValueError):
+            TimerDecorator.decorate("test_tm_b", hierarchical=True, key="x")
+
+    @pytest.mark.parametrize("mode", [{}, {"aggregate": True}, {"thread_safe": True}])
+    def test_decorate_clocks(self, mode):
+        @TimerDecorator.decorate("test_tm", clocks=["process_time"], **mode)
+        def dummy_func() -> int:
+            return sum(range(100000))
+
+        for _ in range(3):
+            dummy_func()
+        stats = TimerDecorator.get_manager("test_tm").get_stats("ns")
+        assert stats["Count"] == 3
+        assert stats["Process Time Total"] > 0
+
+    def test_decorate_clocks_async(self):
+        @TimerDecorator.decorate("test_tm", columnar=True, clocks=["alloc"])
+        async def dummy_func() -> bytearray:
+            return bytearray(100_000)
+
+        asyncio.run(dummy_func())
+        assert TimerDecorator.get_manager("test_tm").to_dataframe()["Allocated"][0] >= 100_000
+
+    def test_decorate_clocks_invalid(self):
+        with pytest.raises(ValueError):
+            TimerDecorator.decorate("test_tm", clocks=["wall_time"])
+        with pytest.raises(ValueError):
+            TimerDecorator.decorate("test_tm_b", key="x", clocks=["gc"])
+        with pytest.raises(ValueError):
+            TimerDecorator.decorate("test_tm_c", hierarchical=True, clocks=["gc"])
+
+    def test_decorate_threads(self):
+        @TimerDecorator.decorate("test_tm")
+        def dummy_func(x: int) -> int:
+            return x + 1
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(dummy_func, range(2000)))
+
+        assert len(TimerDecorator.get_manager("test_tm")) == 2000
+
+    def test_decorate_thread_safe(self):
+        @TimerDecorator.decorate("test_tm", thread_safe=True)
+        def dummy_func(x: int) -> int:
+            return x + 1
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            assert list(executor.map(dummy_func, range(2000))) == list(range(1, 2001))
+
+        tm = TimerDecorator.get_manager("test_tm")
+        assert len(tm) == 2000
+        assert len(set(tm.to_dict())) == 2000
+
+    def test_decorate_async(self):
+        @TimerDecorator.decorate("test_tm")
+        async def dummy_func(x: int) -> int:
+            await asyncio.sleep(0.1)
+            return x + 1
+
+        async def run():
+            return await asyncio.gather(*(dummy_func(i) for i in range(100)))
+
+        assert asyncio.run(run()) == list(range(1, 101))
+
+        tm = TimerDecorator.get_manager("test_tm")
+        assert len(tm) == 100
+        for timer in tm._timers.values():
+            assert timer.get() > 0.1
+
+    def test_decorate_async_aggregate(self):
+        @TimerDecorator.decorate("test_tm", aggregate=True)
+        async def dummy_func(x: int) -> int:
+            await asyncio.sleep(0.1)
+            return x + 1
+
+        async def run():
+            return await asyncio.gather(*(dummy_func(i) for i in range(1000)))
+
+        assert asyncio.run(run()) == list(range(1, 1001))
+
+        stats = TimerDecorator.get_manager("test_tm").get_stats()
+        assert stats["Count"] == 1000
+        assert stats["Min"] > 0.1
+
     def test_decorate_already_exists(self):
         @TimerDecorator.decorate("test_tm")
         def dummy_func_a(x: int) -> int:
@@ -64,3 +374,74 @@ class TestTimerDecorator:
             return x + 1
 
         assert TimerDecorator.get_managers() == TimerDecorator._decorated_managers
+
+
+class TestTimerDecoratorRegistry:
+    @pytest.fixture
+    def decorated(self):
+        TimerDecorator.decorate("fast_tm", columnar=True)(lambda: None)
+        TimerDecorator.decorate("slow_tm", aggregate=True)(lambda: None)
+        TimerDecorator.decorate("empty_tm")(lambda: None)
+        TimerDecorator.get_manager("fast_tm").record(0, 1000)
+        TimerDecorator.get_manager("slow_tm").record(0, 5000)
+        TimerDecorator.get_manager("slow_tm").record(0, 7000)
+
+    def test_unregister(self):
+        @TimerDecorator.decorate("test_tm")
+        def dummy_func():
+            pass
+
+        manager = TimerDecorator.unregister("test_tm")
+        dummy_func()
+        assert len(manager) == 1
+        assert "test_tm" not in TimerDecorator.get_managers()
+        TimerDecorator.decorate("test_tm")(lambda: None)
+
+        with pytest.raises(ValueError):
+            TimerDecorator.unregister("test_tm_b")
+
+    def test_clear(self, decorated):
+        TimerDecorator.clear()
+        assert TimerDecorator.get_managers() == {}
+
+    def test_get_report(self, decorated):
+        report = TimerDecorator.get_report(unit="ns")
+        assert list(report.columns) == ["Timer Manager", "Count", "Total", "Average", "Max", "Min", "P99"]
+        assert list(report["Timer Manager"]) == ["slow_tm", "fast_tm", "empty_tm"]
+        assert list(report["Count"]) == [2, 1, 0]
+        assert list(report["Total"]) == [12000, 1000, 0]
+
+        report = TimerDecorator.get_report(unit="ms", sort_by="Count")
+        assert report["Total"][0] == 12.0
+        assert list(TimerDecorator.get_report(sort_by="Max")["Timer Manager"]) == ["slow_tm", "fast_tm", "empty_tm"]
+
+    def test_get_report_empty(self):
+        assert len(TimerDecorator.get_report()) == 0
+
+    def test_get_report_invalid(self, decorated):
+        with pytest.raises(ValueError):
+            TimerDecorator.get_report(sort_by="Median")
+
+    def test_get_report_reset(self, decorated):
+        assert list(TimerDecorator.get_report(reset=True)["Count"]) == [2, 1, 0]
+        TimerDecorator.get_manager("fast_tm").record(0, 1000)
+        report = TimerDecorator.get_report(unit="ns")
+        assert list(report["Timer Manager"]) == ["fast_tm", "slow_tm", "empty_tm"]
+        assert list(report["Count"]) == [1, 0, 0]
+
+    def test_show_report(self, decorated):
+        print_fn = Mock()
+        TimerDecorator.show_report(unit="ns", print_fn=print_fn)
+        output = print_fn.call_args[0][0]
+        assert output.index("slow_tm") < output.index("fast_tm") < output.index("empty_tm")
+
+    def test_snapshot(self, decorated):
+        snapshots = TimerDecorator.snapshot(reset=True)
+        assert sorted(snapshots) == ["empty_tm", "fast_tm", "slow_tm"]
+        assert len(snapshots["fast_tm"]) == 1
+        assert snapshots["slow_tm"].stats.count == 2
+        assert TimerDecorator.get_manager("slow_tm").get_stats("ns")["Count"] == 0
+
+    def test_reset(self, decorated):
+        TimerDecorator.reset()
+        assert all(manager.get_stats("ns")["Count"] == 0 for manager in TimerDecorator.get_managers().values())
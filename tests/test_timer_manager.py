@@ -1,17 +1,47 @@
+import gc
+import math
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from unittest.mock import Mock, call, mock_open, patch
 
 import pandas as pd
 import pytest
 
+from perfed.call_tree import current_call_path
 from perfed.timer import Timer
 from perfed.timer_manager import TimerManager
 
 
+def record_in_process(n: int):
+    tm = TimerManager("worker", columnar=True)
+    for i in range(n):
+        tm.record(0, i)
+    return tm.snapshot()
+
+
 @pytest.fixture
 def tm():
     return TimerManager("test_timer_manager")
 
 
+@pytest.fixture
+def tm_aggregate():
+    tm = TimerManager("test_timer_manager", aggregate=True)
+    tm.record(0, 1000000)
+    tm.record(0, 2000000)
+    tm.record(0, 3000000)
+    return tm
+
+
+@pytest.fixture
+def tm_columnar():
+    tm = TimerManager("test_timer_manager", columnar=True)
+    for name, stop in [("a", 1000000), ("b", 2000000), ("c", 3000000)]:
+        tm._samples.append(tm._samples.intern(name), 0, stop)
+    return tm
+
+
 @pytest.fixture
 def tm_with_timers(tm):
     timer_a = Timer("a")
@@ -60,6 +90,11 @@ class TestTimerManager:
         with pytest.raises(ValueError):
             tm.stop("a")
 
+    def test_start_existing(self, tm):
+        tm.start("a")
+        with pytest.raises(ValueError):
+            tm.start("a")
+
     def test_get_timer(self, tm_with_timers):
         assert tm_with_timers.get_timer("a") is tm_with_timers._timers.get("a")
         with pytest.raises(ValueError):
@@ -121,7 +156,7 @@ class TestTimerManager:
 
     def test_show(self, tm_with_timers):
         mocked_print_fn = Mock()
-        with patch("perfed.timer_manager.tabulate") as mocked_tabulate:
+        with patch("tabulate.tabulate") as mocked_tabulate:
             tm_with_timers.show(print_fn=mocked_print_fn)
 
         mocked_print_fn.assert_called_once()
@@ -129,8 +164,800 @@ class TestTimerManager:
 
     def test_show_stats(self, tm_with_timers):
         mocked_print_fn = Mock()
-        with patch("perfed.timer_manager.tabulate") as mocked_tabulate:
+        with patch("tabulate.tabulate") as mocked_tabulate:
             tm_with_timers.show_stats(print_fn=mocked_print_fn)
 
         mocked_print_fn.assert_called_once()
         mocked_tabulate.assert_called_once()
+
+    def test_get_stats(self, tm_with_timers):
+        stats = tm_with_timers.get_stats("ns")
+        assert stats["Count"] == 3
+        assert stats["Total"] == 6000000
+        assert stats["Average"] == 2000000
+        assert stats["Max"] == 3000000
+        assert stats["Min"] == 1000000
+        assert stats["Std"] == 1000000
+        assert stats["P50"] == 2000000
+        assert stats["P99"] == 2980000
+
+    def test_get_stats_quantiles(self):
+        tm = TimerManager("test_timer_manager", columnar=True, quantiles=[0.25, 0.75])
+        for i in range(1, 6):
+            tm.record(0, i)
+        stats = tm.get_stats("ns")
+        assert stats["P25"] == 2
+        assert stats["P75"] == 4
+        assert "P50" not in stats
+
+        with pytest.raises(ValueError):
+            TimerManager("test_timer_manager", quantiles=[99])
+
+    def test_get_stats_empty(self, tm):
+        stats = tm.get_stats()
+        assert stats["Count"] == 0
+        assert math.isnan(stats["Average"])
+        assert math.isnan(stats["P99"])
+        assert stats["Overhead"] > 0
+
+    def test_timer_durations_ns(self):
+        stopped = Timer("a")
+        stopped._start, stopped._stop = 100, 350
+        running = Timer("b")
+        running.start()
+        durations = TimerManager._timer_durations_ns([stopped, running])
+        assert durations.dtype == "int64"
+        assert durations[0] == 250
+        assert durations[1] > 0
+        assert len(TimerManager._timer_durations_ns([])) == 0
+        with pytest.raises(RuntimeError):
+            TimerManager._timer_durations_ns([Timer("c")])
+
+
+class TestTimerManagerOverhead:
+    @pytest.fixture(autouse=True)
+    def overhead(self):
+        with patch("perfed.timer_manager.instrumentation_overhead_ns", return_value=500000.0):
+            yield
+
+    def test_get_stats(self, tm_with_timers):
+        stats = tm_with_timers.get_stats("ns")
+        assert stats["Overhead"] == 500000
+        assert stats["Total"] == 6000000
+
+    def test_subtract(self, tm_with_timers):
+        tm_with_timers._subtract_overhead = True
+        assert tm_with_timers.to_dict("ns") == {"a": 500000, "b": 1500000, "c": 2500000}
+        stats = tm_with_timers.get_stats("ns")
+        assert stats["Total"] == 4500000
+        assert stats["Min"] == 500000
+        assert stats["Std"] == 1000000
+        assert stats["Overhead"] == 500000
+
+    def test_subtract_columnar(self):
+        tm = TimerManager("test_timer_manager", columnar=True, subtract_overhead=True)
+        tm.record(0, 100000)
+        tm.record(0, 1000000)
+        assert tm.to_tuples("ns") == [("test_timer_manager(1)", 0), ("test_timer_manager(2)", 500000)]
+
+    def test_subtract_aggregate(self, tm_aggregate):
+        tm_aggregate._subtract_overhead = True
+        stats = tm_aggregate.get_stats("ns")
+        assert stats["Total"] == 4500000
+        assert stats["Average"] == 1500000
+        assert stats["Max"] == 2500000
+        assert stats["Min"] == 500000
+        assert stats["Std"] == 1000000
+        assert stats["Overhead"] == 500000
+
+    def test_overhead_path(self):
+        with patch("perfed.timer_manager.instrumentation_overhead_ns", return_value=100.0) as overhead:
+            tm = TimerManager("test_timer_manager", columnar=True, subtract_overhead=True, overhead_path="record")
+            tm.record(0, 1000)
+            assert tm.get_stats("ns")["Total"] == 900
+        overhead.assert_called_with("record")
+
+        with pytest.raises(ValueError):
+            TimerManager("test_timer_manager", overhead_path="invalid")
+
+
+class TestTimerManagerAggregate:
+    def test_record(self, tm_aggregate):
+        assert len(tm_aggregate) == 3
+        assert tm_aggregate._timers == {}
+
+    def test_record_not_aggregate(self, tm):
+        with pytest.raises(RuntimeError):
+            tm.record(0, 1000)
+
+    def test_start_stop(self):
+        tm = TimerManager("test_timer_manager", aggregate=True)
+        tm.start("a")
+        assert "a" in tm._timers
+        tm.stop("a")
+        assert tm._timers == {}
+
+        with tm.start("a"):
+            pass
+        assert tm._timers == {}
+        assert len(tm) == 2
+
+    def test_to_dict(self, tm_aggregate):
+        assert tm_aggregate.to_dict("ns") == tm_aggregate.get_stats("ns")
+        assert tm_aggregate.to_dict("ns")["Average"] == 2000000
+
+    def test_quantiles(self):
+        tm = TimerManager("test_timer_manager", aggregate=True)
+        for i in range(1, 100001):
+            tm.record(0, i * 1000)
+
+        stats = tm.get_stats("ns")
+        for label, exact in [("P50", 50000000), ("P95", 95000000), ("P99", 99000000), ("P99.9", 99900000)]:
+            assert abs(stats[label] - exact) / exact <= 2 ** -7
+
+    def test_count_calls(self):
+        tm = TimerManager("test_timer_manager", aggregate=True)
+        for call, duration in [(10, 1000000), (20, 2000000), (30, 3000000)]:
+            tm.count_calls(call, every=10)
+            tm.record(0, duration)
+        tm.count_calls(20, every=10)
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 30
+        assert stats["Sampled"] == 3
+        assert stats["Total"] == 60000000
+        assert stats["Average"] == 2000000
+
+    def test_count_calls_rate_change(self):
+        tm = TimerManager("test_timer_manager", aggregate=True)
+        tm.count_calls(2, every=2)
+        tm.record(0, 1000)
+        tm.count_calls(12, every=10)
+        tm.record(0, 3000)
+        tm.count_calls(22, every=10)
+        tm.record(0, 3000)
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 22
+        assert stats["Sampled"] == 3
+        assert stats["Total"] == 2 * 1000 + 10 * (3000 + 3000)
+        tm.reset()
+        tm.count_calls(26, every=10)
+        tm.record(0, 500)
+        assert tm.get_stats("ns")["Total"] == 10 * 500
+
+    def test_to_tuples(self, tm_aggregate):
+        assert tm_aggregate.to_tuples("ms") == list(tm_aggregate.get_stats("ms").items())
+
+    def test_to_dataframe(self, tm_aggregate):
+        df = tm_aggregate.to_dataframe("ns")
+        assert list(df.columns) == ["Stat", "Value"]
+        assert df.set_index("Stat")["Value"]["Max"] == 3000000
+
+    def test_show_stats(self, tm_aggregate):
+        mocked_print_fn = Mock()
+        with patch("tabulate.tabulate") as mocked_tabulate:
+            tm_aggregate.show_stats(unit="ms", print_fn=mocked_print_fn)
+
+        mocked_print_fn.assert_called_once()
+        assert mocked_tabulate.call_args.args[0] == list(tm_aggregate.get_stats("ms").items())
+
+
+class TestTimerManagerColumnar:
+    def test_start_stop(self):
+        tm = TimerManager("test_timer_manager", columnar=True)
+        tm.start("a")
+        assert "a" in tm._timers
+        tm.stop("a")
+        assert tm._timers == {}
+        assert len(tm._samples) == 1
+
+        with tm.start("b"):
+            pass
+        assert len(tm) == 2
+        assert tm.get_timer("b")._stop > 0
+
+        with pytest.raises(ValueError):
+            tm.start("a")
+
+    def test_record(self):
+        tm = TimerManager("test_timer_manager", columnar=True)
+        tm.record(0, 1000)
+        tm.record(0, 2000)
+        assert tm.to_dict("ns") == {"test_timer_manager(1)": 1000, "test_timer_manager(2)": 2000}
+
+    def test_start_reserved_name(self):
+        tm = TimerManager("tm", columnar=True)
+        tm.record(0, 1000)
+        with pytest.raises(ValueError):
+            tm.start("tm(1)")
+        tm.start("tm(a)").stop()
+        assert len(tm.to_dict()) == len(tm) == 2
+
+    def test_get_timer(self, tm_columnar):
+        timer = tm_columnar.get_timer("b")
+        assert timer.get("ns") == 2000000
+        with pytest.raises(ValueError):
+            tm_columnar.get_timer("z")
+
+    def test_get_timers(self, tm_columnar):
+        tm_columnar.start("d")
+        assert list(tm_columnar.get_timers()) == ["a", "b", "c", "d"]
+
+    def test_to_tuples(self, tm_columnar):
+        assert tm_columnar.to_tuples() == [("a", 0.001), ("b", 0.002), ("c", 0.003)]
+
+    def test_to_dict(self, tm_columnar):
+        assert tm_columnar.to_dict() == {"a": 0.001, "b": 0.002, "c": 0.003}
+
+    def test_to_dict_running(self, tm_columnar):
+        tm_columnar.start("d")
+        assert tm_columnar.to_dict()["d"] > 0
+
+    def test_to_dataframe(self, tm_columnar):
+        expected = pd.DataFrame({
+            "Timer": ["a", "b", "c"],
+            "Duration": [0.001, 0.002, 0.003],
+        })
+        assert tm_columnar.to_dataframe().equals(expected)
+
+    def test_get_stats(self, tm_columnar, tm_with_timers):
+        assert tm_columnar.get_stats("ns") == tm_with_timers.get_stats("ns")
+
+
+class TestTimerManagerCache:
+    def test_cached_until_changed(self, tm_columnar):
+        compute_fn = tm_columnar._compute_labels_and_durations
+        with patch.object(tm_columnar, "_compute_labels_and_durations", wraps=compute_fn) as compute:
+            assert tm_columnar.to_dict("ns") == tm_columnar.to_dict("ns")
+            tm_columnar.to_tuples("sec")
+            tm_columnar.to_dataframe("ns")
+            assert compute.call_count == 1
+
+            tm_columnar.record(0, 4000000)
+            assert tm_columnar.to_dict("ns")["test_timer_manager(4)"] == 4000000
+            assert compute.call_count == 2
+
+    def test_copies(self, tm_columnar):
+        tm_columnar.to_dict()["a"] = 0
+        tm_columnar.to_tuples().clear()
+        tm_columnar.get_stats()["Count"] = 0
+        df = tm_columnar.to_dataframe()
+        df["Extra"] = 1
+        df.loc[0, "Duration"] = 0
+        assert tm_columnar.to_dict()["a"] == 0.001
+        assert len(tm_columnar.to_tuples()) == 3
+        assert tm_columnar.get_stats()["Count"] == 3
+        assert list(tm_columnar.to_dataframe().columns) == ["Timer", "Duration"]
+        assert tm_columnar.to_dataframe()["Duration"].iloc[0] == 0.001
+
+    def test_incremental_stats(self):
+        tm = TimerManager("test_timer_manager", columnar=True)
+        durations = list(range(1, 1001))
+        for start in range(0, 1000, 100):
+            for duration in durations[start:start + 100]:
+                tm.record(0, duration)
+            stats = tm.get_stats("ns")
+
+        assert stats["Count"] == 1000
+        assert stats["Total"] == sum(durations)
+        assert stats["P50"] == pytest.approx(500.5)
+        assert stats["Std"] == pytest.approx(pd.Series(durations).std())
+        assert len(tm._sample_stats._sorted) == 1000
+
+    def test_dict_mode(self, tm):
+        with tm.start("a"):
+            pass
+        assert tm.get_stats("ns")["Count"] == 1
+
+        timer = tm.start("b")
+        first = tm.to_dict("ns")["b"]
+        assert tm.to_dict("ns")["b"] > first
+        assert tm.get_stats("ns")["Count"] == 2
+        timer.stop()
+        assert tm.get_stats("ns")["Total"] == pytest.approx(sum(tm.to_dict("ns").values()))
+
+        tm._timers = {}
+        assert tm.get_stats("ns")["Count"] == 0
+
+    def test_running_not_cached(self, tm_columnar):
+        tm_columnar.start("d")
+        first = tm_columnar.to_dict("ns")["d"]
+        assert tm_columnar.to_dict("ns")["d"] > first
+        tm_columnar.stop("d")
+        assert tm_columnar.get_stats("ns")["Count"] == 4
+
+    def test_aggregate(self, tm_aggregate):
+        assert tm_aggregate.get_stats("ns")["Count"] == 3
+        tm_aggregate.record(0, 4000000)
+        assert tm_aggregate.get_stats("ns")["Count"] == 4
+        tm_aggregate.count_calls(8)
+        assert tm_aggregate.get_stats("ns")["Count"] == 8
+
+    def test_show_stats(self, tm_columnar):
+        print_fn = Mock()
+        with patch("tabulate.tabulate", return_value="table") as mocked_tabulate:
+            tm_columnar.show_stats(print_fn=print_fn)
+            tm_columnar.show_stats(print_fn=print_fn)
+        mocked_tabulate.assert_called_once()
+        assert print_fn.call_args_list == [call("table"), call("table")]
+
+
+class TestTimerManagerKeys:
+    @pytest.fixture
+    def tm_keys(self):
+        tm = TimerManager("test_timer_manager", aggregate=True, max_keys=3)
+        for key, duration in [("a", 1000), ("a", 3000), ("b", 5000), ("c", 100)]:
+            tm.record_key(key, 0, duration)
+        return tm
+
+    def test_record_key(self, tm_keys):
+        assert tm_keys.get_stats("ns")["Count"] == 4
+        stats = tm_keys.get_key_stats("ns")
+        assert list(stats) == ["a", "b", "c"]
+        assert stats["a"]["Count"] == 2
+        assert stats["a"]["Total"] == 4000
+        assert stats["a"]["Average"] == 2000
+
+    def test_evicted(self, tm_keys):
+        tm_keys.record_key("d", 0, 10)
+        stats = tm_keys.get_key_stats("ns")
+        assert list(stats) == ["b", "c", "d", "(other)"]
+        assert stats["(other)"]["Total"] == 4000
+
+    def test_top_keys(self, tm_keys):
+        assert [key for key, _ in tm_keys.top_keys(k=2)] == ["b", "a"]
+        assert [key for key, _ in tm_keys.top_keys(by="Count")][0] == "a"
+        with pytest.raises(ValueError):
+            tm_keys.top_keys(by="Overhead")
+
+    def test_show_keys(self, tm_keys):
+        print_fn = Mock()
+        with patch("tabulate.tabulate", return_value="table") as mocked_tabulate:
+            tm_keys.show_keys(unit="ns", print_fn=print_fn, k=1)
+        print_fn.assert_called_once_with("table")
+        rows = mocked_tabulate.call_args.args[0]
+        assert rows[0][:3] == ["b", 1, 5000]
+        assert mocked_tabulate.call_args.kwargs["headers"][:3] == ["Key", "Count", "Total"]
+
+    def test_columnar(self):
+        tm = TimerManager("test_timer_manager", columnar=True)
+        tm.record_key("a", 0, 1000)
+        assert tm.to_dict("ns") == {"test_timer_manager(1)": 1000}
+        assert tm.get_key_stats("ns")["a"]["Total"] == 1000
+        with pytest.raises(RuntimeError):
+            TimerManager("test_timer_manager").record_key("a", 0, 1000)
+
+    def test_thread_safe(self):
+        tm = TimerManager("test_timer_manager", thread_safe=True, max_keys=2)
+
+        def work(i):
+            for _ in range(100):
+                tm.record_key(f"k{i % 2}", 0, 10)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(work, range(4)))
+
+        stats = tm.get_key_stats("ns")
+        assert stats["k0"]["Count"] + stats["k1"]["Count"] == 400
+        assert "(other)" not in stats
+
+
+class TestTimerManagerClocks:
+    @pytest.mark.parametrize("mode", [{}, {"columnar": True}, {"aggregate": True}, {"thread_safe": True}])
+    def test_clocks(self, mode):
+        tm = TimerManager("test_timer_manager", clocks=["thread_time", "gc"], **mode)
+        for name in ["a", "b"]:
+            with tm.start(name):
+                sum(range(100000))
+                gc.collect()
+
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 2
+        assert stats["Thread Time Total"] > 0
+        assert stats["GC Pause Total"] > 0
+        assert stats["GC Pause Average"] == stats["GC Pause Total"] / 2
+        if not mode.get("aggregate"):
+            df = tm.to_dataframe("ns")
+            assert list(df.columns) == ["Timer", "Duration", "Thread Time", "GC Pause"]
+            assert df["Thread Time"].sum() == pytest.approx(stats["Thread Time Total"])
+            assert tm.get_timer("a").get_clocks("ns")["thread_time"] == df["Thread Time"][0]
+
+    def test_record_clocks(self):
+        tm = TimerManager("test_timer_manager", columnar=True, clocks=["alloc"])
+        tm.record_clocks(0, 1000, [64])
+        tm.record_clocks(0, 3000, [-32])
+        assert tm.get_stats("ns")["Allocated Total"] == 32
+        assert tm.to_dataframe("ns")["Allocated"].tolist() == [64, -32]
+
+        tm = TimerManager("test_timer_manager", aggregate=True, clocks=["alloc"])
+        tm.record_clocks(0, 1000, [64])
+        assert tm.get_stats("ns")["Allocated Average"] == 64
+        with pytest.raises(RuntimeError):
+            TimerManager("test_timer_manager", clocks=["alloc"]).record_clocks(0, 1000, [64])
+
+    def test_sampled(self):
+        tm = TimerManager("test_timer_manager", aggregate=True, clocks=["alloc"])
+        tm.count_calls(4, every=4)
+        tm.record_clocks(0, 1000, [64])
+        stats = tm.get_stats("ns")
+        assert stats["Allocated Total"] == 256
+        assert stats["Allocated Average"] == 64
+
+    def test_running(self):
+        tm = TimerManager("test_timer_manager", clocks=["thread_time"])
+        tm.start("a")
+        sum(range(100000))
+        assert tm.get_stats("ns")["Thread Time Total"] > 0
+
+    def test_snapshot(self):
+        tm = TimerManager("test_timer_manager", clocks=["alloc"])
+        with tm.start("a"):
+            pass
+        tm.get_timer("a")._clocks = [64]
+        merged = TimerManager("merged", columnar=True, clocks=["alloc", "gc"])
+        merged.merge(tm.snapshot())
+        assert merged.to_dataframe("ns")[["Allocated", "GC Pause"]].values.tolist() == [[64, 0]]
+
+    def test_no_clocks(self):
+        tm = TimerManager("test_timer_manager", columnar=True)
+        with tm.start("a"):
+            pass
+        assert "Thread Time Total" not in tm.get_stats()
+        assert list(tm.to_dataframe().columns) == ["Timer", "Duration"]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            TimerManager("test_timer_manager", clocks=["wall_time"])
+
+
+class TestTimerManagerAccumulators:
+    def test_accumulator(self):
+        tm = TimerManager("test_timer_manager")
+        for _ in range(3):
+            with tm.accumulator("loop", max_laps=10):
+                pass
+        assert tm.accumulator("loop") is tm.get_accumulators()["loop"]
+        assert len(tm.accumulator("loop")) == 3
+        assert len(tm) == 0
+        stats = tm.get_accumulator_stats("ns")
+        assert stats["loop"]["Count"] == 3
+        assert stats["loop"]["Total"] == tm.accumulator("loop").get("ns")
+
+    def test_thread_safe(self):
+        tm = TimerManager("test_timer_manager", thread_safe=True)
+
+        def work(_):
+            for _ in range(100):
+                with tm.accumulator("loop", max_laps=50):
+                    pass
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(work, range(4)))
+
+        accumulators = tm.get_accumulators()
+        assert len(accumulators["loop"]) == 400
+        assert len(accumulators["loop"].laps()) == 50
+
+    def test_show_accumulators(self):
+        tm = TimerManager("test_timer_manager")
+        tm.accumulator("loop").stats.add(1000)
+        print_fn = Mock()
+        with patch("tabulate.tabulate", return_value="table") as mocked_tabulate:
+            tm.show_accumulators(unit="ns", print_fn=print_fn)
+        print_fn.assert_called_once_with("table")
+        assert mocked_tabulate.call_args.args[0][0][:3] == ["loop", 1, 1000]
+        assert mocked_tabulate.call_args.kwargs["headers"][:3] == ["Accumulator", "Count", "Total"]
+
+
+class TestTimerManagerThreadSafe:
+    def test_record(self):
+        tm = TimerManager("test_timer_manager", thread_safe=True)
+
+        def work(_):
+            for i in range(1000):
+                tm.record(0, i)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(work, range(16)))
+
+        assert 1 <= len(tm._thread_shards) <= 16
+        assert len(tm) == 16000
+        timers = tm.to_dict("ns")
+        assert len(timers) == 16000
+        assert sum(timers.values()) == 16 * sum(range(1000))
+
+    def test_record_aggregate(self):
+        tm = TimerManager("test_timer_manager", aggregate=True, thread_safe=True)
+
+        def work(_):
+            for i in range(1000):
+                tm.record(0, i)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(work, range(16)))
+
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 16000
+        assert stats["Total"] == 16 * sum(range(1000))
+        assert stats["Max"] == 999
+
+    def test_start_stop(self):
+        tm = TimerManager("test_timer_manager", thread_safe=True)
+
+        def work(i):
+            with tm.start(f"t{i}"):
+                pass
+            tm.start("shared")
+            tm.stop("shared")
+
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The shards of exited threads are folded into one.
+        assert tm._thread_shards == [tm._retired]
+        assert len(tm) == 8
+        assert tm.get_timer("t3")._stop > 0
+        assert set(tm.get_timers()) == {"t0", "t1", "t2", "t3", "shared"}
+
+    def test_retire(self):
+        tm = TimerManager("test_timer_manager", aggregate=True, thread_safe=True)
+        tm.record(0, 1)
+
+        def work(i):
+            tm.record(0, 10)
+            tm.record_key(str(i), 0, 10)
+            with tm.accumulator("loop"):
+                pass
+
+        for i in range(20):
+            thread = threading.Thread(target=work, args=(i,))
+            thread.start()
+            thread.join()
+
+        assert len(tm._thread_shards) == 2
+        stats = tm.get_stats("ns")
+        # Keyed samples are also recorded.
+        assert stats["Count"] == 41
+        assert stats["Total"] == 401
+        assert len(tm.get_accumulators()["loop"]) == 20
+        assert len(tm.get_key_stats()) == 20
+
+    def test_retire_incremental_stats(self):
+        tm = TimerManager("test_timer_manager", thread_safe=True)
+
+        def work():
+            tm.record(0, 10)
+
+        # Stats are updated with the samples of each thread before and after its shard is retired.
+        for _ in range(4):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+            tm.get_stats("ns")
+        stats = tm.get_stats("ns")
+        assert len(tm._thread_shards) == 1
+        assert stats["Count"] == 4
+        assert stats["Total"] == 40
+        assert stats["P50"] == 10
+
+
+class TestTimerManagerBinary:
+    def test_save_load(self, tm_with_timers, tmp_path):
+        path = str(tmp_path / "timers.bin")
+        tm_with_timers.start("running")
+        tm_with_timers.save(path, "binary")
+        loaded = TimerManager.load(path, name="loaded")
+        assert loaded.to_dict("ns") == {"a": 1000000, "b": 2000000, "c": 3000000}
+
+    def test_save_append(self, tmp_path):
+        path = str(tmp_path / "timers.bin")
+        for _ in range(2):
+            tm = TimerManager("worker", columnar=True)
+            tm.record(0, 1000)
+            tm.record(0, 2000)
+            tm.save(path, "binary", mode="a")
+
+        loaded = TimerManager.load(path, name="worker")
+        assert loaded.to_tuples("ns") == [
+            ("worker(1)", 1000), ("worker(2)", 2000), ("worker(3)", 1000), ("worker(4)", 2000),
+        ]
+
+        aggregated = TimerManager.load(path, aggregate=True)
+        assert aggregated.get_stats("ns")["Total"] == 6000
+
+    def test_save_append_truncated(self, tmp_path):
+        path = tmp_path / "timers.bin"
+        tm = TimerManager("worker", columnar=True)
+        tm.record(0, 1000)
+        tm.save(str(path), "binary")
+        tm.save(str(path), "binary", mode="a")
+        # An interrupted save leaves a partial segment behind.
+        with open(path, "r+b") as fp:
+            fp.truncate(path.stat().st_size - 8)
+        tm.save(str(path), "binary", mode="a")
+        assert len(TimerManager.load(str(path))) == 2
+
+    def test_save_aggregate(self, tm_aggregate, tmp_path):
+        with pytest.raises(ValueError):
+            tm_aggregate.save(str(tmp_path / "timers.bin"), "binary")
+
+
+class TestTimerManagerRolling:
+    def test_window(self):
+        tm = TimerManager("test_timer_manager", rolling_window=60, rolling_interval=10)
+        assert tm._aggregate
+        with patch("perfed.timer_manager.time.perf_counter_ns", return_value=100_000_000_000):
+            tm.record(0, 5_000_000_000)
+            tm.record(0, 95_000_000_000)
+            tm.record(0, 99_000_000_000)
+            stats = tm.get_stats("ns", window=10)
+        assert stats["Count"] == 2
+        assert stats["Total"] == 194_000_000_000
+        assert tm.get_stats("ns")["Count"] == 3
+
+    def test_show_stats(self):
+        tm = TimerManager("test_timer_manager", rolling_window=60)
+        mocked_print_fn = Mock()
+        with tm.start("a"):
+            pass
+        with patch("tabulate.tabulate") as mocked_tabulate:
+            tm.show_stats(unit="ns", print_fn=mocked_print_fn, window=60)
+        assert mocked_tabulate.call_args.args[0][0] == ("Count", 1)
+
+    def test_thread_safe(self):
+        tm = TimerManager("test_timer_manager", thread_safe=True, rolling_window=60)
+        threads = [threading.Thread(target=tm.record, args=(i, i + 1000)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        now = 1000
+        with patch("perfed.timer_manager.time.perf_counter_ns", return_value=now):
+            assert tm.get_stats("ns", window=60)["Count"] == 4
+
+    def test_invalid_window(self, tm, tm_aggregate):
+        with pytest.raises(ValueError):
+            tm.get_stats(window=60)
+        with pytest.raises(ValueError):
+            tm_aggregate.get_stats(window=60)
+        with pytest.raises(ValueError):
+            TimerManager("test_timer_manager", rolling_window=60).get_stats(window=120)
+
+
+class TestTimerManagerHierarchical:
+    def test_start_stop(self):
+        tm = TimerManager("test_timer_manager", aggregate=True, hierarchical=True)
+        with tm.start("request"):
+            with tm.start("db"):
+                pass
+            tm.start("render")
+            tm.stop("render")
+        with tm.start("db"):
+            assert current_call_path() == ("db",)
+
+        assert current_call_path() == ()
+        assert [row[:2] for row in tm.get_call_tree().to_tuples()] == [
+            (("db",), 1), (("request",), 1), (("request", "db"), 1), (("request", "render"), 1),
+        ]
+
+    def test_nested_managers(self):
+        outer = TimerManager("outer", hierarchical=True)
+        inner = TimerManager("inner", aggregate=True, hierarchical=True)
+        with outer.start("request"):
+            inner.record(0, 1000)
+        assert inner.get_call_tree()._nodes == {("request", "inner"): [1, 1000]}
+        assert len(inner) == 1
+
+    def test_threads(self):
+        tm = TimerManager("test_timer_manager", thread_safe=True, hierarchical=True)
+
+        def work():
+            with tm.start("a"):
+                with tm.start("b"):
+                    pass
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert tm.get_call_tree()._nodes[("a", "b")][0] == 4
+
+    def test_snapshot(self):
+        tm = TimerManager("test_timer_manager", columnar=True, hierarchical=True)
+        with tm.start("a"):
+            pass
+        merged = TimerManager("test_timer_manager", columnar=True)
+        merged.merge(pickle.loads(pickle.dumps(tm.snapshot())))
+        merged.merge(tm.snapshot())
+        assert merged.get_call_tree()._nodes[("a",)][0] == 2
+
+
+class TestTimerManagerSnapshot:
+    def test_snapshot(self, tm_with_timers):
+        snapshot = pickle.loads(pickle.dumps(tm_with_timers.snapshot()))
+        assert len(snapshot) == 3
+
+        tm = TimerManager("merged")
+        tm.merge(snapshot)
+        assert tm.to_dict() == tm_with_timers.to_dict()
+
+        with pytest.raises(ValueError):
+            tm.merge(snapshot)
+
+    def test_snapshot_running(self, tm):
+        tm.start("a")
+        assert len(tm.snapshot()) == 0
+
+    def test_merge_columnar(self, tm_columnar):
+        tm = TimerManager("merged", columnar=True)
+        tm.merge(tm_columnar.snapshot())
+        tm.merge(tm_columnar.snapshot())
+        assert len(tm) == 6
+        assert tm.get_stats("ns")["Total"] == 12000000
+
+    def test_merge_aggregate(self, tm_aggregate, tm_columnar):
+        tm = TimerManager("merged", aggregate=True)
+        tm.merge(tm_aggregate.snapshot())
+        tm.merge(tm_columnar.snapshot())
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 6
+        assert stats["Max"] == 3000000
+
+        with pytest.raises(ValueError):
+            TimerManager("merged", columnar=True).merge(tm_aggregate.snapshot())
+
+    def test_merge_processes(self):
+        tm = TimerManager("merged", columnar=True)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for snapshot in executor.map(record_in_process, [10, 20, 30]):
+                tm.merge(snapshot)
+
+        assert len(tm) == 60
+        assert len(tm.to_dict()) == 60
+
+
+class TestTimerManagerReset:
+    def test_reset_dict(self, tm):
+        with tm.start("a"):
+            pass
+        tm.start("b")
+        assert tm.get_stats("ns")["Count"] == 2
+        tm.reset()
+        assert list(tm.get_timers()) == ["b"]
+        tm.stop("b")
+        assert tm.get_stats("ns")["Count"] == 1
+
+    def test_reset_columnar(self, tm_columnar):
+        assert tm_columnar.get_stats("ns")["Count"] == 3
+        tm_columnar.reset()
+        assert len(tm_columnar) == 0
+        assert tm_columnar.get_stats("ns")["Count"] == 0
+        tm_columnar.record(0, 5)
+        assert tm_columnar.get_stats("ns")["Total"] == 5
+
+    def test_reset_aggregate(self, tm_aggregate):
+        tm_aggregate.reset()
+        assert tm_aggregate.get_stats("ns")["Count"] == 0
+
+    def test_reset_thread_safe(self):
+        tm = TimerManager("tm", thread_safe=True)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda i: tm.record(0, i), range(10)))
+        tm.reset()
+        tm.record(0, 7)
+        stats = tm.get_stats("ns")
+        assert stats["Count"] == 1
+        assert stats["Total"] == 7
+
+    def test_reset_sampled(self, tm_aggregate):
+        tm_aggregate.count_calls(10)
+        tm_aggregate.reset()
+        tm_aggregate.record(0, 100)
+        tm_aggregate.count_calls(14)
+        stats = tm_aggregate.get_stats("ns")
+        assert stats["Count"] == 4
+        assert stats["Sampled"] == 1
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+
+import pytest
+
+from perfed.exporter import BackgroundExporter
+from perfed.timer_decorator import TimerDecorator
+from perfed.timer_manager import TimerManager
+from perfed.trace import TraceSink, TraceWriter, save_trace
+
+
+def read_events(path):
+    with open(path) as fp:
+        events = json.load(fp)
+    return [event for event in events if event["ph"] == "X"], [event for event in events if event["ph"] == "M"]
+
+
+class TestTraceWriter:
+    def test_write_manager_dict(self, tmp_path):
+        tm = TimerManager("tm")
+        with tm.start("a"):
+            pass
+        with tm.start("b"):
+            pass
+        tm.start("running")
+        path = tmp_path / "trace.json"
+        with TraceWriter(path) as writer:
+            writer.write_manager(tm)
+        assert len(writer) == 3
+
+        events, metadata = read_events(path)
+        assert [event["name"] for event in events] == ["a", "b"]
+        timer = tm.get_timer("a")
+        assert events[0]["ts"] == timer._start / 1e3
+        assert events[0]["dur"] == (timer._stop - timer._start) / 1e3
+        assert events[0]["ts"] + events[0]["dur"] <= events[1]["ts"]
+        assert all(event["cat"] == "tm" and event["pid"] == os.getpid() for event in events)
+        thread = threading.current_thread()
+        assert all(event["tid"] == thread.native_id for event in events)
+        assert metadata == [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.native_id, "args": {"name": thread.name}},
+        ]
+
+    def test_write_manager_thread_safe(self, tmp_path):
+        tm = TimerManager("tm", thread_safe=True)
+
+        def work():
+            for i in range(5):
+                tm.record(i, i + 1)
+
+        threads = [threading.Thread(target=work, name=f"worker-{i}") for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        path = tmp_path / "trace.json"
+        with TraceWriter(path, chunk_rows=2) as writer:
+            writer.write_manager(tm)
+
+        events, metadata = read_events(path)
+        assert len(events) == 15
+        assert len({event["tid"] for event in events}) == len({event["tid"] for event in metadata})
+        assert sorted(event["args"]["name"] for event in metadata) == ["worker-0", "worker-1", "worker-2"]
+
+    def test_write_manager_columnar(self, tmp_path):
+        tm = TimerManager("tm", columnar=True)
+        tm.record(1_000, 3_000)
+        with tm.start("a"):
+            pass
+        path = tmp_path / "trace.json"
+        with TraceWriter(path) as writer:
+            writer.write_manager(tm)
+
+        events, _ = read_events(path)
+        assert [event["name"] for event in events] == ["tm", "a"]
+        assert events[0]["ts"] == 1.0
+        assert events[0]["dur"] == 2.0
+
+    def test_write_manager_not_thread_safe(self, tmp_path):
+        tm = TimerManager("tm", columnar=True)
+        path = tmp_path / "trace.json"
+        writer = TraceWriter(path)
+
+        def work():
+            tm.record(0, 10)
+            with tm.start("a"):
+                pass
+            writer.write_manager(tm)
+
+        thread = threading.Thread(target=work, name="worker")
+        thread.start()
+        thread.join()
+        tm.record(20, 30)
+        writer.close()
+
+        events, metadata = read_events(path)
+        assert [event["tid"] for event in events] == [thread.native_id, thread.native_id]
+        assert [event["args"]["name"] for event in metadata] == ["worker"]
+
+    def test_write_manager_unknown_thread(self, tmp_path):
+        source = TimerManager("tm", columnar=True)
+        source.record(0, 10)
+        source.save(str(tmp_path / "timers.bin"), "binary")
+        path = tmp_path / "trace.json"
+        with TraceWriter(path) as writer:
+            writer.write_manager(TimerManager.load(str(tmp_path / "timers.bin"), name="tm"))
+
+        events, metadata = read_events(path)
+        assert events[0]["tid"] == 0
+        assert [event["args"]["name"] for event in metadata] == ["Unknown thread"]
+
+    def test_write_manager_aggregate(self, tmp_path):
+        tm = TimerManager("tm", aggregate=True)
+        tm.record(0, 10)
+        path = tmp_path / "trace.json"
+        with TraceWriter(path) as writer:
+            writer.write_manager(tm)
+        assert read_events(path) == ([], [])
+
+    def test_escapes_names(self, tmp_path):
+        tm = TimerManager('t"m')
+        with tm.start('a"\\b'):
+            pass
+        path = tmp_path / "trace.json"
+        with TraceWriter(path) as writer:
+            writer.write_manager(tm)
+        events, _ = read_events(path)
+        assert events[0]["name"] == 'a"\\b'
+        assert events[0]["cat"] == 't"m'
+
+    def test_invalid(self, tmp_path):
+        with pytest.raises(ValueError):
+            TraceWriter(tmp_path / "trace.json", mode="a")
+        with pytest.raises(ValueError):
+            TraceWriter(tmp_path / "trace.json", chunk_rows=0)
+
+
+class TestTraceSink:
+    def test_exporter(self, tmp_path):
+        tm = TimerManager("tm", thread_safe=True)
+        path = tmp_path / "trace.json"
+        with BackgroundExporter([TraceSink(path, chunk_rows=3)], [tm], interval=60) as exporter:
+            tm.record(0, 10)
+            exporter.flush()
+            thread = threading.Thread(target=lambda: [tm.record(i, i + 10) for i in range(4)], name="worker")
+            thread.start()
+            thread.join()
+
+        events, metadata = read_events(path)
+        assert len(events) == 5
+        assert len({event["tid"] for event in events}) == 2
+        assert "worker" in [event["args"]["name"] for event in metadata]
+
+
+class TestSaveTrace:
+    def test_managers(self, tmp_path):
+        first = TimerManager("first", columnar=True)
+        second = TimerManager("second", columnar=True)
+        first.record(0, 10)
+        second.record(5, 20)
+        path = tmp_path / "trace.json"
+        save_trace(path, {"first": first, "second": second})
+        events, _ = read_events(path)
+        assert [event["cat"] for event in events] == ["first", "second"]
+
+    def test_save(self, tmp_path):
+        tm = TimerManager("tm", columnar=True)
+        tm.record(0, 10)
+        path = tmp_path / "trace.json"
+        tm.save(path, "trace")
+        events, _ = read_events(path)
+        assert len(events) == 1
+        with pytest.raises(ValueError):
+            tm.save(path, "trace", mode="a")
+        with pytest.raises(ValueError):
+            TimerManager("agg", aggregate=True).save(path, "trace")
+
+    def test_decorated_managers(self, tmp_path):
+        @TimerDecorator.decorate("trace_test_tm")
+        def foo():
+            pass
+
+        foo()
+        path = tmp_path / "trace.json"
+        save_trace(path)
+        events, _ = read_events(path)
+        assert "trace_test_tm" in [event["cat"] for event in events]
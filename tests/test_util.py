@@ -1,6 +1,7 @@
+import numpy as np
 import pytest
 
-from perfed.util import convert_from_ns
+from perfed.util import convert_array_from_ns, convert_from_ns
 
 
 def test_convert_from_ns():
@@ -11,3 +12,12 @@ def test_convert_from_ns():
     assert convert_from_ns(time_ns=time_ns, unit="min") == time_ns / 1e9 / 60
     with pytest.raises(ValueError):
         convert_from_ns(time_ns=time_ns, unit="aa")  # type: ignore
+
+
+def test_convert_array_from_ns():
+    times_ns = np.array([100000, 200000], dtype=np.int64)
+    for unit in ["ns", "ms", "sec", "min"]:
+        converted = convert_array_from_ns(times_ns=times_ns, unit=unit)  # type: ignore
+        assert converted.tolist() == [convert_from_ns(time_ns, unit=unit) for time_ns in times_ns]  # type: ignore
+    with pytest.raises(ValueError):
+        convert_array_from_ns(times_ns=times_ns, unit="aa")  # type: ignore